@@ -0,0 +1,190 @@
+# -*- coding: utf-8 -*-
+
+# Copyright 2016 Open Permissions Platform Coalition
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License. You may obtain a copy of the License at
+# http://www.apache.org/licenses/LICENSE-2.0
+# Unless required by applicable law or agreed to in writing, software distributed under the License is
+# distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and limitations under the License.
+
+"""Validate, parse and generate batches of hub keys without blocking the
+IOLoop
+
+Requires tornado. Batches are split into chunks of chunk_size keys. Without
+an executor each chunk runs in a callback on the current IOLoop, so other
+callbacks run between chunks. With an executor, e.g. a
+concurrent.futures.ThreadPoolExecutor or ProcessPoolExecutor, chunks are
+submitted to it, up to window chunks at a time.
+
+The functions return a Future of the whole batch's results:
+
+    valid = yield is_hub_keys(keys)
+
+and the *_chunks functions return a generator of Futures of each chunk's
+results, in order:
+
+    for future in is_hub_key_chunks(keys):
+        valid = yield future
+"""
+import sys
+from collections import deque
+from itertools import islice
+
+from tornado import gen
+from tornado.concurrent import Future
+from tornado.ioloop import IOLoop
+
+from bass import hubkey
+
+CHUNK_SIZE = 1000
+# Number of chunks submitted to an executor ahead of the results
+WINDOW = 4
+
+
+def _chunked(iterable, size):
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def _call_soon(func, args):
+    """Call func in a callback on the current IOLoop
+
+    :returns: Future of func's result
+    """
+    future = Future()
+
+    def callback():
+        try:
+            future.set_result(func(*args))
+        except Exception:
+            future.set_exc_info(sys.exc_info())
+
+    IOLoop.current().add_callback(callback)
+    return future
+
+
+def _futures(func, chunks, executor=None, window=WINDOW):
+    """Call func with each tuple of arguments in chunks
+
+    :returns: generator of Futures of func's results, in order
+    """
+    if executor is None:
+        for args in chunks:
+            yield _call_soon(func, args)
+        return
+
+    pending = deque()
+    for args in chunks:
+        pending.append(executor.submit(func, *args))
+        if len(pending) >= window:
+            yield pending.popleft()
+    while pending:
+        yield pending.popleft()
+
+
+@gen.coroutine
+def _gather(futures):
+    results = []
+    for future in futures:
+        results.extend((yield future))
+    raise gen.Return(results)
+
+
+# The chunks' functions are module functions, so that they can be pickled
+# for a process executor
+def _is_hub_key_chunk(keys, hub_id):
+    is_hub_key = hubkey.is_hub_key
+    return [is_hub_key(key, hub_id) for key in keys]
+
+
+def _parse_hub_key_chunk(keys, on_error, hub_id):
+    return list(hubkey.parse_hub_keys(keys, on_error, hub_id))
+
+
+def _generate_hub_key_chunk(factory, size):
+    return factory.batch(size)
+
+
+def is_hub_key_chunks(keys, hub_id=None, chunk_size=CHUNK_SIZE, executor=None, window=WINDOW):
+    """Check whether keys are hub keys, a chunk at a time
+
+    :param keys: iterable of values
+    :param hub_id: optional hub_id, or iterable of hub_ids, that the keys
+        must have. Defaults to the configured hub_id
+    :param chunk_size: int, number of keys in a chunk
+    :param executor: optional executor to run the chunks, defaults to the
+        current IOLoop
+    :param window: int, number of chunks submitted to the executor ahead
+    :returns: generator of Futures of lists of bools
+    """
+    chunks = ((chunk, hub_id) for chunk in _chunked(keys, chunk_size))
+    return _futures(_is_hub_key_chunk, chunks, executor, window)
+
+
+def is_hub_keys(keys, hub_id=None, chunk_size=CHUNK_SIZE, executor=None, window=WINDOW):
+    """Check whether keys are hub keys, see is_hub_key_chunks
+
+    :returns: Future of a list of bools
+    """
+    return _gather(is_hub_key_chunks(keys, hub_id, chunk_size, executor, window))
+
+
+def parse_hub_key_chunks(keys, on_error='raise', hub_id=None, chunk_size=CHUNK_SIZE, executor=None,
+                         window=WINDOW):
+    """Parse hub keys, a chunk at a time
+
+    :param keys: iterable of hub keys
+    :param on_error: what to do with an invalid key, see
+        bass.hubkey.parse_hub_keys
+    :param hub_id: optional hub_id, or iterable of hub_ids, that the keys
+        must have. Defaults to the configured hub_id
+    :param chunk_size: int, number of keys in a chunk
+    :param executor: optional executor to run the chunks, defaults to the
+        current IOLoop
+    :param window: int, number of chunks submitted to the executor ahead
+    :returns: generator of Futures of lists of dicts
+    :raises: ValueError if on_error is not valid. Invalid keys raise when
+        their chunk's Future is yielded
+    """
+    if on_error not in hubkey.ON_ERROR:
+        raise ValueError('on_error should be one of {}'.format(', '.join(hubkey.ON_ERROR)))
+
+    chunks = ((chunk, on_error, hub_id) for chunk in _chunked(keys, chunk_size))
+    return _futures(_parse_hub_key_chunk, chunks, executor, window)
+
+
+def parse_hub_keys(keys, on_error='raise', hub_id=None, chunk_size=CHUNK_SIZE, executor=None,
+                   window=WINDOW):
+    """Parse hub keys, see parse_hub_key_chunks
+
+    :returns: Future of a list of dicts
+    """
+    return _gather(parse_hub_key_chunks(keys, on_error, hub_id, chunk_size, executor, window))
+
+
+def generate_hub_key_chunks(factory, n, chunk_size=CHUNK_SIZE, executor=None, window=WINDOW):
+    """Generate hub keys, a chunk at a time
+
+    :param factory: bass.hubkey.HubKeyFactory
+    :param n: int, number of keys
+    :param chunk_size: int, number of keys in a chunk
+    :param executor: optional executor to run the chunks, defaults to the
+        current IOLoop
+    :param window: int, number of chunks submitted to the executor ahead
+    :returns: generator of Futures of lists of str hub keys
+    """
+    chunks = ((factory, min(chunk_size, n - start)) for start in xrange(0, n, chunk_size))
+    return _futures(_generate_hub_key_chunk, chunks, executor, window)
+
+
+def generate_hub_keys(factory, n, chunk_size=CHUNK_SIZE, executor=None, window=WINDOW):
+    """Generate hub keys, see generate_hub_key_chunks
+
+    :returns: Future of a list of str hub keys
+    """
+    return _gather(generate_hub_key_chunks(factory, n, chunk_size, executor, window))
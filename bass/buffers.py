@@ -0,0 +1,130 @@
+# -*- coding: utf-8 -*-
+
+# Copyright 2016 Open Permissions Platform Coalition
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License. You may obtain a copy of the License at
+# http://www.apache.org/licenses/LICENSE-2.0
+# Unless required by applicable law or agreed to in writing, software distributed under the License is
+# distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and limitations under the License.
+
+"""Parse, validate and generate hub keys held as bytes
+
+The functions take a key as a str, bytearray, buffer, mmap or memoryview,
+e.g. a message body, without decoding it to unicode. The key's
+schema_version and hub_id parts select a schema, as in bass.hubkey, whose
+pattern is matched against the bytes in place. The results are the same as
+bass.hubkey's functions give for the key as a str. A str is passed to
+bass.hubkey's functions, which take bytes already.
+
+With views=True, parse_hub_key returns the parts as memoryview slices of
+the key instead of copying them. s0 parts that are normalised to lower case
+are views of new lower case bytes. A memoryview of the key is copied
+before it is matched, as re cannot match a memoryview, and an mmap cannot
+be viewed.
+"""
+from bass import hubkey
+
+
+def _buffer(data):
+    if isinstance(data, memoryview):
+        return data.tobytes()
+    if isinstance(data, unicode):
+        raise TypeError('Hub key should be bytes')
+    return data
+
+
+def _match(data, hub_id):
+    """Match a key against the schemas for its schema_version and hub_id
+
+    :returns: (Schema, match object), or (None, None)
+    :raises: TypeError if data is not bytes
+    """
+    data = _buffer(data)
+    for schema in hubkey.candidate_schemas(data, hub_id):
+        match = schema.pattern.match(data)
+        if match:
+            return schema, match
+    return None, None
+
+
+def is_hub_key(data, hub_id=None):
+    """Test if bytes could be a hub key
+
+    :param data: str, bytearray, buffer, mmap or memoryview
+    :param hub_id: optional hub_id, or iterable of hub_ids, that the key
+        must have. Defaults to the configured hub_id
+    :returns: True if it is a hub key
+    """
+    if type(data) is str:
+        return hubkey.is_hub_key(data, hub_id)
+
+    try:
+        return data is not None and _match(data, hub_id)[0] is not None
+    except TypeError:
+        return False
+
+
+def parse_hub_key(data, hub_id=None, views=False):
+    """Parse bytes into a dictionary of component parts
+
+    :param data: str, bytearray, buffer, mmap or memoryview, a hub key
+    :param hub_id: optional hub_id, or iterable of hub_ids, that the key
+        must have. Defaults to the configured hub_id
+    :param views: if True the parts are memoryviews of data, otherwise
+        they are str
+    :returns: dict, hub key split into parts
+    :raises: ValueError if data is not a valid hub key, TypeError if it is
+        not bytes
+    """
+    if type(data) is str and not views:
+        return hubkey.parse_hub_key(data, hub_id)
+    if data is None:
+        raise ValueError('Not a valid key')
+
+    schema, match = _match(data, hub_id)
+    if not schema:
+        raise ValueError('Not a valid key')
+
+    spans = [match.span(i) for i in xrange(1, len(schema.fields) + 1)]
+    if views:
+        view = memoryview(data)
+        values = [view[start:end] for start, end in spans]
+    else:
+        buffer = match.string
+        values = [str(buffer[start:end]) for start, end in spans]
+
+    if schema._normalise:
+        values = [_normalise(schema, field, value) for field, value in zip(schema.fields, values)]
+
+    return dict(zip(schema.fields, values))
+
+
+def _normalise(schema, field, value):
+    if not isinstance(value, memoryview):
+        return schema._normalise((field, value))[1]
+
+    original = value.tobytes()
+    normalised = schema._normalise((field, original))[1]
+    return value if normalised == original else memoryview(normalised)
+
+
+def generate_hub_key(resolver_id, hub_id, repository_id, entity_type, entity_id=None, time_ordered=False):
+    """Create a hub key from parts held as bytes
+
+    :param resolver_id: the service that can resolve this key
+    :param hub_id: the unique id of the hub
+    :param repository_id: the type of id that the provider recognises
+    :param entity_type: the type of the entity to which the key refers.
+    :param entity_id: ID of entity (UUID)
+    :param time_ordered: if True a new entity_id sorts by the time it was
+        made, see bass.entity_ids.TimeOrderedIds
+    :returns: str, a hub key
+    :raises: ValueError or TypeError if a parameter has a bad value, see
+        bass.hubkey.generate_hub_key
+    """
+    parts = [str(_buffer(p)) if p is not None else None
+             for p in (resolver_id, hub_id, repository_id, entity_type, entity_id)]
+    key = hubkey.generate_hub_key(*parts, time_ordered=time_ordered)
+    # The resolver_id is IDNA encoded, so the key is ASCII
+    return key.encode('ascii') if isinstance(key, unicode) else key
@@ -0,0 +1,117 @@
+# -*- coding: utf-8 -*-
+
+# Copyright 2016 Open Permissions Platform Coalition
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License. You may obtain a copy of the License at
+# http://www.apache.org/licenses/LICENSE-2.0
+# Unless required by applicable law or agreed to in writing, software distributed under the License is
+# distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and limitations under the License.
+
+
+"""Memoize parsing hub keys
+
+Use a HubKeyCache where the same hub keys are parsed again and again, e.g.
+
+    cache = HubKeyCache(maxsize=10000)
+    cache.parse_hub_key(key)
+    cache.stats()
+"""
+
+import threading
+from collections import OrderedDict
+
+from bass.hubkey import parse_hub_key
+
+# Cached in place of the parts of an invalid key
+_INVALID = object()
+
+
+class HubKeyCache(object):
+    """A thread safe, size bounded LRU cache of parsed hub keys
+
+    Valid and invalid keys are both cached. parse_hub_key returns a copy of
+    the cached parts, so callers may change the result.
+
+    :param maxsize: int, the maximum number of keys to hold
+    """
+
+    def __init__(self, maxsize=1024):
+        if maxsize < 1:
+            raise ValueError('maxsize should be at least 1')
+
+        self.maxsize = maxsize
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+    def _lookup(self, key):
+        if not isinstance(key, basestring):
+            return parse_hub_key(key)
+
+        with self._lock:
+            parts = self._cache.pop(key, None)
+            if parts is not None:
+                self._cache[key] = parts
+                self._hits += 1
+                return parts
+            self._misses += 1
+
+        try:
+            parts = parse_hub_key(key)
+        except ValueError:
+            parts = _INVALID
+
+        with self._lock:
+            if key not in self._cache:
+                self._cache[key] = parts
+                if len(self._cache) > self.maxsize:
+                    self._cache.popitem(last=False)
+                    self._evictions += 1
+
+        return parts
+
+    def parse_hub_key(self, key):
+        """Parse a hub key into a dictionary of component parts
+
+        :param key: str, a hub key
+        :returns: dict, hub key split into parts
+        :raises: ValueError
+        """
+        parts = self._lookup(key)
+        if parts is _INVALID:
+            raise ValueError('Not a valid key')
+
+        return dict(parts)
+
+    def is_hub_key(self, value):
+        """Test if a value could be a hub key
+        :param value: the value to test if it is a hub key
+        :returns: True if it is a hub key
+        """
+        try:
+            return self._lookup(value) is not _INVALID
+        except (ValueError, TypeError):
+            return False
+
+    def stats(self):
+        """Return the cache's hits, misses, evictions, size and maxsize
+
+        :returns: dict
+        """
+        with self._lock:
+            return {
+                'hits': self._hits,
+                'misses': self._misses,
+                'evictions': self._evictions,
+                'size': len(self._cache),
+                'maxsize': self.maxsize
+            }
+
+    def clear(self):
+        """Remove all keys from the cache and reset the stats"""
+        with self._lock:
+            self._cache.clear()
+            self._hits = self._misses = self._evictions = 0
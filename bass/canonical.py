@@ -0,0 +1,290 @@
+# -*- coding: utf-8 -*-
+
+# Copyright 2016 Open Permissions Platform Coalition
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License. You may obtain a copy of the License at
+# http://www.apache.org/licenses/LICENSE-2.0
+# Unless required by applicable law or agreed to in writing, software distributed under the License is
+# distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and limitations under the License.
+
+"""Canonical hub keys
+
+CanonicalKey holds a hub key's canonical form and a 64 bit fingerprint of
+it, for comparing and hashing keys without parsing them again.
+
+Canonicalise files of s0 hub keys with:
+
+    python -m bass.canonical [--output FILE] [--hub-id HUB_ID ...] [FILE ...]
+
+The canonical form of an s0 key has the parts that parse_hub_key returns:
+every part except entity_id is lower case. Keys are read one per line, from
+files or stdin, and written with the same line endings. Other lines, e.g.
+s1 keys or invalid keys, are written unchanged. Lines are read and written
+a chunk at a time, so memory use does not depend on the size of the input.
+"""
+import argparse
+import hashlib
+import itertools
+import struct
+import sys
+import time
+from collections import Counter
+
+from bass import hubkey
+from bass.validate import open_file
+
+CHUNK_SIZE = 10000
+# Outcomes counted for each line
+CHANGED = 'changed'
+UNCHANGED = 'unchanged'
+NOT_S0 = 'not s0'
+INVALID = 'invalid'
+
+_FINGERPRINT = struct.Struct('>Q')
+
+
+def canonical_key(key, hub_id=None):
+    """Get a hub key's canonical form
+
+    :param key: str, a hub key
+    :param hub_id: optional hub_id, or iterable of hub_ids, that the key
+        must have. Defaults to the configured hub_id
+    :returns: str, the parts parse_hub_key returns joined with "/"
+    :raises: ValueError if key is not a valid hub key
+    """
+    if key is None:
+        raise ValueError('Not a valid key')
+
+    schema, values = hubkey.matcher(hub_id)(key)
+    if not schema:
+        raise ValueError('Not a valid key')
+
+    return _canonical(key, schema, values)
+
+
+def _canonical(key, schema, values):
+    # s1 keys are canonical, unless PATTERN matched before a trailing newline
+    if schema.version == hubkey.SCHEMA and key[-1:] != '\n':
+        canonical = key
+    else:
+        canonical = hubkey.SEPARATOR.join(values)
+
+    if isinstance(canonical, unicode):
+        canonical = canonical.encode('utf-8')
+    return canonical
+
+
+def key_fingerprint(canonical):
+    """Get the 64 bit fingerprint of a canonical key
+
+    :param canonical: str, a canonical key
+    :returns: int, the first 8 bytes of the key's MD5 digest
+    """
+    return _FINGERPRINT.unpack_from(hashlib.md5(canonical).digest())[0]
+
+
+class CanonicalKey(object):
+    """A hub key in canonical form, with its fingerprint
+
+    Keys that parse to the same parts, e.g. s0 keys that differ only in
+    case, have the same CanonicalKey. Hashing is free, and comparing keys
+    with different fingerprints only compares the fingerprints.
+
+    :param canonical: str, a canonical key, see canonical_key
+    :param fingerprint: optional int, the key's fingerprint
+    """
+    __slots__ = ('key', 'fingerprint')
+
+    def __init__(self, canonical, fingerprint=None):
+        self.key = canonical
+        self.fingerprint = key_fingerprint(canonical) if fingerprint is None else fingerprint
+
+    @classmethod
+    def parse(cls, key, hub_id=None):
+        """Parse a hub key
+
+        :param key: str, a hub key
+        :param hub_id: optional hub_id, or iterable of hub_ids, that the key
+            must have. Defaults to the configured hub_id
+        :returns: CanonicalKey
+        :raises: ValueError if key is not a valid hub key
+        """
+        return cls(canonical_key(key, hub_id))
+
+    def __hash__(self):
+        return hash(self.fingerprint)
+
+    def __eq__(self, other):
+        if not isinstance(other, CanonicalKey):
+            return NotImplemented
+        return self.fingerprint == other.fingerprint and self.key == other.key
+
+    def __ne__(self, other):
+        result = self.__eq__(other)
+        if result is NotImplemented:
+            return result
+        return not result
+
+    def __str__(self):
+        return self.key
+
+    def __repr__(self):
+        return 'CanonicalKey({!r})'.format(self.key)
+
+    def __reduce__(self):
+        return self.__class__, (self.key, self.fingerprint)
+
+
+def canonical_keys(keys, on_error='raise', hub_id=None):
+    """Lazily make CanonicalKeys of an iterable of hub keys
+
+    :param keys: iterable of hub keys
+    :param on_error: what to do with an invalid key, see
+        bass.hubkey.parse_hub_keys
+    :param hub_id: optional hub_id, or iterable of hub_ids, that the keys
+        must have. Defaults to the configured hub_id
+    :returns: generator of CanonicalKeys
+    :raises: ValueError
+    """
+    unpack_from = _FINGERPRINT.unpack_from
+    md5 = hashlib.md5
+
+    def make(key, schema, values):
+        canonical = _canonical(key, schema, values)
+        return CanonicalKey(canonical, unpack_from(md5(canonical).digest())[0])
+
+    return hubkey.map_hub_keys(make, keys, on_error, hub_id)
+
+
+def fingerprints(keys, on_error='raise', hub_id=None):
+    """Lazily fingerprint an iterable of hub keys, see canonical_keys
+
+    :returns: generator of int fingerprints, or of errors if on_error is
+        'yield_error'
+    """
+    return (result if isinstance(result, Exception) else result.fingerprint
+            for result in canonical_keys(keys, on_error, hub_id))
+
+
+def canonical_s0(key):
+    """Get an s0 key's canonical form
+
+    :param key: str, an s0 hub key
+    :returns: str, the key with every part except entity_id lower case
+    :raises: ValueError if key is not an s0 key
+    """
+    schema = hubkey._get_schema(key) if isinstance(key, basestring) else None
+    match = schema.pattern.match(key) if schema is not None and schema.version == 's0' else None
+    if not match:
+        raise ValueError('Not a valid s0 key')
+
+    start = match.start('entity_id')
+    if key[:start].islower():
+        return key
+    return key[:start].lower() + key[start:]
+
+
+def canonical_lines(lines, counts, hub_id=None):
+    """Canonicalise the s0 keys in lines
+
+    :param lines: iterable of str lines, each a hub key with or without a
+        line ending
+    :param counts: Counter of CHANGED, UNCHANGED, NOT_S0 and INVALID, which
+        is updated
+    :param hub_id: optional hub_id, or iterable of hub_ids, that the keys
+        must have. Defaults to the configured hub_id
+    :returns: generator of str lines
+    """
+    candidate_schemas = hubkey.candidate_schemas
+    for line in lines:
+        key = line.rstrip('\r\n')
+        try:
+            schemas = candidate_schemas(key, hub_id)
+        except TypeError:
+            schemas = ()
+
+        for schema in schemas:
+            if schema.version == 's0':
+                match = schema.pattern.match(key)
+                if match:
+                    # The parts before entity_id are lowered, if any are
+                    # upper case
+                    start = match.start('entity_id')
+                    if key[:start].islower():
+                        counts[UNCHANGED] += 1
+                    else:
+                        counts[CHANGED] += 1
+                        line = key[:start].lower() + line[start:]
+                    break
+            elif schema.match(key):
+                counts[NOT_S0] += 1
+                break
+        else:
+            counts[INVALID] += 1
+        yield line
+
+
+def canonicalise(lines, out, chunk_size=CHUNK_SIZE, hub_id=None):
+    """Write lines with their s0 keys canonicalised
+
+    :param lines: iterable of str lines
+    :param out: file
+    :param chunk_size: number of lines written at a time
+    :param hub_id: optional hub_id, or iterable of hub_ids, that the keys
+        must have. Defaults to the configured hub_id
+    :returns: Counter of CHANGED, UNCHANGED, NOT_S0 and INVALID
+    """
+    counts = Counter()
+    canonical = canonical_lines(lines, counts, hub_id)
+    while True:
+        chunk = list(itertools.islice(canonical, chunk_size))
+        if not chunk:
+            break
+        out.write(''.join(chunk))
+
+    return counts
+
+
+def _report(counts, seconds, err):
+    total = sum(counts.values())
+    for outcome in (CHANGED, UNCHANGED, NOT_S0, INVALID):
+        err.write('{}: {}\n'.format(outcome, counts[outcome]))
+    err.write('seconds: {:.2f}\n'.format(seconds))
+    err.write('keys/sec: {:.0f}\n'.format(total / seconds if seconds else 0))
+
+
+def main(argv=None, out=sys.stdout, err=sys.stderr):
+    """Canonicalise files of s0 keys and report how many changed
+
+    :returns: int, exit status
+    """
+    parser = argparse.ArgumentParser(description='Canonicalise files of newline delimited s0 hub keys')
+    parser.add_argument('paths', nargs='*', metavar='FILE', default=['-'],
+                        help="file of hub keys, gzip'd if it ends in .gz, or - for stdin (the default)")
+    parser.add_argument('-o', '--output', default='-', help='output file, defaults to stdout')
+    parser.add_argument('--hub-id', action='append', dest='hub_ids', metavar='HUB_ID',
+                        help='hub_id that the keys must have, may be repeated. Defaults to the configured hub_id')
+    args = parser.parse_args(argv)
+
+    start = time.time()
+    counts = Counter()
+    output = out if args.output == '-' else open(args.output, 'wb')
+    try:
+        for path in args.paths:
+            f = open_file(path)
+            try:
+                counts.update(canonicalise(f, output, hub_id=args.hub_ids))
+            finally:
+                if f is not sys.stdin:
+                    f.close()
+    finally:
+        if output is not out:
+            output.close()
+    _report(counts, time.time() - start, err)
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
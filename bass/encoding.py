@@ -0,0 +1,232 @@
+# -*- coding: utf-8 -*-
+
+# Copyright 2016 Open Permissions Platform Coalition
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License. You may obtain a copy of the License at
+# http://www.apache.org/licenses/LICENSE-2.0
+# Unless required by applicable law or agreed to in writing, software distributed under the License is
+# distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and limitations under the License.
+
+"""Compact binary encoding of hub keys
+
+Each record starts with a one byte tag.
+
+S1_RECORD, 38 bytes: an s1 key with 32 character IDs, as the codes of its
+resolver_id, hub_id and entity_type and its raw 16 byte repository_id and
+entity_id.
+
+    tag (B) | resolver_id (H) | hub_id (H) | entity_type (B) | repository_id (16s) | entity_id (16s)
+
+STRING_RECORD: any other hub key, e.g. an s0 key, as its length and UTF-8
+bytes.
+
+    tag (B) | length (I) | key
+
+Integers are big endian. The resolver_id and hub_id codes are assigned by
+a HubKeyCodec as it encodes keys, so the same vocabulary is needed to
+decode them.
+"""
+import binascii
+import struct
+import threading
+
+from bass import hubkey
+
+S1_RECORD = 1
+STRING_RECORD = 2
+
+_S1 = struct.Struct('>BHHB16s16s')
+_STRING = struct.Struct('>BI')
+_MAX_CODE = 0xffff
+_ENTITY_TYPES = dict((t, i) for i, t in enumerate(hubkey.ENTITY_TYPES))
+_UUID_LENGTH = 32
+# Minimum number of bytes encode_many adds to its buffer
+_MIN_GROWTH = 4096
+
+
+class HubKeyCodec(object):
+    """Encode hub keys as binary records, and decode them
+
+    :param resolvers: optional list of resolver_ids, by code
+    :param hub_ids: optional list of hub_ids, by code
+    :param hub_id: optional hub_id, or iterable of hub_ids, that encoded
+        keys must have. Defaults to the configured hub_id
+    """
+
+    def __init__(self, resolvers=(), hub_ids=(), hub_id=None):
+        self.resolvers = list(resolvers)
+        self.hub_ids = list(hub_ids)
+        self.hub_id = hub_id
+        self._resolver_codes = dict((v, i) for i, v in enumerate(self.resolvers))
+        self._hub_id_codes = dict((v, i) for i, v in enumerate(self.hub_ids))
+        self._lock = threading.Lock()
+
+    @property
+    def vocabulary(self):
+        """The interned parts, which are needed to decode the records
+
+        :returns: dict of keyword arguments for HubKeyCodec
+        """
+        return {'resolvers': list(self.resolvers), 'hub_ids': list(self.hub_ids)}
+
+    def _code(self, codes, values, value):
+        code = codes.get(value)
+        if code is None:
+            with self._lock:
+                code = codes.get(value)
+                if code is None and len(values) <= _MAX_CODE:
+                    code = codes[value] = len(values)
+                    values.append(value)
+        return code
+
+    def _values(self, key, match):
+        """Get the values of a hub key's record
+
+        :param key: str, a hub key
+        :param match: the function returned by hubkey.matcher for hub_id
+        :returns: (tuple of S1_RECORD values, None), or (None, str UTF-8 key)
+            for a STRING_RECORD
+        :raises: ValueError if key is not a valid hub key
+        """
+        schema, values = match(key) if key is not None else (None, None)
+        if not schema:
+            raise ValueError('Not a valid key')
+
+        if schema.version == hubkey.SCHEMA:
+            resolver_id, _, hub_id, repository_id, entity_type, entity_id = values
+            # A trailing newline is allowed by PATTERN but is not in the parts
+            if (len(repository_id) == _UUID_LENGTH and len(entity_id) == _UUID_LENGTH and
+                    key[-1:] != '\n'):
+                resolver_code = self._code(self._resolver_codes, self.resolvers, str(resolver_id))
+                hub_id_code = self._code(self._hub_id_codes, self.hub_ids, str(hub_id))
+                if resolver_code is not None and hub_id_code is not None:
+                    return (S1_RECORD, resolver_code, hub_id_code, _ENTITY_TYPES[entity_type],
+                            binascii.unhexlify(repository_id), binascii.unhexlify(entity_id)), None
+
+        if isinstance(key, unicode):
+            key = key.encode('utf-8')
+        return None, key
+
+    def encode(self, key):
+        """Encode a hub key
+
+        :param key: str, a hub key
+        :returns: str, a binary record
+        :raises: ValueError if key is not a valid hub key
+        """
+        values, key = self._values(key, hubkey.matcher(self.hub_id))
+        if values:
+            return _S1.pack(*values)
+        return _STRING.pack(STRING_RECORD, len(key)) + key
+
+    def decode_from(self, buffer, offset=0):
+        """Decode the record at an offset in a buffer
+
+        :param buffer: str, bytearray, mmap or other buffer
+        :param offset: int, the record's offset
+        :returns: (str hub key, offset of the next record)
+        :raises: ValueError if there is not a record at offset
+        """
+        try:
+            tag = ord(buffer[offset])
+        except IndexError:
+            raise ValueError('No record at offset {}'.format(offset))
+        except TypeError:
+            tag = buffer[offset]
+
+        try:
+            if tag == S1_RECORD:
+                _, resolver_code, hub_id_code, entity_type, repository_id, entity_id = _S1.unpack_from(
+                    buffer, offset)
+                key = '/'.join([self.resolvers[resolver_code], hubkey.SCHEMA, self.hub_ids[hub_id_code],
+                                binascii.hexlify(repository_id), hubkey.ENTITY_TYPES[entity_type],
+                                binascii.hexlify(entity_id)])
+                return key, offset + _S1.size
+            elif tag == STRING_RECORD:
+                _, length = _STRING.unpack_from(buffer, offset)
+                start = offset + _STRING.size
+                if start + length > len(buffer):
+                    raise ValueError('Truncated record at offset {}'.format(offset))
+                return str(buffer[start:start + length]), start + length
+        except (struct.error, IndexError):
+            raise ValueError('Invalid record at offset {}'.format(offset))
+
+        raise ValueError('Invalid record at offset {}'.format(offset))
+
+    def decode(self, record):
+        """Decode a record
+
+        :param record: str, a binary record
+        :returns: str, a hub key
+        :raises: ValueError if record is not a single record
+        """
+        key, end = self.decode_from(record)
+        if end != len(record):
+            raise ValueError('Expected one record')
+        return key
+
+    def encode_many(self, keys, out=None):
+        """Encode hub keys into a buffer
+
+        The buffer is grown ahead of the records, which are packed into it
+        in place.
+
+        :param keys: iterable of hub keys
+        :param out: optional bytearray to append the records to
+        :returns: bytearray
+        :raises: ValueError if a key is not a valid hub key. The records of
+            the keys before it are in out
+        """
+        if out is None:
+            out = bytearray()
+
+        get_values = self._values
+        match = hubkey.matcher(self.hub_id)
+        s1_pack_into = _S1.pack_into
+        s1_size = _S1.size
+        string_pack_into = _STRING.pack_into
+        string_size = _STRING.size
+
+        offset = len(out)
+        try:
+            for key in keys:
+                values, key = get_values(key, match)
+                size = s1_size if values else string_size + len(key)
+                if offset + size > len(out):
+                    # Grow by at least the buffer's size, so that the number
+                    # of times it is copied is logarithmic
+                    out.extend(bytearray(max(size, len(out), _MIN_GROWTH)))
+
+                if values:
+                    s1_pack_into(out, offset, *values)
+                else:
+                    string_pack_into(out, offset, STRING_RECORD, len(key))
+                    out[offset + string_size:offset + size] = key
+                offset += size
+        finally:
+            # Remove the space that was not used
+            del out[offset:]
+
+        return out
+
+    def decode_many(self, buffer, offset=0, end=None):
+        """Decode the records in a buffer
+
+        Records are unpacked in place, so the buffer can be e.g. an mmap of
+        a file.
+
+        :param buffer: str, bytearray, mmap or other buffer
+        :param offset: int, offset of the first record
+        :param end: int, end of the last record, defaults to the end of the
+            buffer
+        :returns: generator of str hub keys
+        :raises: ValueError if a record is invalid
+        """
+        if end is None:
+            end = len(buffer)
+
+        decode_from = self.decode_from
+        while offset < end:
+            key, offset = decode_from(buffer, offset)
+            yield key
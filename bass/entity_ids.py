@@ -0,0 +1,192 @@
+# -*- coding: utf-8 -*-
+
+# Copyright 2016 Open Permissions Platform Coalition
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License. You may obtain a copy of the License at
+# http://www.apache.org/licenses/LICENSE-2.0
+# Unless required by applicable law or agreed to in writing, software distributed under the License is
+# distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and limitations under the License.
+
+"""Generate entity IDs
+
+RandomIds makes the same IDs as uuid.uuid4().hex: 32 lower case hex
+characters with the version 4 and variant bits set, from os.urandom. The
+random bytes for many IDs are read at once, and the IDs are formatted a
+block at a time.
+
+TimeOrderedIds makes IDs of the same form that sort by the time they were
+made, for indexes where random IDs would scatter inserts. timestamp gets
+the time back from such an ID.
+"""
+import binascii
+import os
+import threading
+import time
+
+# Number of IDs read from os.urandom at a time
+BLOCK_SIZE = 1024
+_UUID_BYTES = 16
+_HEX_LENGTH = 32
+
+# Translations setting a byte's high bits as uuid.UUID(version=4) does
+_VERSION = ''.join(chr(i & 0x0f | 0x40) for i in range(256))
+_VARIANT = ''.join(chr(i & 0x3f | 0x80) for i in range(256))
+
+
+class _PerProcess(object):
+    """A value that each process makes for itself, e.g. a lock
+
+    After os.fork() another thread may have held the parent's lock, so the
+    child process makes a new one. dict.setdefault is atomic, so all of the
+    child's threads get the same new value.
+
+    :param factory: function making the value
+    """
+
+    def __init__(self, factory):
+        self.factory = factory
+        self._values = {os.getpid(): factory()}
+
+    def get(self):
+        """Get this process's value"""
+        pid = os.getpid()
+        value = self._values.get(pid)
+        if value is None:
+            value = self._values.setdefault(pid, self.factory())
+            for other in self._values.keys():
+                if other != pid:
+                    self._values.pop(other, None)
+        return value
+
+
+def _new_state():
+    # A lock, and the IDs that it guards
+    return threading.Lock(), []
+
+
+class RandomIds(object):
+    """Make random entity IDs, like uuid.uuid4().hex
+
+    Thread safe. IDs that were read before os.fork() are discarded by the
+    child process, so that the parent and child never make the same IDs.
+
+    :param block_size: int, number of IDs read from os.urandom at a time
+    """
+
+    def __init__(self, block_size=BLOCK_SIZE):
+        self.block_size = block_size
+        self._state = _PerProcess(_new_state)
+
+    def _block(self):
+        data = bytearray(os.urandom(self.block_size * _UUID_BYTES))
+        data[6::_UUID_BYTES] = str(data[6::_UUID_BYTES]).translate(_VERSION)
+        data[8::_UUID_BYTES] = str(data[8::_UUID_BYTES]).translate(_VARIANT)
+        hex_data = binascii.hexlify(data)
+        return [hex_data[i:i + _HEX_LENGTH] for i in xrange(0, len(hex_data), _HEX_LENGTH)]
+
+    def __call__(self):
+        """Make an entity ID
+
+        :returns: str
+        """
+        lock, ids = self._state.get()
+        with lock:
+            if not ids:
+                ids.extend(self._block())
+            return ids.pop()
+
+    def take(self, n):
+        """Make n entity IDs
+
+        :param n: int
+        :returns: list of str
+        """
+        lock, ids = self._state.get()
+        result = []
+        with lock:
+            while len(result) < n:
+                if not ids:
+                    ids.extend(self._block())
+                count = min(n - len(result), len(ids))
+                result.extend(ids[-count:])
+                del ids[-count:]
+        return result
+
+
+# The version nibble's position in an ID's hex
+_VERSION_INDEX = 12
+# Largest value of the counter that orders IDs made in the same millisecond
+_MAX_COUNTER = 0xfff
+
+
+class TimeOrderedIds(object):
+    """Make entity IDs that sort in the order they were made, like UUIDv7
+
+    An ID's hex is a 48 bit Unix time in milliseconds, the version 7, a 12
+    bit counter and 64 random bits with the variant bits set, so IDs made
+    close together are close together in an index. IDs are monotonic
+    within a process: the counter orders IDs made in the same millisecond,
+    and the time of the last ID is used if the clock goes back.
+
+    Thread and fork safe, see RandomIds.
+
+    :param random_ids: optional RandomIds for the random bits
+    :param clock: optional function returning the time in seconds
+    """
+
+    def __init__(self, random_ids=None, clock=time.time):
+        self.random_ids = random_ids or RandomIds()
+        self.clock = clock
+        self._last = (0, 0)
+        self._lock = _PerProcess(threading.Lock)
+
+    def _next(self):
+        milliseconds = int(self.clock() * 1000)
+        last_milliseconds, counter = self._last
+        if milliseconds <= last_milliseconds:
+            milliseconds = last_milliseconds
+            counter += 1
+            if counter > _MAX_COUNTER:
+                milliseconds += 1
+                counter = 0
+        else:
+            counter = 0
+        self._last = (milliseconds, counter)
+        return '%012x7%03x' % (milliseconds & 0xffffffffffff, counter)
+
+    def __call__(self):
+        """Make an entity ID
+
+        :returns: str
+        """
+        with self._lock.get():
+            prefix = self._next()
+        return prefix + self.random_ids()[16:]
+
+    def take(self, n):
+        """Make n entity IDs, in order
+
+        :param n: int
+        :returns: list of str
+        """
+        with self._lock.get():
+            prefixes = [self._next() for _ in xrange(n)]
+        return [prefix + random_id[16:] for prefix, random_id in zip(prefixes, self.random_ids.take(n))]
+
+
+def timestamp(entity_id):
+    """Get the time a time ordered entity ID was made
+
+    :param entity_id: str, an ID made by TimeOrderedIds
+    :returns: float, seconds since the epoch, to the millisecond
+    :raises: ValueError if entity_id is not a time ordered ID
+    """
+    if (not isinstance(entity_id, basestring) or len(entity_id) != _HEX_LENGTH or
+            entity_id[_VERSION_INDEX] != '7'):
+        raise ValueError('Not a time ordered entity_id')
+
+    try:
+        return int(entity_id[:_VERSION_INDEX], 16) / 1000.0
+    except ValueError:
+        raise ValueError('Not a time ordered entity_id')
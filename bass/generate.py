@@ -0,0 +1,144 @@
+# -*- coding: utf-8 -*-
+
+# Copyright 2016 Open Permissions Platform Coalition
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License. You may obtain a copy of the License at
+# http://www.apache.org/licenses/LICENSE-2.0
+# Unless required by applicable law or agreed to in writing, software distributed under the License is
+# distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and limitations under the License.
+
+"""Generate hub keys, one per line
+
+    python -m bass.generate --resolver RESOLVER --hub HUB --repository REPOSITORY
+        [--type TYPE] [-n N] [--output FILE] [--processes N] [--time-ordered]
+
+The parameters are validated once, with hub_id configured to be HUB.
+Keys are generated and written in blocks, so memory use does not depend
+on the number of keys.
+"""
+import argparse
+import multiprocessing
+import re
+import sys
+import time
+
+from bass.hubkey import HubKeyFactory, ENTITY_TYPES, SEPARATOR, configure
+from bass.pool import imap
+
+BLOCK_SIZE = 10000
+# Size of the output file's buffer in bytes
+BUFFER_SIZE = 1024 * 1024
+
+# The factory used by worker processes, set by _init_worker
+_factory = None
+
+
+def blocks(n, block_size=BLOCK_SIZE):
+    """Split n keys into blocks
+
+    :param n: int, number of keys
+    :param block_size: int, maximum number of keys in a block
+    :returns: generator of block sizes
+    """
+    for start in xrange(0, n, block_size):
+        yield min(block_size, n - start)
+
+
+def generate_block(factory, size):
+    """Generate a block of hub keys
+
+    :param factory: HubKeyFactory
+    :param size: int, number of keys
+    :returns: str, keys each followed by a newline
+    """
+    keys = factory.batch(size)
+    keys.append('')
+    return '\n'.join(keys)
+
+
+def _init_worker(factory):
+    global _factory
+    _factory = factory
+
+
+def _generate_block(size):
+    return generate_block(_factory, size)
+
+
+def generate(factory, n, out, processes=1, block_size=BLOCK_SIZE):
+    """Write hub keys to a file
+
+    :param factory: HubKeyFactory
+    :param n: int, number of keys
+    :param out: file
+    :param processes: number of processes generating keys. With 1 the keys
+        are generated in this process
+    :param block_size: int, number of keys generated at a time
+    """
+    sizes = blocks(n, block_size)
+
+    if processes == 1:
+        for size in sizes:
+            out.write(generate_block(factory, size))
+        return
+
+    pool = multiprocessing.Pool(processes, _init_worker, (factory,))
+    try:
+        for block in imap(pool, _generate_block, sizes, processes * 2):
+            out.write(block)
+    finally:
+        pool.terminate()
+        pool.join()
+
+
+def main(argv=None, out=sys.stdout, err=sys.stderr):
+    """Generate hub keys and report keys/sec
+
+    :returns: int, exit status
+    """
+    parser = argparse.ArgumentParser(description='Generate hub keys, one per line')
+    parser.add_argument('--resolver', required=True, help='the service that can resolve the keys')
+    parser.add_argument('--hub', required=True, help='the unique id of the hub')
+    parser.add_argument('--repository', required=True, help='the repository ID')
+    parser.add_argument('--type', default='asset', choices=ENTITY_TYPES, help='the entity type')
+    parser.add_argument('-n', type=int, default=1, help='number of keys')
+    parser.add_argument('-o', '--output', default='-', help='output file, defaults to stdout')
+    parser.add_argument('-p', '--processes', type=int, default=1, help='number of processes')
+    parser.add_argument('-b', '--block-size', type=int, default=BLOCK_SIZE,
+                        help='number of keys generated and written at a time')
+    parser.add_argument('--time-ordered', action='store_true', help='make entity IDs that sort by time')
+    args = parser.parse_args(argv)
+
+    if args.n < 0:
+        parser.error('-n should not be negative')
+    if args.processes < 1 or args.block_size < 1:
+        parser.error('--processes and --block-size should be at least 1')
+    if not args.hub or SEPARATOR in args.hub:
+        parser.error('--hub should not be empty or contain "{}"'.format(SEPARATOR))
+
+    # The keys are for the hub given, rather than the configured hub
+    configure(re.escape(args.hub.lower()))
+    try:
+        factory = HubKeyFactory(args.resolver, args.hub, args.repository, args.type, args.time_ordered)
+    except (AttributeError, TypeError, ValueError) as exc:
+        parser.error(str(exc))
+
+    start = time.time()
+    if args.output == '-':
+        generate(factory, args.n, out, args.processes, args.block_size)
+        out.flush()
+    else:
+        with open(args.output, 'wb', BUFFER_SIZE) as f:
+            generate(factory, args.n, f, args.processes, args.block_size)
+    seconds = time.time() - start
+
+    err.write('keys: {}\n'.format(args.n))
+    err.write('seconds: {:.2f}\n'.format(seconds))
+    err.write('keys/sec: {:.0f}\n'.format(args.n / seconds if seconds else 0))
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
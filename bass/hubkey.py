@@ -17,13 +17,15 @@ The generated hub key will be of the format
 """
 
 import re
-import uuid
+import sys
+from functools import wraps
 from urlparse import urlparse, urlunparse
-from urllib import quote
 from collections import OrderedDict
-from tornado.options import define, options
 
-define('hub_id', default='hub1')
+from bass.entity_ids import RandomIds, TimeOrderedIds, timestamp
+from bass.instrumentation import INVALID, Instrumentation
+
+DEFAULT_HUB_ID = 'hub1'
 SEPARATOR = '/'
 SCHEMA = 's1'
 PROTOCOL = 'https'
@@ -46,7 +48,7 @@ RESOLVER_ID = r'{protocol}?://{label}(?:\.{label})*{port}?'.format(
 PARTS = OrderedDict([
     ('resolver_id', RESOLVER_ID),
     ('schema_version', SCHEMA),
-    ('hub_id', options.hub_id),
+    ('hub_id', DEFAULT_HUB_ID),
     ('repository_id', UUID),
     ('entity_type', '|'.join(ENTITY_TYPES)),  # word char or -
     ('entity_id', UUID)  # word char or -
@@ -56,18 +58,173 @@ PARTS = OrderedDict([
 PARTS_S0 = OrderedDict([
     ('resolver_id', RESOLVER_ID),
     ('schema_version', '(?i)s0'),
-    ('hub_id', options.hub_id),
+    ('hub_id', DEFAULT_HUB_ID),
     ('entity_type', '|'.join(['(?i)creation', '(?i)asset', '(?i)offer'])),
     ('organisation_id', _PATH_PART),
     ('id_type', _PATH_PART),
     ('entity_id', _PATH_PART)
 ])
 
-PATTERN = '^' + SEPARATOR.join(
-    ['(?P<{}>{})'.format(p, r) for p, r in PARTS.items()]) + '$'
 
-PATTERN_S0 = '^' + SEPARATOR.join(
-    ['(?P<{}>{})'.format(p, r) for p, r in PARTS_S0.items()]) + '$'
+def _pattern(parts):
+    return '^' + SEPARATOR.join(
+        ['(?P<{}>{})'.format(p, r) for p, r in parts.items()]) + '$'
+
+
+PATTERN = _pattern(PARTS)
+PATTERN_S0 = _pattern(PARTS_S0)
+
+
+class LazyPattern(object):
+    """A regex that is compiled when it is first used
+
+    After the first use the compiled regex's attributes, e.g. match, are
+    attributes of the LazyPattern, so using it costs the same as using the
+    compiled regex.
+
+    :param pattern: str, the regex
+    """
+
+    def __init__(self, pattern):
+        self.pattern = pattern
+
+    def __getattr__(self, name):
+        value = getattr(re.compile(self.pattern), name)
+        setattr(self, name, value)
+        return value
+
+    def reset(self, pattern):
+        """Replace the regex. It is compiled when it is next used
+
+        :param pattern: str, the regex
+        """
+        self.__dict__.clear()
+        self.pattern = pattern
+
+
+def _compile_part(regex):
+    return LazyPattern('^(' + regex + ')$')
+
+
+# Compiled patterns, so the hot path does not depend on the re module's cache
+COMPILED_PATTERN = LazyPattern(PATTERN)
+COMPILED_PATTERN_S0 = LazyPattern(PATTERN_S0)
+COMPILED_PARTS = OrderedDict((k, _compile_part(v)) for k, v in PARTS.items())
+
+# Character classes used to check s1 parts without a regex
+_DIGITS = '0123456789'
+_HEX_DIGITS = _DIGITS + 'abcdef'
+_LABEL_CHARACTERS = _DIGITS + 'abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ-'
+_SCHEMES = frozenset(['https:', 'http:'])
+_ENTITY_TYPES = frozenset(ENTITY_TYPES)
+_HUB_ID = PARTS['hub_id']
+
+
+def _is_literal(hub_id):
+    # hub_id is matched as a regex, so it can only be compared as a literal
+    # when it has no special characters
+    return not hub_id.strip(_LABEL_CHARACTERS + '_')
+
+
+_FAST_S1 = _is_literal(_HUB_ID)
+
+# Maximum number of prefixes, i.e.
+# "<resolver_id>/<schema_version>/<hub_id>/<repository_id>", remembered by an
+# s1 matcher after they have been checked
+_S1_PREFIXES_MAXSIZE = 1024
+
+
+def _is_host(string):
+    name, colon, port = string.partition(':')
+    if colon and not (1 < len(port) < 6 and not port.strip(_DIGITS)):
+        return False
+
+    for label in name.split('.'):
+        if (not 0 < len(label) < 64 or label.strip(_LABEL_CHARACTERS) or
+                label[0] == '-' or label[-1] == '-'):
+            return False
+
+    return True
+
+
+def _match_s1_prefix(prefix, expected_hub_id):
+    parts = prefix.split(SEPARATOR)
+    if len(parts) != 6:
+        return None
+
+    scheme, empty, host, schema_version, hub_id, repository_id = parts
+    if (schema_version != SCHEMA or hub_id != expected_hub_id or empty or
+            scheme not in _SCHEMES or not _is_host(host) or
+            not 0 < len(repository_id) < 65 or repository_id.strip(_HEX_DIGITS)):
+        return None
+
+    return prefix[:len(scheme) + len(host) + 2], schema_version, hub_id, repository_id
+
+
+def _s1_matcher(hub_id, pattern):
+    """Make a function splitting s1 hub keys into their parts
+
+    The function is equivalent to pattern.match(key).groups(), but checks
+    each segment with string methods and set lookups instead of
+    backtracking through the pattern. It falls back to the pattern where
+    the two could differ, e.g. "$" also matches before a trailing newline,
+    or if hub_id is not a literal.
+
+    :param hub_id: str, the hub_id part's regex
+    :param pattern: compiled s1 pattern with hub_id
+    :returns: function taking a str hub key and returning a tuple of parts
+        in PARTS order, or None if it is not an s1 hub key. It raises
+        TypeError if the key is not a string
+    """
+    def match_pattern(key):
+        match = pattern.match(key)
+        return match.groups() if match else None
+
+    if not _is_literal(hub_id):
+        return match_pattern
+
+    # Checked prefixes by type of key. Deployments only use a handful of
+    # resolvers and repositories, so most keys only need their last two
+    # parts checked.
+    str_prefixes = {}
+    unicode_prefixes = {}
+    entity_types = _ENTITY_TYPES
+    hex_digits = _HEX_DIGITS
+
+    def match_s1(key):
+        key_type = type(key)
+        if key_type is str:
+            prefixes = str_prefixes
+        elif key_type is unicode:
+            prefixes = unicode_prefixes
+        else:
+            return match_pattern(key)
+
+        parts = key.rsplit(SEPARATOR, 2)
+        if len(parts) != 3:
+            return None
+
+        prefix, entity_type, entity_id = parts
+        matched = prefixes.get(prefix)
+        if matched is None:
+            matched = _match_s1_prefix(prefix, hub_id)
+            if matched is None:
+                return None
+            if len(prefixes) < _S1_PREFIXES_MAXSIZE:
+                prefixes[prefix] = matched
+
+        if entity_type in entity_types and 0 < len(entity_id) < 65 and not entity_id.strip(hex_digits):
+            return matched + (entity_type, entity_id)
+
+        if key[-1:] == '\n':
+            return match_pattern(key)
+        return None
+
+    return match_s1
+
+
+# Split an s1 hub key with the configured hub_id into its parts
+_match_s1 = _s1_matcher(_HUB_ID, COMPILED_PATTERN)
 
 
 def normalise_part(t):
@@ -78,39 +235,727 @@ def normalise_part(t):
         return k, v
 
 
-def parse_hub_key(key):
+class Schema(object):
+    """A hub key schema version
+
+    :param version: str, the lower case schema_version part, e.g. "s1"
+    :param parts: OrderedDict of the schema's part names and regexes
+    :param match: optional function returning a key's parts as a tuple, or
+        None if the key does not match. Defaults to matching the pattern
+        built from parts
+    :param normalise: optional function applied to each (name, value) part
+    :param pattern: optional LazyPattern or compiled regex of the key.
+        Defaults to the pattern built from parts
+    """
+
+    def __init__(self, version, parts, match=None, normalise=None, pattern=None):
+        self.version = version
+        self.parts = parts
+        self.fields = tuple(parts.keys())
+        self.index = dict((k, i) for i, k in enumerate(self.fields))
+        self.pattern = pattern or LazyPattern(_pattern(parts))
+        self._normalise = normalise
+        if match and not normalise:
+            # Skip a method call on the hot path
+            self.match = match
+        else:
+            self._match = match or self._match_pattern
+
+    def _match_pattern(self, key):
+        match = self.pattern.match(key)
+        return match.groups() if match else None
+
+    def match(self, key):
+        """Match a hub key
+
+        :param key: str, a hub key
+        :returns: tuple of the key's (normalised) parts, or None
+        """
+        groups = self._match(key)
+        if groups and self._normalise:
+            groups = tuple(v for _, v in map(self._normalise, zip(self.fields, groups)))
+
+        return groups
+
+
+# Hub key schemas by schema_version
+SCHEMAS = {}
+
+# Maximum number of hub_ids, or sets of hub_ids, with cached schemas
+HUB_SCHEMAS_MAXSIZE = 64
+# _HubSchemas by hub_id or frozenset of hub_ids, oldest first
+_HUB_SCHEMAS = OrderedDict()
+
+
+def register_schema(schema):
+    """Register a schema so that its keys are parsed
+
+    :param schema: Schema
+    """
+    SCHEMAS[schema.version] = schema
+    _HUB_SCHEMAS.clear()
+
+
+def _register_schemas():
+    register_schema(Schema(SCHEMA, PARTS, match=_match_s1, pattern=COMPILED_PATTERN))
+    register_schema(Schema('s0', PARTS_S0, normalise=normalise_part, pattern=COMPILED_PATTERN_S0))
+
+
+_register_schemas()
+
+
+def configure(hub_id):
+    """Set the hub_id of the hub keys that are parsed
+
+    The patterns are recompiled when they are next used. Keys parsed
+    before, e.g. in a HubKeyCache, are not parsed again. This is not
+    thread safe, so it should be called before keys are parsed.
+
+    :param hub_id: str, a regex matching the hub_id part
+    """
+    global PATTERN, PATTERN_S0, _HUB_ID, _FAST_S1, _match_s1
+    if hub_id == _HUB_ID:
+        return
+
+    PARTS['hub_id'] = PARTS_S0['hub_id'] = hub_id
+    PATTERN = _pattern(PARTS)
+    PATTERN_S0 = _pattern(PARTS_S0)
+    COMPILED_PATTERN.reset(PATTERN)
+    COMPILED_PATTERN_S0.reset(PATTERN_S0)
+    COMPILED_PARTS['hub_id'].reset('^(' + hub_id + ')$')
+
+    _HUB_ID = hub_id
+    _FAST_S1 = _is_literal(hub_id)
+    _match_s1 = _s1_matcher(hub_id, COMPILED_PATTERN)
+
+    _register_schemas()
+    _HUB_SCHEMAS.clear()
+
+
+def get_hub_id():
+    """Get the hub_id of the hub keys that are parsed"""
+    return _HUB_ID
+
+
+def use_tornado_options(options=None):
+    """Configure hub_id with a tornado option
+
+    Defines the hub_id option if it is not defined. hub_id is configured
+    whenever the option is set or the options are parsed. This is done
+    when bass.hubkey is imported if tornado.options has been imported.
+
+    :param options: tornado.options.OptionParser, defaults to
+        tornado.options.options
+    """
+    if options is None:
+        from tornado.options import options
+
+    if 'hub_id' in options:
+        options.add_parse_callback(lambda: configure(options.hub_id))
+        configure(options.hub_id)
+    else:
+        options.define('hub_id', default=_HUB_ID, callback=configure)
+
+
+# The schema_version and hub_id parts of a key held in a buffer
+_BUFFER_PARTS = LazyPattern(r'[^/]*/[^/]*/[^/]*/([^/]*)/([^/]*)')
+
+
+def _buffer_parts(key):
+    """Get the schema_version and hub_id parts of a key held in a buffer,
+    e.g. a bytearray, which the patterns can match but which cannot be split
+
+    :param key: buffer, a hub key
+    :returns: (str, str), or None if the key has too few parts
+    :raises: TypeError if key is not a buffer
+    """
+    parts = _BUFFER_PARTS.match(key)
+    if not parts:
+        return None
+
+    # The groups of a bytearray are bytearrays
+    version, hub_id = parts.groups()
+    return str(version), str(hub_id)
+
+
+def _key_parts(key):
+    """Get the schema_version and hub_id parts of a hub key
+
+    :param key: str or buffer, a hub key
+    :returns: (str, str), or None if the key has too few parts
+    :raises: TypeError if key is not a string or buffer
+    """
+    if isinstance(key, basestring):
+        parts = key.split(SEPARATOR, 5)
+        return parts[3:5] if len(parts) >= 5 else None
+    return _buffer_parts(key)
+
+
+def _get_schema(key):
+    """Get the schema for a hub key's schema_version part
+
+    :param key: str or buffer, a hub key
+    :returns: Schema, or None if the schema_version is not registered
+    :raises: TypeError if key is not a string or buffer
+    """
+    if isinstance(key, basestring):
+        parts = key.split(SEPARATOR, 4)
+        if len(parts) < 5:
+            return None
+        version = parts[3]
+    else:
+        parts = _buffer_parts(key)
+        if parts is None:
+            return None
+        version = parts[0]
+
+    return SCHEMAS.get(version) or SCHEMAS.get(version.lower())
+
+
+def _match(key):
+    """Match a hub key against the schema for its schema_version
+
+    :param key: str or buffer, a hub key
+    :returns: (Schema, tuple of the key's parts), or (None, None)
+    :raises: TypeError if key is not a string or buffer
+    """
+    schema = _get_schema(key)
+    if schema:
+        values = schema.match(key)
+        if values:
+            return schema, values
+
+    return None, None
+
+
+def _schemas_for_hub(hub_id):
+    """Get the registered schemas, with their hub_id part replaced
+
+    :param hub_id: str, the hub_id part's regex
+    :returns: dict of Schemas by schema_version
+    """
+    if hub_id == _HUB_ID:
+        return SCHEMAS
+
+    schemas = {}
+    for version, schema in SCHEMAS.items():
+        if 'hub_id' not in schema.parts:
+            schemas[version] = schema
+            continue
+
+        parts = OrderedDict(schema.parts)
+        parts['hub_id'] = hub_id
+        if version == SCHEMA:
+            pattern = LazyPattern(_pattern(parts))
+            schemas[version] = Schema(version, parts, match=_s1_matcher(hub_id, pattern), pattern=pattern)
+        else:
+            schemas[version] = Schema(version, parts, normalise=schema._normalise)
+
+    return schemas
+
+
+class _HubSchemas(object):
+    """The registered schemas for a set of hub_ids
+
+    :param hub_ids: iterable of hub_id regexes
+    """
+
+    def __init__(self, hub_ids):
+        self.schemas = dict((hub_id, _schemas_for_hub(hub_id)) for hub_id in hub_ids)
+        # Schemas by the schema_version and hub_id parts, if the hub_ids can
+        # be compared as literals. Case insensitive parts, e.g. of s0 keys,
+        # are also found by their lower case parts, so that hub_ids that
+        # differ only in case do not replace each other's case sensitive
+        # schemas
+        self.by_parts = None
+        if all(_is_literal(hub_id) for hub_id in self.schemas):
+            self.by_parts = {}
+            for hub_id, schemas in self.schemas.items():
+                for version, schema in schemas.items():
+                    self.by_parts[(version, hub_id)] = schema
+            for hub_id, schemas in self.schemas.items():
+                for version, schema in schemas.items():
+                    if schema.pattern.flags & re.IGNORECASE:
+                        self.by_parts.setdefault((version.lower(), hub_id.lower()), schema)
+
+    def match(self, key):
+        """Match a hub key against the schema for its schema_version and
+        hub_id
+
+        :param key: str or buffer, a hub key
+        :returns: (Schema, tuple of the key's parts), or (None, None)
+        :raises: TypeError if key is not a string or buffer
+        """
+        parts = _key_parts(key)
+        if parts is None:
+            return None, None
+
+        for schema in self.candidates(*parts):
+            values = schema.match(key)
+            if values:
+                return schema, values
+
+        return None, None
+
+    def candidates(self, version, hub_id):
+        """Get the schemas that may match a key with these schema_version
+        and hub_id parts
+
+        :param version: str, the key's schema_version part
+        :param hub_id: str, the key's hub_id part
+        :returns: sequence of Schemas
+        """
+        if self.by_parts is not None:
+            schema = (self.by_parts.get((version, hub_id)) or
+                      self.by_parts.get((version.lower(), hub_id.lower())))
+            return (schema,) if schema else ()
+
+        schemas = (s.get(version) or s.get(version.lower()) for s in self.schemas.values())
+        return [schema for schema in schemas if schema]
+
+
+def _hub_schemas(hub_id):
+    """Get the cached _HubSchemas for a hub_id or an iterable of hub_ids
+
+    :param hub_id: str, or iterable of str
+    :returns: _HubSchemas
+    """
+    try:
+        return _HUB_SCHEMAS[hub_id]
+    except (KeyError, TypeError):
+        pass
+
+    if isinstance(hub_id, basestring):
+        key, hub_ids = hub_id, (hub_id,)
+    else:
+        key = hub_ids = frozenset(hub_id)
+
+    hub_schemas = _HUB_SCHEMAS.get(key)
+    if hub_schemas is None:
+        hub_schemas = _HubSchemas(hub_ids)
+        if len(_HUB_SCHEMAS) >= HUB_SCHEMAS_MAXSIZE:
+            try:
+                _HUB_SCHEMAS.popitem(last=False)
+            except KeyError:
+                pass
+        _HUB_SCHEMAS[key] = hub_schemas
+
+    return hub_schemas
+
+
+def matcher(hub_id=None):
+    """Get a function that matches a hub key against the registered schemas
+
+    :param hub_id: optional hub_id, or iterable of hub_ids, that the keys
+        must have. Defaults to the configured hub_id
+    :returns: function taking a str or buffer and returning (Schema, tuple
+        of the key's parts), or (None, None). It raises TypeError if the key
+        is not a string or buffer
+    """
+    return _match if hub_id is None else _hub_schemas(hub_id).match
+
+
+def candidate_schemas(key, hub_id=None):
+    """Get the schemas that may match a hub key, by its schema_version and
+    hub_id parts, e.g. to match the key with a schema's pattern
+
+    :param key: str or buffer, a hub key
+    :param hub_id: optional hub_id, or iterable of hub_ids, that the key
+        must have. Defaults to the configured hub_id
+    :returns: sequence of Schemas
+    :raises: TypeError if key is not a string or buffer
+    """
+    parts = _key_parts(key)
+    if parts is None:
+        return ()
+
+    version, key_hub_id = parts
+    if hub_id is None:
+        schema = SCHEMAS.get(version) or SCHEMAS.get(version.lower())
+        return (schema,) if schema else ()
+
+    return _hub_schemas(hub_id).candidates(version, key_hub_id)
+
+
+class InternTable(object):
+    """A bounded table of parsed part values, so that parts with the same
+    value can share one string
+
+    Values are added until the table has maxsize values of a type. After
+    that, values that are not in the table are returned as they are.
+
+    :param maxsize: maximum number of values of each type, str or unicode
+    """
+    # Parts that are usually unique, so are not interned
+    UNIQUE_PARTS = frozenset(['entity_id'])
+
+    def __init__(self, maxsize=65536):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self.saved_bytes = 0
+        self._tables = {str: {}, unicode: {}}
+        self._positions = {}
+
+    def intern_values(self, fields, values):
+        """Get the interned values of a key's parts
+
+        :param fields: tuple of part names
+        :param values: tuple of part values
+        :returns: tuple of part values
+        """
+        table = self._tables.get(type(values[0])) if values else None
+        if table is None:
+            return values
+
+        positions = self._positions.get(fields)
+        if positions is None:
+            positions = self._positions[fields] = [
+                i for i, field in enumerate(fields) if field not in self.UNIQUE_PARTS]
+
+        values = list(values)
+        for i in positions:
+            value = values[i]
+            existing = table.get(value)
+            if existing is None:
+                self.misses += 1
+                if len(table) < self.maxsize:
+                    table[value] = value
+            else:
+                self.hits += 1
+                if existing is not value:
+                    self.saved_bytes += sys.getsizeof(value)
+                    values[i] = existing
+
+        return tuple(values)
+
+    def stats(self):
+        """Get the table's statistics
+
+        :returns: dict with size, maxsize, hits, misses and saved_bytes, an
+            estimate of the memory saved by sharing values
+        """
+        return {
+            'size': sum(len(t) for t in self._tables.values()),
+            'maxsize': self.maxsize,
+            'hits': self.hits,
+            'misses': self.misses,
+            'saved_bytes': self.saved_bytes,
+        }
+
+    def clear(self):
+        for table in self._tables.values():
+            table.clear()
+        self.hits = self.misses = self.saved_bytes = 0
+
+
+# Used by the parse functions when intern is True
+INTERN_TABLE = InternTable()
+
+
+def _intern_table(intern):
+    if intern is True:
+        return INTERN_TABLE
+    return intern or None
+
+
+# Instrumentation of the public functions, None when disabled
+_instrumentation = None
+
+
+def enable_instrumentation(sink=None):
+    """Count the outcomes and record the latency of parse_hub_key,
+    is_hub_key, match_part and generate_hub_key calls
+
+    :param sink: optional callable, called with the function name, outcome
+        and latency in seconds of each call
+    :returns: Instrumentation, holding the counters and histograms
+    """
+    global _instrumentation
+    _instrumentation = Instrumentation(sink)
+    return _instrumentation
+
+
+def disable_instrumentation():
+    """Stop instrumenting calls"""
+    global _instrumentation
+    _instrumentation = None
+
+
+def get_instrumentation():
+    """Get the current Instrumentation, or None if it is disabled"""
+    return _instrumentation
+
+
+def _schema_version(schema):
+    return schema.version if schema else INVALID
+
+
+def _parsed_version(parsed):
+    return parsed['schema_version']
+
+
+def _valid(result):
+    return 'valid'
+
+
+def _generated(hub_key):
+    return SCHEMA
+
+
+def parse_hub_key(key, hub_id=None, intern=None):
     """Parse a hub key into a dictionary of component parts
 
     :param key: str, a hub key
+    :param hub_id: optional hub_id, or iterable of hub_ids, that the key
+        must have. Defaults to the configured hub_id
+    :param intern: optional InternTable, or True for INTERN_TABLE, to share
+        the parts' values with other parsed keys
     :returns: dict, hub key split into parts
     :raises: ValueError
     """
+    # Read once, as another thread may disable instrumentation
+    instrumentation = _instrumentation
+    if instrumentation is not None:
+        return instrumentation.call('parse_hub_key', _parse_hub_key, (key, hub_id, intern), _parsed_version)
+    return _parse_hub_key(key, hub_id, intern)
+
+
+def _parse_hub_key(key, hub_id=None, intern=None):
+    schema, values = _parse_values(key, hub_id, intern)
+    return dict(zip(schema.fields, values))
+
+
+def _parse_values(key, hub_id, intern):
+    """Parse a hub key into its schema and the values of its parts
+
+    :returns: (Schema, tuple)
+    :raises: ValueError
+    """
     if key is None:
         raise ValueError('Not a valid key')
 
-    match = re.match(PATTERN, key)
-    if not match:
-        match = re.match(PATTERN_S0, key)
-        if not match:
-            raise ValueError('Not a valid key')
+    schema, values = matcher(hub_id)(key)
+    if not schema:
+        raise ValueError('Not a valid key')
+
+    if intern:
+        values = _intern_table(intern).intern_values(schema.fields, values)
+
+    return schema, values
+
+
+ON_ERROR = ('raise', 'skip', 'yield_error')
+
+
+def parse_hub_keys(keys, on_error='raise', hub_id=None, intern=None):
+    """Lazily parse an iterable of hub keys
+
+    Results are the same as calling parse_hub_key on each key, but the
+    per-call setup is done once for the whole iterable.
+
+    :param keys: iterable of hub keys
+    :param on_error: what to do with an invalid key. One of
+        'raise': raise a ValueError (the default, same as parse_hub_key),
+        'skip': leave the key out of the results,
+        'yield_error': yield the ValueError in place of the parsed key
+    :param hub_id: optional hub_id, or iterable of hub_ids, that the keys
+        must have. Defaults to the configured hub_id
+    :param intern: optional InternTable, or True for INTERN_TABLE, to share
+        the parts' values between parsed keys
+    :returns: generator of dicts, hub keys split into parts
+    :raises: ValueError
+    """
+    intern_table = _intern_table(intern)
+    if intern_table is None:
+        def parsed(key, schema, values):
+            return dict(zip(schema.fields, values))
+    else:
+        intern_values = intern_table.intern_values
+
+        def parsed(key, schema, values):
+            return dict(zip(schema.fields, intern_values(schema.fields, values)))
+
+    return map_hub_keys(parsed, keys, on_error, hub_id)
+
+
+def map_hub_keys(func, keys, on_error='raise', hub_id=None):
+    """Lazily call a function with each hub key's schema and parts
+
+    :param func: function taking the key, its Schema and the tuple of its
+        parts
+    :param keys: iterable of hub keys
+    :param on_error: what to do with an invalid key, see parse_hub_keys
+    :param hub_id: optional hub_id, or iterable of hub_ids, that the keys
+        must have. Defaults to the configured hub_id
+    :returns: generator of func's results
+    :raises: ValueError
+    """
+    if on_error not in ON_ERROR:
+        raise ValueError('on_error should be one of {}'.format(', '.join(ON_ERROR)))
+
+    return _map_hub_keys(func, keys, on_error, matcher(hub_id))
+
+
+def _map_hub_keys(func, keys, on_error, match):
+    for key in keys:
+        try:
+            schema, values = match(key) if key is not None else (None, None)
+            if schema:
+                yield func(key, schema, values)
+                continue
+
+            error = ValueError('Not a valid key')
+        except TypeError as exc:
+            if on_error == 'raise':
+                raise
+            error = exc
+
+        if on_error == 'raise':
+            raise error
+        elif on_error == 'yield_error':
+            yield error
+
+
+class HubKey(object):
+    """An immutable parsed hub key
+
+    A compact alternative to the dict returned by parse_hub_key. The
+    component parts are stored in a single tuple, in the order of the
+    schema's parts, and can be read as attributes, e.g. key.entity_id, or as
+    items, e.g. key['entity_id']. str(key) returns the hub key.
+
+    :param values: sequence of component parts in the order of the schema's
+        parts, e.g. PARTS for s1 keys
+    """
+    __slots__ = ('_values', '_schema', '_hash')
+
+    def __init__(self, values):
+        values = tuple(values)
+        schema = SCHEMAS.get(values[1]) if len(values) > 1 else None
+        if not schema:
+            raise ValueError('Not a valid schema version')
+        if len(values) != len(schema.fields):
+            raise ValueError('Expected {} parts, got {}'.format(len(schema.fields), len(values)))
+
+        object.__setattr__(self, '_values', values)
+        object.__setattr__(self, '_schema', schema)
+        object.__setattr__(self, '_hash', hash(values))
+
+    @classmethod
+    def parse(cls, key, hub_id=None, intern=None):
+        """Parse a hub key
+
+        :param key: str, a hub key
+        :param hub_id: optional hub_id, or iterable of hub_ids, that the key
+            must have. Defaults to the configured hub_id
+        :param intern: optional InternTable, or True for INTERN_TABLE, to
+            share the parts' values with other parsed keys
+        :returns: HubKey
+        :raises: ValueError
+        """
+        _, values = _parse_values(key, hub_id, intern)
+        return cls(values)
+
+    def __getattr__(self, name):
+        try:
+            return self._values[self._schema.index[name]]
+        except KeyError:
+            raise AttributeError(name)
+
+    def __setattr__(self, name, value):
+        raise AttributeError('HubKey is immutable')
+
+    def __delattr__(self, name):
+        raise AttributeError('HubKey is immutable')
+
+    def __getitem__(self, name):
+        return self._values[self._schema.index[name]]
+
+    def __contains__(self, name):
+        return name in self._schema.index
+
+    def __iter__(self):
+        return iter(self.keys())
+
+    def __len__(self):
+        return len(self._values)
+
+    def __hash__(self):
+        return self._hash
+
+    def __eq__(self, other):
+        if not isinstance(other, HubKey):
+            return NotImplemented
+        return self._hash == other._hash and self._values == other._values
+
+    def __ne__(self, other):
+        result = self.__eq__(other)
+        if result is NotImplemented:
+            return result
+        return not result
+
+    def __str__(self):
+        return SEPARATOR.join(self._values)
+
+    def __repr__(self):
+        return 'HubKey({!r})'.format(str(self))
+
+    def __reduce__(self):
+        return self.__class__, (self._values,)
+
+    def keys(self):
+        return self._schema.fields
+
+    def values(self):
+        return self._values
 
-        return dict(map(normalise_part, zip([p for p in PARTS_S0.keys()], match.groups())))
+    def items(self):
+        return zip(self.keys(), self._values)
 
-    return dict(zip(PARTS.keys(), match.groups()))
+    def timestamp(self):
+        """Get the time a time ordered entity_id was made
 
+        :returns: float, seconds since the epoch
+        :raises: ValueError if the entity_id is not time ordered
+        """
+        return timestamp(self.entity_id)
 
-def is_hub_key(value):
+    def get(self, name, default=None):
+        index = self._schema.index.get(name)
+        return default if index is None else self._values[index]
+
+    def to_dict(self):
+        """Return the parts as a dict, as returned by parse_hub_key"""
+        return dict(self.items())
+
+
+def is_hub_key(value, hub_id=None):
     """Test if a value could be a hub key
     :param value: the value to test if it is a hub key
+    :param hub_id: optional hub_id, or iterable of hub_ids, that the key
+        must have. Defaults to the configured hub_id
     :returns: True if it is a hub key
     """
+    instrumentation = _instrumentation
+    if instrumentation is not None:
+        schema = instrumentation.call('is_hub_key', _hub_key_schema, (value, hub_id), _schema_version)
+        return schema is not None
+
+    # Same as _hub_key_schema, inlined to save a call
     try:
-        parse_hub_key(value)
-        return True
-    except (ValueError, TypeError):
+        return value is not None and matcher(hub_id)(value)[0] is not None
+    except TypeError:
         return False
 
 
+def _hub_key_schema(value, hub_id=None):
+    try:
+        return matcher(hub_id)(value)[0] if value is not None else None
+    except TypeError:
+        return None
+
+
 def match_part(string, part):
     """Raise an exception if string doesn't match a part's regex
 
@@ -118,7 +963,18 @@ def match_part(string, part):
     :param part: a key in the PARTS dict
     :raises: ValueError, TypeError
     """
-    if not string or not re.match('^(' + PARTS[part] + ')$', string):
+    instrumentation = _instrumentation
+    if instrumentation is not None:
+        return instrumentation.call('match_part', _match_part, (string, part), _valid, 'invalid:' + part)
+
+    # Same as _match_part, inlined because the extra call costs as much as
+    # the check
+    if not string or not COMPILED_PARTS[part].match(string):
+        raise ValueError('{} should match {}'.format(part, PARTS[part]))
+
+
+def _match_part(string, part):
+    if not string or not COMPILED_PARTS[part].match(string):
         raise ValueError('{} should match {}'.format(part, PARTS[part]))
 
 
@@ -130,6 +986,15 @@ def idna_encode(string):
     :param string: str
     :returns: ASCII string
     """
+    if _is_ascii(string):
+        # The IDNA codec leaves ASCII labels as they are, it only checks
+        # their length. Fall back to the codec to raise its error.
+        labels = string.split('.')
+        if labels[-1] == '':
+            del labels[-1]
+        if all(0 < len(label) < 64 for label in labels):
+            return unicode(string)
+
     return string.encode('idna').decode('ascii')
 
 
@@ -139,43 +1004,179 @@ def url_quote(string):
     :param string: str
     :returns: ASCII string
     """
+    # urllib is imported when it is used, because importing it takes longer
+    # than importing the rest of this module
+    from urllib import quote
+
+    if _is_ascii(string):
+        return quote(str(string), safe=':/')
+
     return quote(string.encode('utf8'), safe=':/')
 
 
-def generate_hub_key(resolver_id, hub_id, repository_id, entity_type, entity_id=None):
+_NON_ASCII = re.compile(r'[^\x00-\x7f]')
+
+
+def _is_ascii(string):
+    return isinstance(string, basestring) and not _NON_ASCII.search(string)
+
+
+# Maximum number of distinct values remembered by a memoized normalisation.
+# Deployments only use a handful of resolvers and hubs.
+NORMALISED_MAXSIZE = 256
+
+
+def _memoize(func):
+    """Memoize a normalisation function of a single string
+
+    Values are remembered by type as well as value, so that str and unicode
+    arguments keep returning the same type as the function. Once full, new
+    values are normalised but not remembered. Errors are never remembered.
+    """
+    cache = {}
+
+    @wraps(func)
+    def wrapper(value):
+        key = (type(value), value)
+        try:
+            return cache[key]
+        except KeyError:
+            pass
+        except TypeError:
+            return func(value)
+
+        result = func(value)
+        if len(cache) < NORMALISED_MAXSIZE:
+            cache[key] = result
+        return result
+
+    wrapper.cache = cache
+    return wrapper
+
+
+@_memoize
+def _normalise_resolver_id(resolver_id):
+    parsed = urlparse(resolver_id)
+    if not parsed.scheme:
+        parsed = parsed._replace(scheme=PROTOCOL, netloc=idna_encode(parsed.path.lower()), path=u'')
+    else:
+        parsed = parsed._replace(netloc=idna_encode(parsed.netloc.lower()))
+
+    return urlunparse(parsed)
+
+
+@_memoize
+def _normalise_hub_id(hub_id):
+    return url_quote(hub_id.lower())
+
+
+def _validate_prefix(resolver_id, hub_id, repository_id, entity_type):
+    # If any of these checks fail a ValueError exception is raised
+    match_part(resolver_id, 'resolver_id')
+    match_part(hub_id, 'hub_id')
+    match_part(repository_id, 'repository_id')
+    match_part(entity_type, 'entity_type')
+
+
+# Makes the same IDs as uuid.uuid4().hex, several times faster
+_new_entity_id = RandomIds()
+_new_time_ordered_id = TimeOrderedIds(_new_entity_id)
+
+
+def generate_hub_key(resolver_id, hub_id, repository_id, entity_type, entity_id=None, time_ordered=False):
     """Create and return an array of hub keys
     :param resolver_id: the service that can resolve this key
     :param hub_id: the unique id of the hub
     :param repository_id: the type of id that the provider recognises
     :param entity_type: the type of the entity to which the key refers.
     :param entity_id: ID of entity (UUID)
+    :param time_ordered: if True a new entity_id sorts by the time it was
+        made, see bass.entity_ids.TimeOrderedIds
     :returns: a hub key
     :raises:
     :AttributeError: if a parameter has a bad value
     :TypeError: if a parameter has a bad value
     :ValueError: if a parameter has a bad value
     """
-    parsed = urlparse(resolver_id)
-    if not parsed.scheme:
-        parsed = parsed._replace(scheme=PROTOCOL, netloc=idna_encode(parsed.path.lower()), path=u'')
-    else:
-        parsed = parsed._replace(netloc=idna_encode(parsed.netloc.lower()))
+    instrumentation = _instrumentation
+    if instrumentation is not None:
+        return instrumentation.call(
+            'generate_hub_key', _generate_hub_key,
+            (resolver_id, hub_id, repository_id, entity_type, entity_id, time_ordered), _generated)
+    return _generate_hub_key(resolver_id, hub_id, repository_id, entity_type, entity_id, time_ordered)
 
-    resolver_id = urlunparse(parsed)
 
-    hub_id = url_quote(hub_id.lower())
+def _generate_hub_key(resolver_id, hub_id, repository_id, entity_type, entity_id, time_ordered=False):
+    resolver_id = _normalise_resolver_id(resolver_id)
+    hub_id = _normalise_hub_id(hub_id)
 
     if not entity_id:
-        entity_id = str(uuid.uuid4()).replace('-', '')
+        entity_id = _new_time_ordered_id() if time_ordered else _new_entity_id()
     else:
         match_part(entity_id, 'entity_id')
 
-    # If any of these checks fail a ValueError exception is raised
-    match_part(resolver_id, 'resolver_id')
-    match_part(hub_id, 'hub_id')
-    match_part(repository_id, 'repository_id')
-    match_part(entity_type, 'entity_type')
+    _validate_prefix(resolver_id, hub_id, repository_id, entity_type)
 
     hub_key = SEPARATOR.join(
         [resolver_id, SCHEMA, hub_id, repository_id, entity_type, entity_id])
     return hub_key
+
+
+class HubKeyFactory(object):
+    """Generate hub keys that share a resolver, hub, repository and entity type
+
+    The shared parts are normalised and validated once, when the factory is
+    created, so generating a key only needs a new entity ID.
+
+    :param resolver_id: the service that can resolve the keys
+    :param hub_id: the unique id of the hub
+    :param repository_id: the type of id that the provider recognises
+    :param entity_type: the type of the entity to which the keys refer.
+    :param time_ordered: if True new entity_ids sort by the time they were
+        made, see bass.entity_ids.TimeOrderedIds
+    :raises:
+    :AttributeError: if a parameter has a bad value
+    :TypeError: if a parameter has a bad value
+    :ValueError: if a parameter has a bad value
+    """
+
+    def __init__(self, resolver_id, hub_id, repository_id, entity_type, time_ordered=False):
+        self.resolver_id = _normalise_resolver_id(resolver_id)
+        self.hub_id = _normalise_hub_id(hub_id)
+        self.repository_id = repository_id
+        self.entity_type = entity_type
+        self.time_ordered = time_ordered
+
+        _validate_prefix(self.resolver_id, self.hub_id, self.repository_id, self.entity_type)
+
+        self.prefix = SEPARATOR.join(
+            [self.resolver_id, SCHEMA, self.hub_id, self.repository_id, self.entity_type, ''])
+
+    def new(self, entity_id=None):
+        """Create and return a hub key
+
+        :param entity_id: ID of entity (UUID)
+        :returns: a hub key
+        :raises: ValueError if entity_id has a bad value
+        """
+        if not entity_id:
+            entity_id = _new_time_ordered_id() if self.time_ordered else _new_entity_id()
+        else:
+            match_part(entity_id, 'entity_id')
+
+        return self.prefix + entity_id
+
+    def batch(self, n):
+        """Create and return a list of hub keys with new entity IDs
+
+        :param n: int, number of hub keys
+        :returns: list of hub keys
+        """
+        prefix = self.prefix
+        new_entity_ids = _new_time_ordered_id if self.time_ordered else _new_entity_id
+        return [prefix + entity_id for entity_id in new_entity_ids.take(n)]
+
+
+# Keep the hub_id option for applications using tornado.options
+if 'tornado.options' in sys.modules:
+    use_tornado_options()
@@ -0,0 +1,207 @@
+# -*- coding: utf-8 -*-
+
+# Copyright 2016 Open Permissions Platform Coalition
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License. You may obtain a copy of the License at
+# http://www.apache.org/licenses/LICENSE-2.0
+# Unless required by applicable law or agreed to in writing, software distributed under the License is
+# distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and limitations under the License.
+
+"""An in-memory index of hub keys by their parts
+
+Keys are held in a tree of dicts with one level for each of LEVELS. The
+last level maps each entity_type to a set of keys:
+
+    resolver_id -> hub_id -> repository_id -> entity_type -> set of keys
+
+Keys without a repository_id, e.g. s0 keys, are under a repository_id of
+None. A query looks up the parts it is given and visits every branch of the
+levels it is not given, so its cost depends on the number of branches
+visited and keys returned, not on the number of keys in the index.
+
+Each key is stored once, in its canonical form: its parts as parsed by
+parse_hub_key joined with "/". The parts at the levels are stored once per
+branch, so memory per key is its canonical key plus a set entry, about
+180 bytes for an s1 key (see benchmarks/index.py).
+"""
+from bass import hubkey
+
+LEVELS = ('resolver_id', 'hub_id', 'repository_id', 'entity_type')
+
+
+class HubKeyIndex(object):
+    """Index hub keys by resolver_id, hub_id, repository_id and entity_type
+
+    :param keys: optional iterable of hub keys to add
+    :param hub_id: optional hub_id, or iterable of hub_ids, that the keys
+        must have. Defaults to the configured hub_id
+    """
+
+    def __init__(self, keys=(), hub_id=None):
+        self.hub_id = hub_id
+        self._tree = {}
+        self._len = 0
+        self.update(keys)
+
+    def _parse(self, key):
+        """Get a key's path in the tree and its canonical form"""
+        if key is None:
+            raise ValueError('Not a valid key')
+
+        schema, values = hubkey.matcher(self.hub_id)(key)
+        if not schema:
+            raise ValueError('Not a valid key')
+
+        index = schema.index
+        path = tuple(values[index[level]] if level in index else None for level in LEVELS)
+        return path, hubkey.SEPARATOR.join(values)
+
+    def _add(self, path, key):
+        node = self._tree
+        for part in path[:-1]:
+            child = node.get(part)
+            if child is None:
+                child = node[part] = {}
+            node = child
+
+        keys = node.get(path[-1])
+        if keys is None:
+            keys = node[path[-1]] = set()
+        if key not in keys:
+            keys.add(key)
+            self._len += 1
+
+    def add(self, key):
+        """Add a hub key
+
+        :param key: str, a hub key
+        :raises: ValueError if key is not a valid hub key
+        """
+        self._add(*self._parse(key))
+
+    def update(self, keys, on_error='raise'):
+        """Add hub keys
+
+        :param keys: iterable of hub keys
+        :param on_error: 'raise' to raise a ValueError for an invalid key,
+            or 'skip' to leave it out
+        :returns: int, number of keys that were skipped
+        :raises: ValueError
+        """
+        if on_error not in ('raise', 'skip'):
+            raise ValueError('on_error should be one of raise, skip')
+
+        skipped = 0
+        parse = self._parse
+        add = self._add
+        for key in keys:
+            try:
+                path, canonical = parse(key)
+            except (TypeError, ValueError):
+                if on_error == 'raise':
+                    raise
+                skipped += 1
+                continue
+            add(path, canonical)
+
+        return skipped
+
+    def discard(self, key):
+        """Remove a hub key if it is in the index
+
+        :param key: str, a hub key
+        :returns: bool, whether the key was removed
+        :raises: ValueError if key is not a valid hub key
+        """
+        path, canonical = self._parse(key)
+
+        # The nodes on the path, so that empty branches can be removed
+        nodes = [self._tree]
+        for part in path:
+            node = nodes[-1].get(part)
+            if node is None:
+                return False
+            nodes.append(node)
+
+        if canonical not in nodes[-1]:
+            return False
+
+        nodes[-1].remove(canonical)
+        self._len -= 1
+        for parent, part, node in reversed(zip(nodes, path, nodes[1:])):
+            if node:
+                break
+            del parent[part]
+
+        return True
+
+    def remove(self, key):
+        """Remove a hub key
+
+        :param key: str, a hub key
+        :raises: KeyError if the key is not in the index, ValueError if key
+            is not a valid hub key
+        """
+        if not self.discard(key):
+            raise KeyError(key)
+
+    def _sets(self, node, parts):
+        """Get the sets of keys under node that match parts"""
+        part, rest = parts[0], parts[1:]
+        if part is None:
+            children = node.itervalues()
+        else:
+            child = node.get(part)
+            children = (child,) if child is not None else ()
+
+        if not rest:
+            return list(children)
+
+        sets = []
+        for child in children:
+            sets.extend(self._sets(child, rest))
+        return sets
+
+    def keys(self, resolver_id=None, hub_id=None, repository_id=None, entity_type=None):
+        """Get the keys with the given parts
+
+        Parts that are None match any value. Values are compared with the
+        parsed parts, so s0 parts other than entity_id are lower case.
+
+        :param resolver_id: optional str
+        :param hub_id: optional str
+        :param repository_id: optional str
+        :param entity_type: optional str
+        :returns: generator of canonical hub keys
+        """
+        for keys in self._sets(self._tree, (resolver_id, hub_id, repository_id, entity_type)):
+            for key in keys:
+                yield key
+
+    def count(self, resolver_id=None, hub_id=None, repository_id=None, entity_type=None):
+        """Count the keys with the given parts, see keys
+
+        :returns: int
+        """
+        return sum(len(keys) for keys in
+                   self._sets(self._tree, (resolver_id, hub_id, repository_id, entity_type)))
+
+    def __contains__(self, key):
+        try:
+            path, canonical = self._parse(key)
+        except (TypeError, ValueError):
+            return False
+
+        node = self._tree
+        for part in path:
+            node = node.get(part)
+            if node is None:
+                return False
+        return canonical in node
+
+    def __iter__(self):
+        return self.keys()
+
+    def __len__(self):
+        return self._len
@@ -0,0 +1,118 @@
+# -*- coding: utf-8 -*-
+
+# Copyright 2016 Open Permissions Platform Coalition
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License. You may obtain a copy of the License at
+# http://www.apache.org/licenses/LICENSE-2.0
+# Unless required by applicable law or agreed to in writing, software distributed under the License is
+# distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and limitations under the License.
+
+"""Counters and latency histograms for the hubkey functions
+
+Instrumentation is disabled by default. It is enabled with
+bass.hubkey.enable_instrumentation.
+"""
+import bisect
+import threading
+from collections import Counter
+from timeit import default_timer
+
+INVALID = 'invalid'
+# Upper bounds of the latency buckets in seconds, from 1us to about 1s. The
+# last bucket holds everything slower
+BUCKETS = tuple(2 ** i * 1e-6 for i in range(21))
+
+
+class Histogram(object):
+    """A latency histogram with fixed buckets
+
+    :param buckets: sorted upper bounds of the buckets in seconds
+    """
+
+    def __init__(self, buckets=BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.total = 0.0
+
+    def add(self, seconds):
+        self.counts[bisect.bisect_left(self.buckets, seconds)] += 1
+        self.count += 1
+        self.total += seconds
+
+    def percentile(self, p):
+        """Get the upper bound of the bucket holding a percentile
+
+        :param p: percentile, between 0 and 100
+        :returns: float seconds, inf if the percentile is in the last
+            bucket or None if the histogram is empty
+        """
+        if not self.count:
+            return None
+
+        rank = max(1, p / 100.0 * self.count)
+        seen = 0
+        for bound, count in zip(self.buckets + (float('inf'),), self.counts):
+            seen += count
+            if seen >= rank:
+                return bound
+
+
+class Instrumentation(object):
+    """Record the outcome and latency of calls
+
+    Outcomes are counted by (function name, outcome), e.g.
+    ('parse_hub_key', 's0') or ('match_part', 'invalid:entity_id').
+
+    :param sink: optional callable, called with the function name, outcome
+        and latency in seconds of each call
+    """
+
+    def __init__(self, sink=None):
+        self.sink = sink
+        self.counters = Counter()
+        self.histograms = {}
+        self._lock = threading.Lock()
+
+    def record(self, function, outcome, seconds):
+        """Record a call
+
+        :param function: str, function name
+        :param outcome: str
+        :param seconds: float, the call's latency
+        """
+        with self._lock:
+            self.counters[(function, outcome)] += 1
+            histogram = self.histograms.get(function)
+            if histogram is None:
+                histogram = self.histograms[function] = Histogram()
+            histogram.add(seconds)
+
+        if self.sink is not None:
+            self.sink(function, outcome, seconds)
+
+    def call(self, function, func, args, outcome, error_outcome=INVALID):
+        """Call func and record its outcome and latency
+
+        :param function: str, function name
+        :param func: the function
+        :param args: tuple of arguments
+        :param outcome: function getting the outcome from func's result
+        :param error_outcome: the outcome if func raises an exception
+        :returns: func's result
+        """
+        start = default_timer()
+        try:
+            result = func(*args)
+        except Exception:
+            self.record(function, error_outcome, default_timer() - start)
+            raise
+
+        self.record(function, outcome(result), default_timer() - start)
+        return result
+
+    def reset(self):
+        with self._lock:
+            self.counters.clear()
+            self.histograms.clear()
@@ -0,0 +1,34 @@
+# -*- coding: utf-8 -*-
+
+# Copyright 2016 Open Permissions Platform Coalition
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License. You may obtain a copy of the License at
+# http://www.apache.org/licenses/LICENSE-2.0
+# Unless required by applicable law or agreed to in writing, software distributed under the License is
+# distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and limitations under the License.
+
+"""Helpers for the command line tools' process pools"""
+from collections import deque
+
+
+def imap(pool, func, iterable, window):
+    """Like pool.imap, but only read ahead window items of iterable
+
+    Pool.imap reads the whole iterable into its task queue, which would
+    read entire files into memory.
+
+    :param pool: multiprocessing.Pool
+    :param func: function called with each item
+    :param iterable: iterable of items
+    :param window: int, maximum number of items being processed
+    :returns: generator of results, in order
+    """
+    pending = deque()
+    for item in iterable:
+        pending.append(pool.apply_async(func, (item,)))
+        if len(pending) >= window:
+            yield pending.popleft().get()
+
+    while pending:
+        yield pending.popleft().get()
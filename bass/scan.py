@@ -0,0 +1,188 @@
+# -*- coding: utf-8 -*-
+
+# Copyright 2016 Open Permissions Platform Coalition
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License. You may obtain a copy of the License at
+# http://www.apache.org/licenses/LICENSE-2.0
+# Unless required by applicable law or agreed to in writing, software distributed under the License is
+# distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and limitations under the License.
+
+"""Find the hub keys in text files, e.g. logs or JSON dumps
+
+    python -m bass.scan [--processes N] [--hub-id HUB_ID ...] FILE [FILE ...]
+
+Files are memory mapped and searched with a regex for the s1 and s0 key
+formats, so only the keys are copied out of the file. Each match is then
+parsed as parse_hub_key would, and is left out if it is not a valid key.
+
+A key is the longest text matching a format that is not followed by a
+character that could continue its last part, or by "/". An s1 key ends with
+a hex ID, so it may be followed by punctuation such as "." or ")". s0 path
+parts may contain characters such as "," and ")", so an s0 key followed by
+e.g. "," includes it, as parse_hub_key would.
+
+With more than one process a file is split into ranges at newlines, which
+are scanned in parallel.
+"""
+import argparse
+import mmap
+import multiprocessing
+import os
+import sys
+
+from bass import hubkey
+
+# Characters that may follow an s1 key, which ends with a hex ID
+_S1_END = r'(?![a-zA-Z0-9_/])'
+# Characters that may follow an s0 key, which ends with a path part
+_S0_END = r"(?![a-zA-Z0-9.\-_~!$&'()*+,;=:@%/])"
+# Number of ranges per process in parallel mode
+RANGES_PER_PROCESS = 4
+
+
+def _any_case(literal):
+    return ''.join('[{}{}]'.format(c.lower(), c.upper()) if c.isalpha() else c for c in literal)
+
+
+def _scan_pattern():
+    path_part = hubkey._PATH_PART
+    resolver_id = hubkey.RESOLVER_ID.replace(hubkey.PROTOCOL + '?', _any_case(hubkey.PROTOCOL) + '?', 1)
+    entity_types = '(?:{})'.format('|'.join(hubkey.ENTITY_TYPES))
+    s0_entity_types = '(?:{})'.format('|'.join(_any_case(t) for t in ('creation', 'asset', 'offer')))
+    s1 = hubkey.SEPARATOR.join([hubkey.SCHEMA, path_part, hubkey.UUID, entity_types, hubkey.UUID])
+    s0 = hubkey.SEPARATOR.join([_any_case('s0'), path_part, s0_entity_types, path_part, path_part, path_part])
+    return '{}/(?:{}{}|{}{})'.format(resolver_id, s1, _S1_END, s0, _S0_END)
+
+
+# Finds candidate hub keys. The hub_id is matched as any path part, and is
+# checked when a candidate is parsed. The s0 format's case insensitive
+# literals are character classes, so that the regex is case sensitive and
+# can skip quickly to the candidates
+SCAN_PATTERN = hubkey.LazyPattern(_scan_pattern())
+
+
+def scan_buffer(buffer, start=0, end=None, hub_id=None):
+    """Find the hub keys in a buffer
+
+    :param buffer: str, mmap or other buffer
+    :param start: int, offset to start at
+    :param end: int, offset to end at, defaults to the end of the buffer
+    :param hub_id: optional hub_id, or iterable of hub_ids, that the keys
+        must have. Defaults to the configured hub_id
+    :returns: generator of (int offset, str key, dict of the key's parts)
+    """
+    if end is None:
+        end = len(buffer)
+
+    match = hubkey.matcher(hub_id)
+    for found in SCAN_PATTERN.finditer(buffer, start, end):
+        key = found.group()
+        schema, values = match(key)
+        if schema:
+            yield found.start(), key, dict(zip(schema.fields, values))
+
+
+def _open(path):
+    """Memory map a file
+
+    :returns: mmap, or None if the file is empty
+    """
+    with open(path, 'rb') as f:
+        if not os.fstat(f.fileno()).st_size:
+            return None
+        return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+def ranges(buffer, n):
+    """Split a buffer into about n ranges at newlines
+
+    Keys cannot contain newlines, so each key is in one range.
+
+    :param buffer: str, mmap or other buffer with a find method
+    :param n: int, number of ranges
+    :returns: list of (start, end)
+    """
+    size = len(buffer)
+    result = []
+    start = 0
+    for i in xrange(1, n + 1):
+        if start >= size:
+            break
+        # The end of a range is after the first newline past its share
+        end = buffer.find('\n', max(start, size * i // n)) + 1 if i < n else size
+        end = end or size
+        if end > start:
+            result.append((start, end))
+        start = end
+    return result
+
+
+def _scan_range(args):
+    path, start, end, hub_id = args
+    buffer = _open(path)
+    try:
+        return list(scan_buffer(buffer, start, end, hub_id))
+    finally:
+        buffer.close()
+
+
+def scan_file(path, processes=1, hub_id=None):
+    """Find the hub keys in a file
+
+    :param path: str, file path
+    :param processes: number of processes. With 1 the file is scanned in
+        this process
+    :param hub_id: optional hub_id, or iterable of hub_ids, that the keys
+        must have. Defaults to the configured hub_id
+    :returns: generator of (int offset, str key, dict of the key's parts),
+        in file order
+    """
+    buffer = _open(path)
+    if buffer is None:
+        return
+
+    try:
+        if processes == 1:
+            for result in scan_buffer(buffer, hub_id=hub_id):
+                yield result
+            return
+
+        tasks = [(path, start, end, hub_id) for start, end in ranges(buffer, processes * RANGES_PER_PROCESS)]
+    finally:
+        buffer.close()
+
+    pool = multiprocessing.Pool(processes)
+    try:
+        for results in pool.imap(_scan_range, tasks):
+            for result in results:
+                yield result
+    finally:
+        pool.terminate()
+        pool.join()
+
+
+def main(argv=None, out=sys.stdout):
+    """Print the hub keys in files as tab separated file, offset and key
+
+    :returns: int, exit status
+    """
+    parser = argparse.ArgumentParser(description='Find the hub keys in text files')
+    parser.add_argument('paths', nargs='+', metavar='FILE', help='file to scan')
+    parser.add_argument('-p', '--processes', type=int, default=1, help='number of processes')
+    parser.add_argument('--hub-id', action='append', dest='hub_ids', metavar='HUB_ID',
+                        help='hub_id that the keys must have, may be repeated. Defaults to the configured hub_id')
+    args = parser.parse_args(argv)
+
+    if args.processes < 1:
+        parser.error('--processes should be at least 1')
+
+    for path in args.paths:
+        for offset, key, _ in scan_file(path, args.processes, args.hub_ids):
+            out.write('{}\t{}\t{}\n'.format(path, offset, key))
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
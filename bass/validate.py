@@ -0,0 +1,248 @@
+# -*- coding: utf-8 -*-
+
+# Copyright 2016 Open Permissions Platform Coalition
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License. You may obtain a copy of the License at
+# http://www.apache.org/licenses/LICENSE-2.0
+# Unless required by applicable law or agreed to in writing, software distributed under the License is
+# distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and limitations under the License.
+
+"""Validate files of newline delimited hub keys
+
+    python -m bass.validate [--processes N] [--rejects FILE] [--hub-id HUB_ID ...] FILE [FILE ...]
+
+Files ending in .gz are decompressed. Lines are read in chunks, which are
+validated by a pool of processes. Rejected lines are written to the rejects
+file as tab separated file, line number, reason and line.
+"""
+import argparse
+import gzip
+import itertools
+import multiprocessing
+import sys
+import time
+from collections import Counter
+
+from bass import hubkey
+from bass.pool import imap
+
+CHUNK_SIZE = 10000
+INVALID = 'invalid'
+
+# Compiled part regexes by regex, for explaining rejects
+_PART_PATTERNS = {}
+
+
+def _schemas(key, hub_id):
+    """Get the schemas for a key's schema_version, one for each hub_id
+
+    :returns: list of Schemas
+    """
+    if hub_id is None:
+        schema = hubkey._get_schema(key)
+        return [schema] if schema else []
+
+    parts = key.split(hubkey.SEPARATOR, 4)
+    if len(parts) < 5:
+        return []
+
+    version = parts[3]
+    schemas = (s.get(version) or s.get(version.lower())
+               for _, s in sorted(hubkey._hub_schemas(hub_id).schemas.items()))
+    return [schema for schema in schemas if schema]
+
+
+def reason(key, hub_id=None):
+    """Explain why a key is not a valid hub key
+
+    :param key: str, a hub key
+    :param hub_id: optional hub_id, or iterable of hub_ids, that the key
+        must have. Defaults to the configured hub_id
+    :returns: str, or None if the key is valid
+    """
+    if not key:
+        return 'empty'
+
+    schemas = _schemas(key, hub_id)
+    if not schemas:
+        parts = key.split(hubkey.SEPARATOR, 4)
+        if len(parts) < 5:
+            return 'too few parts'
+        return 'schema_version {!r} is not registered'.format(parts[3])
+
+    if any(schema.match(key) for schema in schemas):
+        return None
+
+    reasons = [_explain(key, schema) for schema in schemas]
+    # With several hub_ids, the key is explained by the schema of its hub_id
+    return next((r for r in reasons if not r.startswith('hub_id ')), reasons[0])
+
+
+def _explain(key, schema):
+    # resolver_id contains the separators after the protocol
+    parts = key.split(hubkey.SEPARATOR)
+    parts[:3] = [hubkey.SEPARATOR.join(parts[:3])]
+    if len(parts) != len(schema.fields):
+        return 'expected {} parts, got {}'.format(len(schema.fields), len(parts))
+
+    for part, value in zip(schema.fields, parts):
+        regex = schema.parts[part]
+        pattern = _PART_PATTERNS.get(regex)
+        if pattern is None:
+            pattern = _PART_PATTERNS[regex] = hubkey._compile_part(regex)
+        if not pattern.match(value):
+            return '{} should match {}'.format(part, regex)
+
+    return 'does not match schema {}'.format(schema.version)
+
+
+def validate_lines(lines, hub_id=None):
+    """Validate hub keys, one per line
+
+    :param lines: iterable of (line number, line)
+    :param hub_id: optional hub_id, or iterable of hub_ids, that the keys
+        must have. Defaults to the configured hub_id
+    :returns: (Counter of schema versions and INVALID,
+        list of (line number, reason, key) for invalid keys)
+    """
+    match = hubkey.matcher(hub_id)
+    counts = Counter()
+    rejects = []
+
+    for number, line in lines:
+        key = line.rstrip('\r\n')
+        schema, _ = match(key)
+        if schema:
+            counts[schema.version] += 1
+        else:
+            counts[INVALID] += 1
+            rejects.append((number, reason(key, hub_id), key))
+
+    return counts, rejects
+
+
+def _validate_chunk(args):
+    path, lines, hub_id = args
+    counts, rejects = validate_lines(lines, hub_id)
+    return path, counts, rejects
+
+
+def open_file(path):
+    """Open a file of hub keys, decompressing it if it ends in .gz
+
+    :param path: str, or '-' for stdin
+    :returns: file
+    """
+    if path == '-':
+        return sys.stdin
+    elif path.endswith('.gz'):
+        return gzip.open(path, 'rb')
+    else:
+        return open(path, 'rb')
+
+
+def read_chunks(paths, chunk_size=CHUNK_SIZE):
+    """Read files in chunks of lines
+
+    :param paths: list of file paths
+    :param chunk_size: number of lines in a chunk
+    :returns: generator of (path, list of (line number, line))
+    """
+    for path in paths:
+        f = open_file(path)
+        try:
+            lines = enumerate(f, 1)
+            while True:
+                chunk = list(itertools.islice(lines, chunk_size))
+                if not chunk:
+                    break
+                yield path, chunk
+        finally:
+            if f is not sys.stdin:
+                f.close()
+
+
+def validate_files(paths, processes=None, chunk_size=CHUNK_SIZE, rejects=None, hub_id=None):
+    """Validate files of hub keys
+
+    :param paths: list of file paths
+    :param processes: number of worker processes, defaults to the number of
+        CPUs. With 1 the files are validated in this process
+    :param chunk_size: number of lines sent to a process at a time
+    :param rejects: optional file for the rejected lines
+    :param hub_id: optional hub_id, or iterable of hub_ids, that the keys
+        must have. Defaults to the configured hub_id
+    :returns: Counter of schema versions and INVALID
+    """
+    processes = processes or multiprocessing.cpu_count()
+    chunks = ((path, lines, hub_id) for path, lines in read_chunks(paths, chunk_size))
+
+    if processes == 1:
+        pool = None
+        results = itertools.imap(_validate_chunk, chunks)
+    else:
+        pool = multiprocessing.Pool(processes)
+        results = imap(pool, _validate_chunk, chunks, processes * 2)
+
+    counts = Counter()
+    try:
+        for path, chunk_counts, chunk_rejects in results:
+            counts.update(chunk_counts)
+            if rejects is not None:
+                for number, why, key in chunk_rejects:
+                    rejects.write('{}\t{}\t{}\t{}\n'.format(path, number, why, key))
+    finally:
+        if pool is not None:
+            pool.terminate()
+            pool.join()
+
+    return counts
+
+
+def _report(counts, seconds, out):
+    total = sum(counts.values())
+    valid = total - counts[INVALID]
+    versions = sorted(k for k in counts if k != INVALID)
+
+    out.write('keys: {}\n'.format(total))
+    out.write('valid: {}\n'.format(valid))
+    for version in versions:
+        out.write('{}: {}\n'.format(version, counts[version]))
+    out.write('invalid: {}\n'.format(counts[INVALID]))
+    out.write('seconds: {:.2f}\n'.format(seconds))
+    out.write('keys/sec: {:.0f}\n'.format(total / seconds if seconds else 0))
+
+
+def main(argv=None, out=sys.stdout):
+    """Validate files of hub keys and print a report
+
+    :returns: int, exit status. 1 if there were invalid keys
+    """
+    parser = argparse.ArgumentParser(description='Validate files of newline delimited hub keys')
+    parser.add_argument('paths', nargs='+', metavar='FILE',
+                        help="file of hub keys, gzip'd if it ends in .gz, or - for stdin")
+    parser.add_argument('-p', '--processes', type=int, default=None,
+                        help='number of worker processes, defaults to the number of CPUs')
+    parser.add_argument('-c', '--chunk-size', type=int, default=CHUNK_SIZE,
+                        help='number of lines sent to a process at a time')
+    parser.add_argument('-r', '--rejects', default='rejects.tsv',
+                        help='file for rejected lines and reasons, defaults to rejects.tsv')
+    parser.add_argument('--hub-id', action='append', dest='hub_ids', metavar='HUB_ID',
+                        help='hub_id that the keys must have, may be repeated. Defaults to the configured hub_id')
+    args = parser.parse_args(argv)
+    if args.processes is not None and args.processes < 1:
+        parser.error('--processes should be at least 1')
+    if args.chunk_size < 1:
+        parser.error('--chunk-size should be at least 1')
+
+    start = time.time()
+    with open(args.rejects, 'wb') as rejects:
+        counts = validate_files(args.paths, args.processes, args.chunk_size, rejects, args.hub_ids)
+    _report(counts, time.time() - start, out)
+
+    return 1 if counts[INVALID] else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
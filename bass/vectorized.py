@@ -0,0 +1,449 @@
+# -*- coding: utf-8 -*-
+
+# Copyright 2016 Open Permissions Platform Coalition
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License. You may obtain a copy of the License at
+# http://www.apache.org/licenses/LICENSE-2.0
+# Unless required by applicable law or agreed to in writing, software distributed under the License is
+# distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and limitations under the License.
+
+
+"""Validate arrays of hub keys with NumPy
+
+Requires numpy. The keys are checked a chunk at a time as a matrix of
+bytes, one row per key, using the same rules as PATTERN and PATTERN_S0:
+
+    mask, versions = validate(numpy_array_or_pandas_column)
+
+Arrays of str ("S") or unicode ("U") are used as they are. Other sequences,
+e.g. a pandas object column, are converted to an array of str first.
+"""
+
+import numpy as np
+
+from bass import hubkey
+
+CHUNK_SIZE = 100000
+
+_UPPER = 'ABCDEFGHIJKLMNOPQRSTUVWXYZ'
+_LOWER = 'abcdefghijklmnopqrstuvwxyz'
+_DIGITS = '0123456789'
+
+
+def _table(chars):
+    table = np.zeros(256, dtype=bool)
+    table[np.frombuffer(chars, dtype=np.uint8)] = True
+    return table
+
+
+_HEX_ANY_CASE = _table(_DIGITS + 'abcdefABCDEF')
+_DIGIT = _table(_DIGITS)
+_HOST_NAME = _table(_UPPER + _LOWER + _DIGITS + '-.')
+_PATH = _table(_UPPER + _LOWER + _DIGITS + '.-_~!$&\'()*+,;=:@%')
+
+_SLASH = ord('/')
+_DOT = ord('.')
+_HYPHEN = ord('-')
+_COLON = ord(':')
+_PERCENT = ord('%')
+_NEWLINE = ord('\n')
+
+
+def _as_bytes(keys):
+    """Convert an array of keys to a matrix of bytes
+
+    :returns: (uint8 array of shape (n, width), lengths, bool array of
+        keys that could be converted exactly)
+    """
+    array = keys.ravel()
+    n = len(array)
+    ok = np.ones(n, dtype=bool)
+
+    if array.dtype.kind not in 'SU':
+        array = array.astype(object)
+        strings = []
+        for i, key in enumerate(array):
+            if isinstance(key, unicode):
+                try:
+                    key = key.encode('ascii')
+                except UnicodeError:
+                    key = ''
+                    ok[i] = False
+            elif not isinstance(key, str):
+                key = ''
+                ok[i] = False
+            strings.append(key)
+
+        keys, array = strings, np.array(strings, dtype='S')
+
+    if array.dtype.kind == 'U':
+        codes = array.view(np.uint32).reshape(n, array.dtype.itemsize // 4)
+        ok &= (codes < 128).all(axis=1)
+        data = codes.astype(np.uint8)
+    else:
+        data = array.view(np.uint8).reshape(n, array.dtype.itemsize)
+
+    lengths = np.char.str_len(array).astype(np.intp)
+    if not isinstance(keys, np.ndarray):
+        # NumPy strings cannot end with NUL, so these keys were truncated
+        ok &= np.fromiter((len(k) if isinstance(k, basestring) else 0 for k in keys),
+                          dtype=np.intp, count=n) == lengths
+
+    return data, lengths, ok
+
+
+class _Segment(object):
+    """One segment of each key in a group
+
+    :param data: matrix of the segment's bytes, one row per key. The bytes
+        after a row's segment may be anything
+    :param lengths: length of each row's segment
+    """
+
+    def __init__(self, data, lengths):
+        self.data = data
+        self.lengths = lengths
+        self.positions = np.arange(data.shape[1])
+        self.inside = self.positions < lengths[:, None]
+
+    def distinct(self):
+        """Get the distinct segments, padded with NUL
+
+        :returns: (_Segment of the distinct segments, index of each row's
+            segment in it)
+        """
+        n, width = self.data.shape
+        data = self.data * self.inside
+        rows = np.hstack([data, self.lengths.astype('<u4').view(np.uint8).reshape(n, 4)])
+        _, first, inverse = np.unique(rows.view('V{}'.format(width + 4)).ravel(),
+                                      return_index=True, return_inverse=True)
+        return _Segment(data[first], self.lengths[first]), inverse
+
+    def all_in(self, table, inside):
+        return (table[self.data] | ~inside).all(axis=1)
+
+    def host(self):
+        """Check against RESOLVER_ID's host labels and optional port
+
+        The segments must be padded with NUL
+        """
+        data, positions, lengths = self.data, self.positions, self.lengths
+        rows = np.arange(len(data))
+
+        colons = data == _COLON
+        count = colons.sum(axis=1)
+        result = count <= 1
+
+        # Port
+        has_port = count == 1
+        name_end = np.where(has_port, np.argmax(colons, axis=1), lengths)
+        port_length = lengths - name_end - 1
+        result &= ~has_port | ((port_length >= 2) & (port_length <= 5))
+        result &= self.all_in(_DIGIT, (positions > name_end[:, None]) & self.inside)
+
+        # Host name: labels of 1 to 63 characters, separated by dots,
+        # which do not start or end with a hyphen
+        in_name = positions < name_end[:, None]
+        result &= name_end > 0
+        result &= self.all_in(_HOST_NAME, in_name)
+
+        for column in (0, np.maximum(name_end - 1, 0)):
+            edge = data[rows, column]
+            result &= (edge != _DOT) & (edge != _HYPHEN)
+
+        dot = data == _DOT
+        hyphen = data == _HYPHEN
+        pairs = dot[:, :-1] & (dot[:, 1:] | hyphen[:, 1:]) | hyphen[:, :-1] & dot[:, 1:]
+        result &= ~(pairs & in_name[:, 1:]).any(axis=1)
+
+        boundary = np.maximum.accumulate(np.where(dot, positions, -1), axis=1)
+        result &= (np.where(in_name, positions - boundary, 0).max(axis=1) <= 63)
+
+        return result
+
+
+class _Group(object):
+    """Rows of a chunk that have the same number of separators
+
+    :param data: matrix of bytes, one row per key
+    :param slashes: bool matrix, True at the separators
+    :param starts: start of each row's segments
+    :param ends: end of each row's segments
+    :param fixed: True if every row's segments start and end at the same
+        positions, so that segments can be sliced
+    """
+
+    def __init__(self, data, slashes, starts, ends, fixed=False):
+        self.data = data
+        self.slashes = slashes
+        self.starts = starts
+        self.ends = ends
+        self.fixed = fixed
+        if not fixed:
+            index = np.int32 if data.size < 2 ** 31 - data.shape[1] else np.intp
+            self._flat = np.concatenate([data.ravel(), np.zeros(data.shape[1], dtype=np.uint8)])
+            self._offsets = (np.arange(len(data), dtype=index) * data.shape[1])[:, None] + starts
+
+    def length(self, index):
+        return self.ends[:, index] - self.starts[:, index]
+
+    def segment(self, index, width=None):
+        """Get a segment of each row
+
+        :param index: the segment's index
+        :param width: number of columns, defaults to the longest segment.
+            Ignored if the group is fixed
+        """
+        lengths = self.length(index)
+        if self.fixed:
+            start = self.starts[0, index]
+            if not lengths[0]:
+                return _Segment(np.zeros((len(lengths), 1), dtype=np.uint8), lengths)
+            return _Segment(self.data[:, start:start + lengths[0]], lengths)
+
+        if width is None:
+            width = int(lengths.max()) if len(lengths) else 0
+        width = max(width, 1)
+        positions = np.arange(width, dtype=self._offsets.dtype)
+        starts = self.starts[:, index]
+        start = starts[0]
+        if start + width <= self.data.shape[1] and (starts == start).all():
+            # e.g. the host, which follows the protocol
+            return _Segment(self.data[:, start:start + width], lengths)
+        return _Segment(self._flat.take(self._offsets[:, index, None] + positions), lengths)
+
+    def characters(self, table):
+        """Check each segment's characters
+
+        :param table: the character tables of each segment, one after the
+            other. Separators and padding are allowed by every table
+        """
+        index = np.cumsum(self.slashes, axis=1, dtype=np.uint16)
+        index <<= 8
+        index |= self.data
+        return table.take(index).all(axis=1)
+
+    def literal(self, index, literals, ignore_case=False):
+        size = max(len(literal) for literal in literals)
+        segment = self.segment(index, size)
+        data = segment.data
+        if ignore_case:
+            data = np.where((data >= ord('A')) & (data <= ord('Z')), data + 32, data)
+
+        result = np.zeros(len(data), dtype=bool)
+        for literal in literals:
+            literal = str(literal.lower() if ignore_case else literal)
+            size = len(literal)
+            if size > data.shape[1]:
+                continue
+            expected = np.frombuffer(literal, dtype=np.uint8)
+            result |= (segment.lengths == size) & (data[:, :size] == expected).all(axis=1)
+
+        return result
+
+    def uuid(self, index):
+        """Check a segment against UUID"""
+        segment = self.segment(index)
+        data = segment.data
+        # Lower case hex digits, using uint8 wrap around
+        hex_digits = ((data - ord('0')) < 10) | ((data - ord('a')) < 6)
+        return ((segment.lengths > 0) & (segment.lengths <= 64) &
+                (hex_digits | ~segment.inside).all(axis=1))
+
+    def nul(self):
+        """Check for NUL characters, which the character tables allow"""
+        inside = np.arange(self.data.shape[1]) < self.ends[:, -1, None]
+        return ~((self.data == 0) & inside).any(axis=1)
+
+    def host(self, index):
+        """Check a segment against RESOLVER_ID
+
+        Keys usually share a few resolvers, so each distinct host is
+        checked once
+        """
+        hosts, inverse = self.segment(index).distinct()
+        return hosts.host()[inverse]
+
+    def percent_encoded(self):
+        """Check each "%" starts a percent encoded byte"""
+        result = np.ones(len(self.data), dtype=bool)
+        rows = np.nonzero((self.data == _PERCENT).any(axis=1))[0]
+        if not len(rows):
+            return result
+
+        data = self.data[rows]
+        encoded = np.zeros(data.shape, dtype=bool)
+        encoded[:, :-2] = _HEX_ANY_CASE[data[:, 1:-1]] & _HEX_ANY_CASE[data[:, 2:]]
+        result[rows] = ~((data == _PERCENT) & ~encoded).any(axis=1)
+        return result
+
+
+_ANY = np.ones(256, dtype=bool)
+_NONE = np.zeros(256, dtype=bool)
+
+
+def _tables(*tables):
+    result = np.vstack(tables) | _table('/\x00')
+    return result.ravel()
+
+
+# Character tables for each segment. Segments checked as literals or hosts
+# allow any character here
+_S0_TABLES = _tables(_ANY, _NONE, _ANY, _ANY, _ANY, _ANY, _PATH, _PATH, _PATH)
+
+
+def _check_s1(group):
+    result = group.length(1) == 0
+    result &= group.uuid(5)
+    result &= group.uuid(7)
+    result &= group.literal(3, [hubkey.SCHEMA])
+    result &= group.literal(0, ['https:', 'http:'])
+    result &= group.literal(4, [hubkey.PARTS['hub_id']])
+    result &= group.literal(6, hubkey.ENTITY_TYPES)
+    result &= group.host(2)
+    return result
+
+
+def _check_s0(group):
+    result = group.length(1) == 0
+    result &= group.length(6) > 0
+    result &= group.length(7) > 0
+    result &= group.length(8) > 0
+    result &= group.characters(_S0_TABLES)
+    result &= group.nul()
+    result &= group.percent_encoded()
+    result &= group.literal(3, ['s0'], ignore_case=True)
+    result &= group.literal(0, ['https:', 'http:'], ignore_case=True)
+    result &= group.literal(4, [hubkey.PARTS_S0['hub_id']], ignore_case=True)
+    result &= group.literal(5, ['creation', 'asset', 'offer'], ignore_case=True)
+    result &= group.host(2)
+    return result
+
+
+# Number of separators in a key and check for each built in schema
+_CHECKS = [('s1', 7, _check_s1), ('s0', 8, _check_s0)]
+
+
+def _validate_chunk(data, lengths, ok, valid, versions):
+    n = len(lengths)
+    if not n:
+        return
+
+    # "$" also matches before a trailing newline, which is replaced with
+    # padding
+    last = np.maximum(lengths - 1, 0)
+    newline = (lengths > 0) & (data[np.arange(n), last] == _NEWLINE)
+    if newline.any():
+        data = data.copy()
+        data[newline, last[newline]] = 0
+        lengths = lengths - newline
+
+    slashes = data == _SLASH
+    # Position of every separator, in row order
+    flat = np.flatnonzero(slashes)
+    separator_rows = flat // data.shape[1]
+    separator_columns = flat - separator_rows * data.shape[1]
+    counts = np.bincount(separator_rows, minlength=n)
+
+    for version, count, check in _CHECKS:
+        selected = ok & (counts == count)
+        if not selected.any():
+            continue
+
+        separators = separator_columns[selected[separator_rows]].reshape(-1, count)
+        for rows, group in _groups(data, lengths, slashes, separators, selected):
+            matched = check(group)
+            valid[rows] |= matched
+            versions[rows] = np.where(matched, version, versions[rows])
+
+
+# Number of distinct layouts, i.e. segment positions, that are checked by
+# slicing before the remaining rows are checked by gathering their segments
+MAX_LAYOUTS = 8
+# Number of rows a layout needs to be checked by slicing
+MIN_LAYOUT_ROWS = 64
+
+
+def _groups(data, lengths, slashes, separators, selected):
+    """Split the selected rows into groups by layout
+
+    Keys in a column usually share a resolver and hub and have 32 character
+    IDs, so they have only a few layouts. The most common layouts are
+    checked by slicing, and the other rows by gathering.
+
+    :param separators: positions of the selected rows' separators
+    :returns: generator of (row index, _Group)
+    """
+    rows = np.nonzero(selected)[0]
+    if len(rows) < len(selected):
+        data, lengths, slashes = data[rows], lengths[rows], slashes[rows]
+
+    starts = np.hstack([np.zeros((len(data), 1), dtype=np.intp), separators + 1])
+    ends = np.hstack([separators, lengths[:, None]])
+
+    layouts = ends.astype(np.uint16 if data.shape[1] < 2 ** 16 else np.intp)
+    _, inverse, counts = np.unique(layouts.view('V{}'.format(layouts.itemsize * layouts.shape[1])).ravel(),
+                                   return_inverse=True, return_counts=True)
+    if len(counts) == 1:
+        yield rows, _Group(data, slashes, starts, ends, fixed=True)
+        return
+
+    common = np.argsort(-counts, kind='mergesort')[:MAX_LAYOUTS]
+    remaining = np.ones(len(data), dtype=bool)
+    for layout in common[counts[common] >= MIN_LAYOUT_ROWS]:
+        index = np.nonzero(inverse == layout)[0]
+        yield rows[index], _Group(data[index], slashes[index], starts[index], ends[index], fixed=True)
+        remaining[index] = False
+
+    index = np.nonzero(remaining)[0]
+    if len(index):
+        yield rows[index], _Group(data[index], slashes[index], starts[index], ends[index])
+
+
+def validate(keys, chunk_size=CHUNK_SIZE):
+    """Test which values in an array could be hub keys
+
+    The result is the same as calling is_hub_key on each value.
+
+    :param keys: array or sequence of values, e.g. a pandas column
+    :param chunk_size: number of keys checked at once. Memory used is
+        proportional to chunk_size and the length of the longest key
+    :returns: (bool array, True where the value is a hub key, array of each
+        value's schema version, "" where the value is not a hub key)
+    """
+    if not isinstance(keys, np.ndarray):
+        keys = np.array(list(keys), dtype=object)
+
+    data, lengths, ok = _as_bytes(keys)
+    n = len(lengths)
+    valid = np.zeros(n, dtype=bool)
+    # Wide enough for the longest registered schema version
+    versions = np.zeros(n, dtype='S{}'.format(max([1] + [len(version) for version in hubkey.SCHEMAS])))
+
+    if hubkey._FAST_S1:
+        for start in xrange(0, n, chunk_size):
+            end = start + chunk_size
+            _validate_chunk(data[start:end], lengths[start:end], ok[start:end],
+                            valid[start:end], versions[start:end])
+        # Schemas registered with hubkey.register_schema are checked one
+        # key at a time
+        others = set(hubkey.SCHEMAS) - set(version for version, _, _ in _CHECKS)
+        remaining = np.nonzero(~valid)[0] if others else []
+    else:
+        # hub_id is a regex rather than a literal, so check one key at a time
+        remaining = xrange(n)
+
+    values = keys.ravel()
+    match = hubkey.matcher()
+    for i in remaining:
+        try:
+            schema, _ = match(values[i])
+        except TypeError:
+            continue
+        if schema:
+            valid[i] = True
+            versions[i] = schema.version
+
+    return valid, versions
+
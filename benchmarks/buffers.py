@@ -0,0 +1,46 @@
+# -*- coding: utf-8 -*-
+
+# Copyright 2016 Open Permissions Platform Coalition
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License. You may obtain a copy of the License at
+# http://www.apache.org/licenses/LICENSE-2.0
+# Unless required by applicable law or agreed to in writing, software distributed under the License is
+# distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and limitations under the License.
+
+"""Compare parsing keys received as bytearrays by decoding them and by
+parsing the bytes
+
+    python -m benchmarks.buffers
+"""
+import random
+import time
+
+from bass import buffers
+from bass.hubkey import parse_hub_key
+from benchmarks import workload
+
+N = 100000
+
+
+def decode_and_encode(message):
+    parsed = parse_hub_key(message.decode('utf-8'))
+    return dict((k, v.encode('utf-8')) for k, v in parsed.iteritems())
+
+
+def main():
+    rand = random.Random(0)
+    messages = [bytearray(k) for k in workload.keys(workload.s1_key, rand, N // 2) +
+                workload.keys(workload.s0_key, rand, N // 2)]
+
+    for label, parse in [('decode and encode', decode_and_encode),
+                         ('bytes', buffers.parse_hub_key),
+                         ('bytes, views', lambda m: buffers.parse_hub_key(m, views=True))]:
+        start = time.time()
+        for message in messages:
+            parse(message)
+        print('{:<18} {:>8.2f} us/key'.format(label, (time.time() - start) / N * 1e6))
+
+
+if __name__ == '__main__':
+    main()
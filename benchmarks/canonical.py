@@ -0,0 +1,48 @@
+# -*- coding: utf-8 -*-
+
+# Copyright 2016 Open Permissions Platform Coalition
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License. You may obtain a copy of the License at
+# http://www.apache.org/licenses/LICENSE-2.0
+# Unless required by applicable law or agreed to in writing, software distributed under the License is
+# distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and limitations under the License.
+
+"""Compare canonicalising s0 keys with bass.canonical and by joining the
+parts from parse_hub_key
+
+Half of the keys are already canonical.
+
+    python -m benchmarks.canonical
+"""
+import random
+import time
+from StringIO import StringIO
+
+from bass.canonical import canonicalise
+from bass.hubkey import SCHEMAS, SEPARATOR, parse_hub_key
+from benchmarks import workload
+
+N = 200000
+
+
+def parse_and_join(lines, out):
+    fields = SCHEMAS['s0'].fields
+    for line in lines:
+        parsed = parse_hub_key(line.rstrip('\n'))
+        out.write(SEPARATOR.join(parsed[f] for f in fields) + '\n')
+
+
+def main():
+    rand = random.Random(0)
+    keys = workload.keys(workload.s0_key, rand, N)
+    lines = [(k.lower() if rand.random() < 0.5 else k) + '\n' for k in keys]
+
+    for label, func in [('parse and join', parse_and_join), ('canonicalise', canonicalise)]:
+        start = time.time()
+        func(lines, StringIO())
+        print('{:<16} {:>8.2f} us/key'.format(label, (time.time() - start) / N * 1e6))
+
+
+if __name__ == '__main__':
+    main()
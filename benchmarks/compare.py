@@ -0,0 +1,43 @@
+# -*- coding: utf-8 -*-
+
+# Copyright 2016 Open Permissions Platform Coalition
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License. You may obtain a copy of the License at
+# http://www.apache.org/licenses/LICENSE-2.0
+# Unless required by applicable law or agreed to in writing, software distributed under the License is
+# distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and limitations under the License.
+
+"""Compare two benchmark suite results
+
+    python -m benchmarks.compare BEFORE.json AFTER.json
+"""
+import argparse
+import json
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Compare two benchmark suite results')
+    parser.add_argument('before')
+    parser.add_argument('after')
+    args = parser.parse_args(argv)
+
+    with open(args.before) as f:
+        before = json.load(f)['results']
+    with open(args.after) as f:
+        after = json.load(f)['results']
+
+    print('{:<26} {:>12} {:>12} {:>8} {:>10} {:>10}'.format(
+        '', 'before/sec', 'after/sec', 'speedup', 'p99 before', 'p99 after'))
+    for name in sorted(set(before) & set(after)):
+        old, new = before[name], after[name]
+        print('{:<26} {:>12.0f} {:>12.0f} {:>7.2f}x {:>10.2f} {:>10.2f}'.format(
+            name, old['ops_per_sec'], new['ops_per_sec'], new['ops_per_sec'] / old['ops_per_sec'],
+            old['latency_us']['p99'], new['latency_us']['p99']))
+
+    for name in sorted(set(before) ^ set(after)):
+        print('{:<26} only in {}'.format(name, 'before' if name in before else 'after'))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,37 @@
+# -*- coding: utf-8 -*-
+
+# Copyright 2016 Open Permissions Platform Coalition
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License. You may obtain a copy of the License at
+# http://www.apache.org/licenses/LICENSE-2.0
+# Unless required by applicable law or agreed to in writing, software distributed under the License is
+# distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and limitations under the License.
+
+"""Compare making entity IDs with uuid.uuid4, RandomIds and TimeOrderedIds
+
+    python -m benchmarks.entity_ids
+"""
+import timeit
+import uuid
+
+from bass.entity_ids import RandomIds, TimeOrderedIds
+
+N = 200000
+TAKE = 1000
+
+
+def main():
+    ids = RandomIds()
+    time_ordered_ids = TimeOrderedIds()
+    for label, func, per_call in [('uuid4().hex', lambda: uuid.uuid4().hex, 1),
+                                  ('RandomIds()', ids, 1),
+                                  ('RandomIds.take', lambda: ids.take(TAKE), TAKE),
+                                  ('TimeOrderedIds()', time_ordered_ids, 1),
+                                  ('TimeOrderedIds.take', lambda: time_ordered_ids.take(TAKE), TAKE)]:
+        seconds = min(timeit.repeat(func, number=N // per_call, repeat=3))
+        print('{:<20} {:>8.2f} us/id'.format(label, seconds / N * 1e6))
+
+
+if __name__ == '__main__':
+    main()
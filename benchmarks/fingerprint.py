@@ -0,0 +1,82 @@
+# -*- coding: utf-8 -*-
+
+# Copyright 2016 Open Permissions Platform Coalition
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License. You may obtain a copy of the License at
+# http://www.apache.org/licenses/LICENSE-2.0
+# Unless required by applicable law or agreed to in writing, software distributed under the License is
+# distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and limitations under the License.
+
+"""Compare joining two lists of hub keys by their parsed parts, by their
+canonical str keys and by their CanonicalKeys
+
+The keys are parsed once, then looked up LOOKUPS times, as a join-heavy
+job would. Each way is timed REPEAT times, alternately, and the best time
+is reported.
+
+    python -m benchmarks.fingerprint
+"""
+import random
+import time
+
+from bass.canonical import canonical_key, canonical_keys
+from bass.hubkey import parse_hub_keys
+from benchmarks import workload
+
+N = 100000
+LOOKUPS = 10
+REPEAT = 3
+
+
+def upper_s0(key):
+    """Get an s0 key with upper case parts, except the protocol and
+    entity_id, which are case sensitive"""
+    prefix, _, entity_id = key.rpartition('/')
+    if '/s0/' not in prefix.lower():
+        return key
+    return prefix.upper().replace('HTTPS', 'https') + '/' + entity_id
+
+
+def parts(parsed):
+    return tuple(sorted(parsed.iteritems()))
+
+
+def join(prepare, left, right):
+    """Time preparing and joining the keys
+
+    :returns: (seconds to prepare, seconds to join, number of matches)
+    """
+    start = time.time()
+    left_keys, right_keys = prepare(left), prepare(right)
+    prepared = time.time()
+    for _ in xrange(LOOKUPS):
+        index = set(left_keys)
+        matched = sum(1 for k in right_keys if k in index)
+    return prepared - start, time.time() - prepared, matched
+
+
+def main():
+    rand = random.Random(0)
+    left = workload.keys(workload.s1_key, rand, N // 2) + workload.keys(workload.s0_key, rand, N // 2)
+    right = [upper_s0(k) for k in left]
+    rand.shuffle(right)
+
+    ways = [('parsed parts', lambda keys: [parts(p) for p in parse_hub_keys(keys)]),
+            ('canonical str', lambda keys: [canonical_key(k) for k in keys]),
+            ('CanonicalKey', lambda keys: list(canonical_keys(keys)))]
+    best = {}
+    for _ in xrange(REPEAT):
+        for label, prepare in ways:
+            prepare_seconds, join_seconds, matched = join(prepare, left, right)
+            previous = best.get(label, (float('inf'), float('inf'), matched))
+            best[label] = min(previous[0], prepare_seconds), min(previous[1], join_seconds), matched
+
+    for label, _ in ways:
+        prepare_seconds, join_seconds, matched = best[label]
+        print('{:<14} {:>8.2f} us/key to prepare {:>8.2f} us/key to join, {} matched'.format(
+            label, prepare_seconds / (2 * N) * 1e6, join_seconds / (LOOKUPS * N) * 1e6, matched))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,47 @@
+# -*- coding: utf-8 -*-
+
+# Copyright 2016 Open Permissions Platform Coalition
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License. You may obtain a copy of the License at
+# http://www.apache.org/licenses/LICENSE-2.0
+# Unless required by applicable law or agreed to in writing, software distributed under the License is
+# distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and limitations under the License.
+
+"""Measure the time a new interpreter takes to import bass.hubkey
+
+bass.hubkey no longer imports tornado.options, and compiles its patterns
+when they are first used. "with tornado" shows the cost of importing
+tornado.options as well, as bass.hubkey used to.
+
+    python -m benchmarks.import_time
+"""
+import subprocess
+import sys
+import timeit
+
+REPEAT = 20
+STATEMENTS = [
+    ('python', 'pass'),
+    ('import bass.hubkey', 'import bass.hubkey'),
+    ('with tornado', 'import tornado.options; import bass.hubkey'),
+    ('import and parse', 'import bass.hubkey; bass.hubkey.parse_hub_key('
+                         '"https://openpermissions.org/s0/hub1/asset/maryevans/id/1")'),
+]
+
+
+def run(statement):
+    command = [sys.executable, '-c', statement]
+    return min(timeit.repeat(lambda: subprocess.check_call(command), number=1, repeat=REPEAT))
+
+
+def main():
+    baseline = run('pass')
+    for label, statement in STATEMENTS:
+        seconds = run(statement)
+        print('{:<20} {:>8.1f} ms {:>8.1f} ms over python'.format(
+            label, seconds * 1e3, (seconds - baseline) * 1e3))
+
+
+if __name__ == '__main__':
+    main()
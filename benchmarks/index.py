@@ -0,0 +1,68 @@
+# -*- coding: utf-8 -*-
+
+# Copyright 2016 Open Permissions Platform Coalition
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License. You may obtain a copy of the License at
+# http://www.apache.org/licenses/LICENSE-2.0
+# Unless required by applicable law or agreed to in writing, software distributed under the License is
+# distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and limitations under the License.
+
+"""Measure a HubKeyIndex's memory per key, and its queries against scanning
+a list of keys with parse_hub_key
+
+    python -m benchmarks.index
+"""
+import random
+import sys
+import time
+
+from bass.hubkey import ENTITY_TYPES, parse_hub_key
+from bass.index import HubKeyIndex
+from benchmarks import workload
+
+N = 200000
+RESOLVERS = 5
+REPOSITORIES = 50
+
+
+def corpus(rand, n):
+    resolvers = [workload.resolver(rand) for _ in xrange(RESOLVERS)]
+    repositories = [workload.hex_id(rand) for _ in xrange(REPOSITORIES)]
+    return ['/'.join([rand.choice(resolvers), 's1', workload.HUB_ID, rand.choice(repositories),
+                      rand.choice(ENTITY_TYPES), workload.hex_id(rand)]) for _ in xrange(n)]
+
+
+def size(node):
+    """Get the size of a tree of dicts and sets, and the strings in it"""
+    total = sys.getsizeof(node)
+    if isinstance(node, dict):
+        for part, child in node.iteritems():
+            total += sys.getsizeof(part) + size(child)
+    else:
+        total += sum(sys.getsizeof(key) for key in node)
+    return total
+
+
+def scan(keys, repository_id):
+    return [k for k in keys if parse_hub_key(k)['repository_id'] == repository_id]
+
+
+def main():
+    keys = corpus(random.Random(0), N)
+
+    start = time.time()
+    index = HubKeyIndex(keys)
+    print('bulk load {:>12.2f} us/key'.format((time.time() - start) / N * 1e6))
+    print('memory    {:>12.1f} bytes/key'.format(float(size(index._tree)) / N))
+
+    repository_id = parse_hub_key(keys[0])['repository_id']
+    for label, query in [('index', lambda: list(index.keys(repository_id=repository_id))),
+                         ('scan', lambda: scan(keys, repository_id))]:
+        start = time.time()
+        found = query()
+        print('{:<9} {:>12.2f} ms for {} keys'.format(label, (time.time() - start) * 1e3, len(found)))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,74 @@
+# -*- coding: utf-8 -*-
+
+# Copyright 2016 Open Permissions Platform Coalition
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License. You may obtain a copy of the License at
+# http://www.apache.org/licenses/LICENSE-2.0
+# Unless required by applicable law or agreed to in writing, software distributed under the License is
+# distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and limitations under the License.
+
+"""Compare the memory used by the parts of parsed hub keys, with and
+without interning
+
+The corpus is like a hub's: a few resolvers, tens of repositories and
+providers, and unique entity IDs. Parts are counted once per distinct
+object, so that shared strings are counted once.
+
+    python -m benchmarks.interning
+"""
+import random
+import sys
+import time
+
+from bass.hubkey import InternTable, ENTITY_TYPES, parse_hub_keys
+from benchmarks import workload
+
+N = 100000
+RESOLVERS = 5
+REPOSITORIES = 50
+PROVIDERS = 20
+S0_FRACTION = 0.3
+
+
+def corpus(rand, n):
+    resolvers = [workload.resolver(rand) for _ in xrange(RESOLVERS)]
+    repositories = [workload.hex_id(rand) for _ in xrange(REPOSITORIES)]
+    providers = [workload.path_part(rand) for _ in xrange(PROVIDERS)]
+    keys = []
+    for _ in xrange(n):
+        if rand.random() < S0_FRACTION:
+            parts = [rand.choice(resolvers), 's0', workload.HUB_ID, 'asset', rand.choice(providers),
+                     'id', workload.path_part(rand)]
+        else:
+            parts = [rand.choice(resolvers), 's1', workload.HUB_ID, rand.choice(repositories),
+                     rand.choice(ENTITY_TYPES), workload.hex_id(rand)]
+        keys.append('/'.join(parts))
+    return keys
+
+
+def parts_size(parsed):
+    seen = set()
+    total = 0
+    for values in parsed:
+        for value in values.itervalues():
+            if id(value) not in seen:
+                seen.add(id(value))
+                total += sys.getsizeof(value)
+    return total
+
+
+def main():
+    keys = corpus(random.Random(0), N)
+    for label, intern in [('plain', None), ('interned', InternTable())]:
+        start = time.time()
+        parsed = list(parse_hub_keys(keys, intern=intern))
+        seconds = time.time() - start
+        print('{:<10} {:>8.1f} bytes/key {:>8.2f} us/key'.format(
+            label, float(parts_size(parsed)) / N, seconds / N * 1e6))
+        if intern is not None:
+            print('{:<10} {}'.format('', intern.stats()))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,67 @@
+# -*- coding: utf-8 -*-
+
+# Copyright 2016 Open Permissions Platform Coalition
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License. You may obtain a copy of the License at
+# http://www.apache.org/licenses/LICENSE-2.0
+# Unless required by applicable law or agreed to in writing, software distributed under the License is
+# distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and limitations under the License.
+
+"""Measure how long validating a batch of keys blocks the IOLoop
+
+A callback reschedules itself while the keys are validated, and the longest
+gap between its calls is reported.
+
+    python -m benchmarks.ioloop
+"""
+import random
+import time
+
+from tornado import gen
+from tornado.ioloop import IOLoop
+
+from bass import batch
+from bass.hubkey import is_hub_key
+from benchmarks import workload
+
+N = 50000
+
+
+@gen.coroutine
+def synchronous(keys):
+    raise gen.Return([is_hub_key(k) for k in keys])
+
+
+@gen.coroutine
+def measure(validate, keys):
+    loop = IOLoop.current()
+    gaps = []
+    state = {'last': time.time(), 'running': True}
+
+    def tick():
+        now = time.time()
+        gaps.append(now - state['last'])
+        state['last'] = now
+        if state['running']:
+            loop.add_callback(tick)
+
+    loop.add_callback(tick)
+    start = time.time()
+    yield validate(keys)
+    seconds = time.time() - start
+    # Let tick see the end of a stall
+    yield gen.moment
+    state['running'] = False
+    raise gen.Return((seconds, max(gaps)))
+
+
+def main():
+    keys = workload.keys(workload.s1_key, random.Random(0), N)
+    for label, validate in [('synchronous', synchronous), ('is_hub_keys', batch.is_hub_keys)]:
+        seconds, gap = IOLoop.current().run_sync(lambda: measure(validate, keys))
+        print('{:<12} {:>8.1f} ms total {:>8.1f} ms longest stall'.format(label, seconds * 1e3, gap * 1e3))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,47 @@
+# -*- coding: utf-8 -*-
+
+# Copyright 2016 Open Permissions Platform Coalition
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License. You may obtain a copy of the License at
+# http://www.apache.org/licenses/LICENSE-2.0
+# Unless required by applicable law or agreed to in writing, software distributed under the License is
+# distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and limitations under the License.
+
+"""Compare the memory used by parsed hub keys held as dicts and as HubKeys
+
+Only the containers are measured; the component strings are the same
+objects in both representations.
+
+    python -m benchmarks.memory
+"""
+import sys
+
+from bass.hubkey import HubKey, generate_hub_key, parse_hub_key
+
+N = 100000
+
+
+def keys(n):
+    for _ in xrange(n):
+        yield generate_hub_key('openpermissions.org', 'hub1', '37cd1397e0814e989fa22da6b15fec60', 'asset')
+
+
+def dict_size(parsed):
+    return sys.getsizeof(parsed)
+
+
+def hub_key_size(parsed):
+    return sys.getsizeof(parsed) + sys.getsizeof(parsed.values())
+
+
+def main():
+    corpus = list(keys(N))
+    for label, parse, size in [('dict', parse_hub_key, dict_size),
+                               ('HubKey', HubKey.parse, hub_key_size)]:
+        total = sum(size(parse(k)) for k in corpus)
+        print('{:<8} {:>8.1f} bytes/key'.format(label, float(total) / N))
+
+
+if __name__ == '__main__':
+    main()
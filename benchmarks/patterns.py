@@ -0,0 +1,67 @@
+# -*- coding: utf-8 -*-
+
+# Copyright 2016 Open Permissions Platform Coalition
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License. You may obtain a copy of the License at
+# http://www.apache.org/licenses/LICENSE-2.0
+# Unless required by applicable law or agreed to in writing, software distributed under the License is
+# distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and limitations under the License.
+
+"""Compare raw pattern strings with the precompiled pattern registry
+
+The stdlib re cache is purged before every call to simulate a process where
+unrelated regexes keep evicting the hub key patterns.
+
+    python -m benchmarks.patterns
+"""
+import re
+import timeit
+
+from bass import hubkey
+
+S1_KEY = ('https://openpermissions.org/s1/hub1/37cd1397e0814e989fa22da6b15fec60/'
+          'asset/37cd1397e0814e989fa22da6b15fec60')
+S0_KEY = 'https://openpermissions.org/s0/hub1/asset/maryevans/maryevanspictureid/10413373'
+NUMBER = 2000
+
+
+def raw_parse(key):
+    re.purge()
+    match = re.match(hubkey.PATTERN, key)
+    if not match:
+        match = re.match(hubkey.PATTERN_S0, key)
+    return match
+
+
+def compiled_parse(key):
+    re.purge()
+    return hubkey.parse_hub_key(key)
+
+
+def raw_match_part(string, part):
+    re.purge()
+    return re.match('^(' + hubkey.PARTS[part] + ')$', string)
+
+
+def compiled_match_part(string, part):
+    re.purge()
+    return hubkey.match_part(string, part)
+
+
+def run(label, func, *args):
+    seconds = min(timeit.repeat(lambda: func(*args), number=NUMBER, repeat=3))
+    print('{:<32} {:>10.2f} us/call'.format(label, seconds / NUMBER * 1e6))
+
+
+def main():
+    run('parse s1 (raw)', raw_parse, S1_KEY)
+    run('parse s1 (compiled)', compiled_parse, S1_KEY)
+    run('parse s0 (raw)', raw_parse, S0_KEY)
+    run('parse s0 (compiled)', compiled_parse, S0_KEY)
+    run('match_part resolver (raw)', raw_match_part, 'https://openpermissions.org', 'resolver_id')
+    run('match_part resolver (compiled)', compiled_match_part, 'https://openpermissions.org', 'resolver_id')
+
+
+if __name__ == '__main__':
+    main()
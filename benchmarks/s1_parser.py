@@ -0,0 +1,54 @@
+# -*- coding: utf-8 -*-
+
+# Copyright 2016 Open Permissions Platform Coalition
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License. You may obtain a copy of the License at
+# http://www.apache.org/licenses/LICENSE-2.0
+# Unless required by applicable law or agreed to in writing, software distributed under the License is
+# distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and limitations under the License.
+
+"""Compare the split based s1 parser with PATTERN
+
+    python -m benchmarks.s1_parser
+"""
+import timeit
+
+from bass import hubkey
+
+KEYS = [
+    ('valid', 'https://openpermissions.org/s1/hub1/37cd1397e0814e989fa22da6b15fec60/'
+              'asset/37cd1397e0814e989fa22da6b15fec60'),
+    ('valid, long resolver', 'https://a.very.long.resolver.name.openpermissions.org:8080/s1/hub1/'
+                             '37cd1397e0814e989fa22da6b15fec60/agreement/37cd1397e0814e989fa22da6b15fec60'),
+    ('near miss', 'https://openpermissions.org/s1/hub1/37cd1397e0814e989fa22da6b15fec60/'
+                  'asset/37cd1397e0814e989fa22da6b15fec6X'),
+    ('s0', 'https://openpermissions.org/s0/hub1/asset/maryevans/maryevanspictureid/10413373'),
+    ('garbage', 'x' * 100),
+]
+NUMBER = 100000
+# The parsers are timed alternately, so that both see the same load
+REPEAT = 7
+
+
+def regex(key):
+    match = hubkey.COMPILED_PATTERN.match(key)
+    return match.groups() if match else None
+
+
+def run(funcs, key):
+    """Time each function, in microseconds per call"""
+    timers = [timeit.Timer(lambda func=func: func(key)) for func in funcs]
+    best = [min(seconds) for seconds in zip(*[[t.timeit(NUMBER) for t in timers] for _ in range(REPEAT)])]
+    return [seconds / NUMBER * 1e6 for seconds in best]
+
+
+def main():
+    print('{:<24} {:>10} {:>10} {:>8}'.format('', 'regex', 'split', 'speedup'))
+    for label, key in KEYS:
+        before, after = run([regex, hubkey._match_s1], key)
+        print('{:<24} {:>7.2f} us {:>7.2f} us {:>7.2f}x'.format(label, before, after, before / after))
+
+
+if __name__ == '__main__':
+    main()
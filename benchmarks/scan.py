@@ -0,0 +1,78 @@
+# -*- coding: utf-8 -*-
+
+# Copyright 2016 Open Permissions Platform Coalition
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License. You may obtain a copy of the License at
+# http://www.apache.org/licenses/LICENSE-2.0
+# Unless required by applicable law or agreed to in writing, software distributed under the License is
+# distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and limitations under the License.
+
+"""Compare finding hub keys in a log file with bass.scan and by checking
+each word of each line with is_hub_key
+
+    python -m benchmarks.scan [--lines N] [--processes N]
+"""
+import argparse
+import os
+import random
+import re
+import resource
+import tempfile
+import time
+
+from bass.hubkey import is_hub_key
+from bass.scan import scan_file
+from benchmarks import workload
+
+LINES = 500000
+_WORDS = re.compile(r'[^\s"\[\],{}]+')
+
+
+def write_log(f, rand, lines):
+    """Write a log with a hub key in about 7% of its lines"""
+    for i in xrange(lines):
+        r = rand.random()
+        if r < 0.05:
+            f.write('INFO request key={} status=200\n'.format(workload.s1_key(rand)))
+        elif r < 0.07:
+            f.write('{{"key": "{}"}}\n'.format(workload.s0_key(rand)))
+        else:
+            f.write('INFO GET /api/v1/thing?id={} took {}ms https://example.com/path\n'.format(
+                i, rand.randint(1, 999)))
+
+
+def by_word(path):
+    with open(path, 'rb') as f:
+        for line in f:
+            for word in _WORDS.findall(line):
+                if is_hub_key(word.partition('=')[2] or word):
+                    yield word
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--lines', type=int, default=LINES)
+    parser.add_argument('--processes', type=int, default=2)
+    args = parser.parse_args()
+
+    fd, path = tempfile.mkstemp()
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            write_log(f, random.Random(0), args.lines)
+        megabytes = os.path.getsize(path) / 1e6
+
+        for label, find in [('is_hub_key per word', by_word),
+                            ('scan_file', scan_file),
+                            ('scan_file parallel', lambda p: scan_file(p, args.processes))]:
+            start = time.time()
+            count = sum(1 for _ in find(path))
+            seconds = time.time() - start
+            print('{:<20} {:>8.1f} MB/s {:>8} keys, peak {} KB'.format(
+                label, megabytes / seconds, count, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss))
+    finally:
+        os.remove(path)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,206 @@
+# -*- coding: utf-8 -*-
+
+# Copyright 2016 Open Permissions Platform Coalition
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License. You may obtain a copy of the License at
+# http://www.apache.org/licenses/LICENSE-2.0
+# Unless required by applicable law or agreed to in writing, software distributed under the License is
+# distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and limitations under the License.
+
+"""Benchmark the hubkey hot paths
+
+    python -m benchmarks.suite [--output FILE] [--seed N] [--quick] [NAME ...]
+    make bench
+
+Each benchmark runs in its own process, so that its peak memory is its own.
+Calls are timed in batches of BATCH operations, or of one call if a call
+does more operations. The latency percentiles are
+those of the batches' mean latency per operation. The results are written as
+JSON, which can be compared with python -m benchmarks.compare.
+"""
+import argparse
+import json
+import multiprocessing
+import platform
+import random
+import resource
+import time
+from collections import OrderedDict
+
+import bass
+from bass import hubkey
+from benchmarks import workload
+
+SEED = 0
+# Number of distinct inputs per benchmark, cycled through by the calls
+INPUTS = 10000
+BATCH = 100
+BATCHES = 500
+QUICK_BATCHES = 20
+REPORTED_PERCENTILES = (50, 90, 99)
+RESOLVER = 'https://openpermissions.org'
+REPOSITORY_ID = '37cd1397e0814e989fa22da6b15fec60'
+BULK_SIZE = 1000
+
+
+def _parse(key):
+    try:
+        hubkey.parse_hub_key(key)
+    except ValueError:
+        pass
+
+
+def _match_part(args):
+    try:
+        hubkey.match_part(*args)
+    except ValueError:
+        pass
+
+
+def _is_hub_key_multi_hub(key, hub_ids=frozenset(workload.HUB_IDS)):
+    hubkey.is_hub_key(key, hub_ids)
+
+
+def _generate(resolver_id):
+    hubkey.generate_hub_key(resolver_id, workload.HUB_ID, REPOSITORY_ID, 'asset')
+
+
+def _match_part_inputs(rand, n):
+    parts = []
+    for key in workload.keys(workload.s1_key, rand, n):
+        parsed = hubkey.parse_hub_key(key)
+        part = rand.choice(list(hubkey.PARTS))
+        parts.append((parsed[part], part))
+    return parts
+
+
+def _bulk_generate(factory):
+    factory.batch(BULK_SIZE)
+
+
+# name: (function, function making the inputs from random.Random and n,
+#        operations per call)
+BENCHMARKS = OrderedDict([
+    ('parse_hub_key_s1', (_parse, lambda r, n: workload.keys(workload.s1_key, r, n), 1)),
+    ('parse_hub_key_s0', (_parse, lambda r, n: workload.keys(workload.s0_key, r, n), 1)),
+    ('parse_hub_key_near_miss', (_parse, lambda r, n: workload.keys(workload.near_miss_key, r, n), 1)),
+    ('is_hub_key_s1', (hubkey.is_hub_key, lambda r, n: workload.keys(workload.s1_key, r, n), 1)),
+    ('is_hub_key_s0', (hubkey.is_hub_key, lambda r, n: workload.keys(workload.s0_key, r, n), 1)),
+    ('is_hub_key_near_miss', (hubkey.is_hub_key, lambda r, n: workload.keys(workload.near_miss_key, r, n), 1)),
+    ('is_hub_key_multi_hub', (_is_hub_key_multi_hub, lambda r, n: workload.keys(workload.multi_hub_s1_key, r, n), 1)),
+    ('is_hub_key_garbage', (hubkey.is_hub_key, lambda r, n: workload.keys(workload.garbage_key, r, n), 1)),
+    ('match_part', (_match_part, _match_part_inputs, 1)),
+    ('generate_hub_key', (_generate, lambda r, n: workload.keys(workload.resolver, r, n), 1)),
+    ('generate_hub_key_idna', (_generate, lambda r, n: workload.keys(workload.idna_resolver, r, n), 1)),
+    ('generate_bulk', (_bulk_generate, lambda r, n: [hubkey.HubKeyFactory(
+        RESOLVER, workload.HUB_ID, REPOSITORY_ID, 'asset')], BULK_SIZE)),
+])
+
+
+def percentile(values, p):
+    """Get a percentile of sorted values, by the nearest rank method"""
+    index = max(0, int(round(p / 100.0 * len(values))) - 1)
+    return values[index]
+
+
+def run(name, seed=SEED, batches=BATCHES):
+    """Run a benchmark
+
+    :param name: str, a key in BENCHMARKS
+    :param seed: int, seed for the workload
+    :param batches: int, number of timed batches
+    :returns: dict of results
+    """
+    func, make_inputs, per_call = BENCHMARKS[name]
+    inputs = make_inputs(random.Random(seed), INPUTS)
+    count = len(inputs)
+
+    # Warm up caches and the first inputs
+    for value in inputs[:BATCH]:
+        func(value)
+
+    calls = max(1, BATCH // per_call)
+    latencies = []
+    position = 0
+    for _ in xrange(batches):
+        batch = [inputs[(position + i) % count] for i in xrange(calls)]
+        position += calls
+        start = time.time()
+        for value in batch:
+            func(value)
+        latencies.append((time.time() - start) / (calls * per_call))
+
+    total = sum(latencies)
+    latencies.sort()
+    result = OrderedDict([
+        ('operations', batches * calls * per_call),
+        ('ops_per_sec', 1 / (total / batches) if total else None),
+    ])
+    result['latency_us'] = OrderedDict(
+        [('p{}'.format(p), percentile(latencies, p) * 1e6) for p in REPORTED_PERCENTILES] +
+        [('max', latencies[-1] * 1e6)])
+    result['peak_memory_kb'] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return result
+
+
+def _run(args):
+    return run(*args)
+
+
+def run_isolated(name, seed=SEED, batches=BATCHES):
+    """Run a benchmark in a new process"""
+    pool = multiprocessing.Pool(1)
+    try:
+        return pool.apply(_run, ((name, seed, batches),))
+    finally:
+        pool.terminate()
+        pool.join()
+
+
+def metadata(seed, batches):
+    return OrderedDict([
+        ('time', time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime())),
+        ('bass_version', bass.__version__),
+        ('python', platform.python_version()),
+        ('implementation', platform.python_implementation()),
+        ('platform', platform.platform()),
+        ('seed', seed),
+        ('batch', BATCH),
+        ('batches', batches),
+        ('inputs', INPUTS),
+    ])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark the hubkey hot paths')
+    parser.add_argument('names', nargs='*', metavar='NAME', help='benchmarks to run, defaults to all')
+    parser.add_argument('-o', '--output', help='file for the JSON results')
+    parser.add_argument('-s', '--seed', type=int, default=SEED, help='seed for the synthetic workloads')
+    parser.add_argument('-q', '--quick', action='store_true', help='run fewer batches')
+    args = parser.parse_args(argv)
+
+    names = args.names or list(BENCHMARKS)
+    unknown = set(names) - set(BENCHMARKS)
+    if unknown:
+        parser.error('unknown benchmarks: {}'.format(', '.join(sorted(unknown))))
+
+    batches = QUICK_BATCHES if args.quick else BATCHES
+    results = OrderedDict()
+    print('{:<26} {:>12} {:>9} {:>9} {:>9} {:>10}'.format('', 'ops/sec', 'p50 us', 'p90 us', 'p99 us', 'peak KB'))
+    for name in names:
+        result = results[name] = run_isolated(name, args.seed, batches)
+        latency = result['latency_us']
+        print('{:<26} {:>12.0f} {:>9.2f} {:>9.2f} {:>9.2f} {:>10}'.format(
+            name, result['ops_per_sec'], latency['p50'], latency['p90'], latency['p99'],
+            result['peak_memory_kb']))
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(OrderedDict([('metadata', metadata(args.seed, batches)), ('results', results)]),
+                      f, indent=2, separators=(',', ': '))
+            f.write('\n')
+
+
+if __name__ == '__main__':
+    main()
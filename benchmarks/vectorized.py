@@ -0,0 +1,63 @@
+# -*- coding: utf-8 -*-
+
+# Copyright 2016 Open Permissions Platform Coalition
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License. You may obtain a copy of the License at
+# http://www.apache.org/licenses/LICENSE-2.0
+# Unless required by applicable law or agreed to in writing, software distributed under the License is
+# distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and limitations under the License.
+
+"""Compare vectorized.validate with calling is_hub_key on each key
+
+The keys have random resolvers, so that they have many layouts.
+
+    python -m benchmarks.vectorized
+"""
+import random
+import time
+
+import numpy as np
+
+from bass import vectorized
+from bass.hubkey import is_hub_key
+from benchmarks import workload
+
+WORKLOADS = [
+    ('s1', workload.s1_key, 100000),
+    ('s0', workload.s0_key, 100000),
+    ('near miss', workload.near_miss_key, 10000),
+    ('garbage', workload.garbage_key, 10000),
+]
+# The validators are timed alternately, so that both see the same load
+REPEAT = 5
+
+
+def per_key(keys):
+    return [is_hub_key(key) for key in keys]
+
+
+def main():
+    rand = random.Random(0)
+    keys = []
+    for _, make, n in WORKLOADS:
+        keys.extend(workload.keys(make, rand, n))
+    rand.shuffle(keys)
+    array = np.array(keys, dtype='S')
+
+    funcs = [('is_hub_key', lambda: per_key(keys)), ('vectorized', lambda: vectorized.validate(array))]
+    best = [float('inf')] * len(funcs)
+    for _ in xrange(REPEAT):
+        for i, (_, func) in enumerate(funcs):
+            start = time.time()
+            func()
+            best[i] = min(best[i], time.time() - start)
+
+    assert list(vectorized.validate(array)[0]) == per_key(keys)
+    print('{} keys'.format(len(keys)))
+    for (label, _), seconds in zip(funcs, best):
+        print('{:<12} {:>6.2f} s {:>6.2f} us/key'.format(label, seconds, seconds / len(keys) * 1e6))
+
+
+if __name__ == '__main__':
+    main()
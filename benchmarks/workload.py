@@ -0,0 +1,81 @@
+# -*- coding: utf-8 -*-
+
+# Copyright 2016 Open Permissions Platform Coalition
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License. You may obtain a copy of the License at
+# http://www.apache.org/licenses/LICENSE-2.0
+# Unless required by applicable law or agreed to in writing, software distributed under the License is
+# distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and limitations under the License.
+
+"""Synthetic hub key workloads
+
+Every function takes a random.Random, so that a workload is the same for
+the same seed.
+"""
+import string
+
+from bass.hubkey import ENTITY_TYPES
+
+HUB_ID = 'hub1'
+HUB_IDS = ['hub{}'.format(i) for i in range(1, 11)]
+_LABELS = ['openpermissions', 'resolver', 'api', 'copyrighthub', 'example', 'test-1', 'a']
+_TLDS = ['org', 'com', 'co.uk', 'io']
+_IDNA_LABELS = [u'bücher', u'münchen', u'例え', u'пример', u'café', u'ελληνικά']
+_S0_TYPES = ['creation', 'asset', 'offer']
+_PATH_CHARACTERS = string.ascii_letters + string.digits + '.-_~'
+
+
+def hex_id(rand, length=32):
+    return '%0*x' % (length, rand.getrandbits(length * 4))
+
+
+def resolver(rand):
+    labels = [rand.choice(_LABELS) for _ in xrange(rand.randint(1, 3))]
+    port = ':{}'.format(rand.randint(10, 65535)) if rand.random() < 0.2 else ''
+    return 'https://{}.{}{}'.format('.'.join(labels), rand.choice(_TLDS), port)
+
+
+def idna_resolver(rand):
+    labels = [rand.choice(_IDNA_LABELS) + unicode(rand.randint(0, 9999)), rand.choice(_LABELS)]
+    return u'https://{}.{}'.format(u'.'.join(labels), rand.choice(_TLDS))
+
+
+def path_part(rand):
+    return ''.join(rand.choice(_PATH_CHARACTERS) for _ in xrange(rand.randint(1, 20)))
+
+
+def s1_key(rand, hub_id=HUB_ID):
+    return '/'.join([resolver(rand), 's1', hub_id, hex_id(rand), rand.choice(ENTITY_TYPES), hex_id(rand)])
+
+
+def multi_hub_s1_key(rand):
+    """An s1 key for one of HUB_IDS"""
+    return s1_key(rand, rand.choice(HUB_IDS))
+
+
+def s0_key(rand):
+    return '/'.join([resolver(rand), rand.choice(['s0', 'S0']), HUB_ID, rand.choice(_S0_TYPES),
+                     path_part(rand), path_part(rand), path_part(rand)])
+
+
+def near_miss_key(rand):
+    """A valid key with one character replaced"""
+    key = s1_key(rand) if rand.random() < 0.5 else s0_key(rand)
+    i = rand.randrange(len(key))
+    return key[:i] + rand.choice(' X#/?') + key[i + 1:]
+
+
+def garbage_key(rand):
+    return ''.join(chr(rand.randint(32, 126)) for _ in xrange(rand.randint(0, 150)))
+
+
+def keys(make, rand, n):
+    """Make n keys
+
+    :param make: function taking a random.Random, e.g. s1_key
+    :param rand: random.Random
+    :param n: int, number of keys
+    :returns: list
+    """
+    return [make(rand) for _ in xrange(n)]
@@ -27,6 +27,10 @@ setup(
     author_email='support@openpermissions.org',
     url='https://github.com/openpermissions/bass',
     packages=['bass'],
+    extras_require={
+        'tornado': ['tornado'],
+        'vectorized': ['numpy'],
+    },
     license='Apache 2.0',
     classifiers=(
         'Development Status :: 5 - Production/Stable',
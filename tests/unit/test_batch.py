@@ -0,0 +1,108 @@
+# -*- coding: utf-8 -*-
+
+# Copyright 2016 Open Permissions Platform Coalition
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License. You may obtain a copy of the License at
+# http://www.apache.org/licenses/LICENSE-2.0
+# Unless required by applicable law or agreed to in writing, software distributed under the License is
+# distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and limitations under the License.
+"""Unit tests for module batch
+"""
+import pytest
+
+pytest.importorskip('tornado')
+
+from tornado import gen
+from tornado.concurrent import dummy_executor
+from tornado.ioloop import IOLoop
+
+from bass import batch
+from bass.hubkey import HubKeyFactory, is_hub_key, parse_hub_key
+
+S1_KEY = 'https://openpermissions.org/s1/hub1/37cd1397e0814e989fa22da6b15fec60/asset/{}'
+KEYS = [S1_KEY.format(i) for i in range(5)] + ['not a key', None, S1_KEY.format('x y')]
+FACTORY = HubKeyFactory('https://openpermissions.org', 'hub1', '37cd1397e0814e989fa22da6b15fec60', 'asset')
+
+
+def run(func, *args, **kwargs):
+    return IOLoop.current().run_sync(lambda: func(*args, **kwargs))
+
+
+@pytest.mark.parametrize('executor', [None, dummy_executor])
+def test_is_hub_keys(executor):
+    assert run(batch.is_hub_keys, KEYS, chunk_size=3, executor=executor) == [is_hub_key(k) for k in KEYS]
+
+
+def test_is_hub_keys_with_hub_id():
+    keys = [S1_KEY.format(1), S1_KEY.format(1).replace('hub1', 'hub2')]
+
+    assert run(batch.is_hub_keys, keys, hub_id='hub2') == [False, True]
+
+
+@pytest.mark.parametrize('executor', [None, dummy_executor])
+def test_parse_hub_keys(executor):
+    keys = KEYS[:5]
+
+    assert run(batch.parse_hub_keys, keys, chunk_size=2, executor=executor) == [parse_hub_key(k) for k in keys]
+
+
+def test_parse_hub_keys_skip():
+    assert len(run(batch.parse_hub_keys, KEYS, on_error='skip', chunk_size=3)) == 5
+
+
+@pytest.mark.parametrize('executor', [None, dummy_executor])
+def test_parse_hub_keys_raises(executor):
+    with pytest.raises(ValueError):
+        run(batch.parse_hub_keys, KEYS, chunk_size=3, executor=executor)
+
+
+def test_parse_hub_keys_invalid_on_error():
+    with pytest.raises(ValueError):
+        batch.parse_hub_keys(KEYS, on_error='ignore')
+
+
+@pytest.mark.parametrize('executor', [None, dummy_executor])
+def test_generate_hub_keys(executor):
+    keys = run(batch.generate_hub_keys, FACTORY, 7, chunk_size=3, executor=executor)
+
+    assert len(keys) == len(set(keys)) == 7
+    assert all(is_hub_key(k) for k in keys)
+
+
+def test_generate_no_hub_keys():
+    assert run(batch.generate_hub_keys, FACTORY, 0) == []
+
+
+def test_chunks():
+    @gen.coroutine
+    def chunks():
+        sizes = []
+        for future in batch.is_hub_key_chunks(KEYS, chunk_size=3):
+            sizes.append(len((yield future)))
+        raise gen.Return(sizes)
+
+    assert run(chunks) == [3, 3, 2]
+
+
+def test_yields_to_ioloop_between_chunks():
+    calls = []
+
+    def is_hub_key_chunk(keys, hub_id):
+        calls.append('chunk')
+        return [True] * len(keys)
+
+    @gen.coroutine
+    def other():
+        for _ in range(3):
+            calls.append('other')
+            yield gen.moment
+
+    @gen.coroutine
+    def both():
+        yield [batch._gather(batch._futures(is_hub_key_chunk, [(KEYS[:3], None)] * 3)), other()]
+
+    run(both)
+
+    first, last = calls.index('chunk'), len(calls) - 1 - calls[::-1].index('chunk')
+    assert 'other' in calls[first:last]
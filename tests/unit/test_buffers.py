@@ -0,0 +1,113 @@
+# -*- coding: utf-8 -*-
+
+# Copyright 2016 Open Permissions Platform Coalition
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License. You may obtain a copy of the License at
+# http://www.apache.org/licenses/LICENSE-2.0
+# Unless required by applicable law or agreed to in writing, software distributed under the License is
+# distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and limitations under the License.
+"""Unit tests for module buffers
+"""
+import mmap
+
+import pytest
+
+from bass import buffers, hubkey
+from tests.unit.test_hubkey import FIXTURE_S1_KEYS, PARSE_KEYS
+
+S1_KEY = 'https://openpermissions.org/s1/hub1/37cd1397e0814e989fa22da6b15fec60/asset/37cd1397e0814e989fa22da6b15fec60'
+S0_KEY = 'https://openPerMissIoNS.org/S0/hUb1/creATion/4CoRnERs/4CoRnersPicTureID/ID-10413373'
+KEYS = [k for k in FIXTURE_S1_KEYS + PARSE_KEYS if type(k) is str] + [
+    S1_KEY + '\n', S0_KEY, S0_KEY.lower(), 'not a key', '']
+BYTES_TYPES = [str, bytearray, buffer, memoryview]
+
+
+@pytest.mark.parametrize('key', KEYS)
+@pytest.mark.parametrize('bytes_type', BYTES_TYPES)
+def test_is_hub_key(key, bytes_type):
+    assert buffers.is_hub_key(bytes_type(key)) == hubkey.is_hub_key(key)
+
+
+@pytest.mark.parametrize('key', [k for k in KEYS if hubkey.is_hub_key(k)])
+@pytest.mark.parametrize('bytes_type', BYTES_TYPES)
+@pytest.mark.parametrize('views', [False, True])
+def test_parse_hub_key(key, bytes_type, views):
+    parsed = buffers.parse_hub_key(bytes_type(key), views=views)
+
+    values = dict((k, v.tobytes() if views else v) for k, v in parsed.items())
+    assert values == hubkey.parse_hub_key(key)
+    assert all(isinstance(v, memoryview if views else str) for v in parsed.values())
+
+
+def test_parse_hub_key_views_share_the_key():
+    key = bytearray(S0_KEY)
+    parsed = buffers.parse_hub_key(key, views=True)
+    key[-1] = ord('4')
+
+    assert parsed['entity_id'].tobytes() == 'ID-10413374'
+    assert parsed['resolver_id'].tobytes() == 'https://openpermissions.org'
+
+
+def test_parse_hub_key_mmap():
+    data = mmap.mmap(-1, len(S0_KEY))
+    data.write(S0_KEY)
+
+    assert buffers.parse_hub_key(data) == hubkey.parse_hub_key(S0_KEY)
+    assert buffers.is_hub_key(data)
+
+
+def test_parse_hub_key_with_hub_id():
+    key = bytearray(S1_KEY.replace('hub1', 'hub2'))
+
+    assert buffers.parse_hub_key(key, hub_id=['hub1', 'hub2'])['hub_id'] == 'hub2'
+    assert buffers.is_hub_key(key, hub_id='hub2')
+    assert not buffers.is_hub_key(key)
+
+
+@pytest.mark.parametrize('key', KEYS + [S1_KEY.replace('hub1', 'hub2'), S0_KEY.replace('hUb1', 'HUB2')])
+def test_is_hub_key_with_hub_ids(key):
+    hub_ids = ['hub{}'.format(i) for i in range(10)]
+
+    assert buffers.is_hub_key(bytearray(key), hub_id=hub_ids) == hubkey.is_hub_key(key, hub_id=hub_ids)
+
+
+def test_one_schema_is_matched():
+    hub_ids = ['hub{}'.format(i) for i in range(10)]
+
+    assert hubkey.candidate_schemas(bytearray(S1_KEY), hub_ids) == (hubkey._hub_schemas(hub_ids).schemas['hub1']['s1'],)
+    assert hubkey.candidate_schemas(bytearray(S0_KEY), None) == (hubkey.SCHEMAS['s0'],)
+    assert hubkey.candidate_schemas(bytearray(S1_KEY.replace('/s1/', '/s9/')), None) == ()
+    assert hubkey.candidate_schemas(bytearray('not a key'), hub_ids) == ()
+
+
+@pytest.mark.parametrize('key', [bytearray('not a key'), None, bytearray(S1_KEY.replace('asset', 'thing'))])
+def test_parse_hub_key_invalid(key):
+    with pytest.raises(ValueError):
+        buffers.parse_hub_key(key)
+
+
+def test_unicode_is_not_bytes():
+    assert not buffers.is_hub_key(unicode(S1_KEY))
+    assert not buffers.is_hub_key(1234)
+    with pytest.raises(TypeError):
+        buffers.parse_hub_key(unicode(S1_KEY), views=True)
+
+
+@pytest.mark.parametrize('bytes_type', BYTES_TYPES)
+def test_generate_hub_key(bytes_type):
+    key = buffers.generate_hub_key(bytes_type('openpermissions.org'), bytes_type('hub1'),
+                                   bytes_type('37cd1397e0814e989fa22da6b15fec60'), bytes_type('asset'),
+                                   bytes_type('0123456789abcdef'))
+
+    assert type(key) is str
+    assert key == hubkey.generate_hub_key('openpermissions.org', 'hub1', '37cd1397e0814e989fa22da6b15fec60',
+                                          'asset', '0123456789abcdef')
+
+
+def test_generate_hub_key_new_entity_id():
+    key = buffers.generate_hub_key(bytearray('https://openpermissions.org'), 'hub1',
+                                   '37cd1397e0814e989fa22da6b15fec60', 'asset', time_ordered=True)
+
+    assert type(key) is str
+    assert hubkey.HubKey.parse(key).timestamp()
@@ -0,0 +1,120 @@
+# -*- coding: utf-8 -*-
+
+# Copyright 2016 Open Permissions Platform Coalition
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License. You may obtain a copy of the License at
+# http://www.apache.org/licenses/LICENSE-2.0
+# Unless required by applicable law or agreed to in writing, software distributed under the License is
+# distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and limitations under the License.
+"""Unit tests for module cache
+"""
+import threading
+
+import pytest
+
+from bass.cache import HubKeyCache
+from bass.hubkey import parse_hub_key
+
+S1_KEY = 'https://openpermissions.org/s1/hub1/37cd1397e0814e989fa22da6b15fec60/asset/37cd1397e0814e989fa22da6b15fec60'
+S0_KEY = 'https://openPerMissIoNS.org/S0/hUb1/creATion/4CoRnERs/4CoRnersPicTureID/ID-10413373'
+
+
+@pytest.mark.parametrize('key', [S1_KEY, S0_KEY])
+def test_parse_hub_key_same_as_uncached(key):
+    cache = HubKeyCache()
+    assert cache.parse_hub_key(key) == parse_hub_key(key)
+    assert cache.parse_hub_key(key) == parse_hub_key(key)
+
+
+def test_parse_hub_key_returns_copy():
+    cache = HubKeyCache()
+    cache.parse_hub_key(S1_KEY).pop('entity_id')
+
+    assert cache.parse_hub_key(S1_KEY) == parse_hub_key(S1_KEY)
+
+
+def test_parse_invalid_hub_key():
+    cache = HubKeyCache()
+    for _ in range(2):
+        with pytest.raises(ValueError):
+            cache.parse_hub_key('1234')
+
+    assert cache.stats()['hits'] == 1
+
+
+def test_parse_none():
+    with pytest.raises(ValueError):
+        HubKeyCache().parse_hub_key(None)
+
+
+@pytest.mark.parametrize('value,expected', [
+    (S1_KEY, True),
+    (S0_KEY, True),
+    ('1234', False),
+    (None, False),
+    (1234, False),
+    ([S1_KEY], False),
+])
+def test_is_hub_key(value, expected):
+    cache = HubKeyCache()
+    assert cache.is_hub_key(value) is expected
+    assert cache.is_hub_key(value) is expected
+
+
+def test_stats():
+    cache = HubKeyCache(maxsize=2)
+    cache.is_hub_key(S1_KEY)
+    cache.is_hub_key(S1_KEY)
+    cache.is_hub_key(S0_KEY)
+    cache.is_hub_key('1234')
+
+    assert cache.stats() == {'hits': 1, 'misses': 3, 'evictions': 1, 'size': 2, 'maxsize': 2}
+
+
+def test_least_recently_used_is_evicted():
+    cache = HubKeyCache(maxsize=2)
+    cache.is_hub_key(S1_KEY)
+    cache.is_hub_key(S0_KEY)
+    cache.is_hub_key(S1_KEY)
+    cache.is_hub_key('1234')
+    cache.is_hub_key(S1_KEY)
+
+    assert cache.stats()['hits'] == 2
+    cache.is_hub_key(S0_KEY)
+    assert cache.stats()['misses'] == 4
+
+
+def test_clear():
+    cache = HubKeyCache()
+    cache.is_hub_key(S1_KEY)
+    cache.clear()
+
+    assert cache.stats() == {'hits': 0, 'misses': 0, 'evictions': 0, 'size': 0, 'maxsize': 1024}
+
+
+def test_invalid_maxsize():
+    with pytest.raises(ValueError):
+        HubKeyCache(maxsize=0)
+
+
+def test_threads():
+    cache = HubKeyCache(maxsize=8)
+    keys = [S1_KEY[:-2] + '{:02x}'.format(i) for i in range(16)]
+    errors = []
+
+    def work():
+        for key in keys * 50:
+            if cache.parse_hub_key(key)['entity_id'] != key[-32:]:
+                errors.append(key)
+
+    threads = [threading.Thread(target=work) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    stats = cache.stats()
+    assert not errors
+    assert stats['hits'] + stats['misses'] == 4 * 50 * 16
+    assert stats['size'] == 8
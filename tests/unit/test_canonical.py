@@ -0,0 +1,187 @@
+# -*- coding: utf-8 -*-
+
+# Copyright 2016 Open Permissions Platform Coalition
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License. You may obtain a copy of the License at
+# http://www.apache.org/licenses/LICENSE-2.0
+# Unless required by applicable law or agreed to in writing, software distributed under the License is
+# distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and limitations under the License.
+"""Unit tests for module canonical
+"""
+import gzip
+import pickle
+from StringIO import StringIO
+
+import pytest
+
+from bass.canonical import (CHANGED, INVALID, NOT_S0, UNCHANGED, CanonicalKey, canonical_key, canonical_keys,
+                            canonical_s0, canonicalise, fingerprints, key_fingerprint, main)
+from bass.hubkey import SCHEMAS, SEPARATOR, HubKey, parse_hub_key
+
+S0_KEY = 'https://openPerMissIoNS.org/S0/hUb1/creATion/4CoRnERs/4CoRnersPicTureID/ID-10413373'
+CANONICAL_S0_KEY = 'https://openpermissions.org/s0/hub1/creation/4corners/4cornerspictureid/ID-10413373'
+S1_KEY = 'https://openpermissions.org/s1/hub1/37cd1397e0814e989fa22da6b15fec60/asset/37cd1397e0814e989fa22da6b15fec60'
+LINES = [
+    S0_KEY + '\n',
+    CANONICAL_S0_KEY + '\r\n',
+    S1_KEY + '\n',
+    'not a key\n',
+    'https://openpermissions.org/S0/hub2/asset/a/b/c\n',
+    S0_KEY,
+]
+
+
+def canonical(key):
+    parsed = parse_hub_key(key)
+    return SEPARATOR.join(parsed[f] for f in SCHEMAS['s0'].fields)
+
+
+@pytest.mark.parametrize('key', [
+    S0_KEY,
+    CANONICAL_S0_KEY,
+    'HTTPS://OPENPERMISSIONS.ORG:8080/S0/HUB1/ASSET/MARYEVANS/ID/AbC',
+    'https://openpermissions.org/s0/hub1/offer/maryevans/id/%4A',
+])
+def test_canonical_s0(key):
+    assert canonical_s0(key) == canonical(key)
+
+
+def test_canonical_s0_returns_canonical_key():
+    assert canonical_s0(CANONICAL_S0_KEY) is CANONICAL_S0_KEY
+
+
+@pytest.mark.parametrize('key', [S1_KEY, 'not a key', None, 1234, S0_KEY.replace('hUb1', 'hub2')])
+def test_canonical_s0_invalid(key):
+    with pytest.raises(ValueError):
+        canonical_s0(key)
+
+
+def test_canonicalise():
+    out = StringIO()
+
+    counts = canonicalise(LINES, out, chunk_size=4)
+
+    assert out.getvalue().splitlines(True) == [
+        CANONICAL_S0_KEY + '\n',
+        CANONICAL_S0_KEY + '\r\n',
+        S1_KEY + '\n',
+        'not a key\n',
+        'https://openpermissions.org/S0/hub2/asset/a/b/c\n',
+        CANONICAL_S0_KEY,
+    ]
+    assert counts == {CHANGED: 2, UNCHANGED: 1, NOT_S0: 1, INVALID: 2}
+
+
+def test_canonicalise_with_hub_id():
+    out = StringIO()
+
+    counts = canonicalise(LINES, out, hub_id=['hub1', 'hub2'])
+
+    assert out.getvalue().splitlines(True)[4] == 'https://openpermissions.org/s0/hub2/asset/a/b/c\n'
+    assert counts == {CHANGED: 3, UNCHANGED: 1, NOT_S0: 1, INVALID: 1}
+
+
+def test_main(tmpdir):
+    paths = [tmpdir.join('keys.txt'), tmpdir.join('keys.txt.gz')]
+    paths[0].write(''.join(LINES[:3]))
+    with gzip.open(str(paths[1]), 'wb') as f:
+        f.write(S0_KEY + '\n')
+    output = tmpdir.join('canonical.txt')
+    err = StringIO()
+
+    assert main([str(p) for p in paths] + ['-o', str(output)], err=err) == 0
+
+    assert output.read('rb').splitlines(True) == [CANONICAL_S0_KEY + '\n', CANONICAL_S0_KEY + '\r\n', S1_KEY + '\n',
+                                                  CANONICAL_S0_KEY + '\n']
+    assert 'changed: 2\n' in err.getvalue()
+    assert 'unchanged: 1\n' in err.getvalue()
+
+
+def test_main_hub_id(tmpdir):
+    path = tmpdir.join('keys.txt')
+    path.write(S0_KEY.replace('hUb1', 'HUB2') + '\n')
+    output = tmpdir.join('canonical.txt')
+    err = StringIO()
+
+    assert main([str(path), '-o', str(output), '--hub-id', 'hub2'], err=err) == 0
+
+    assert output.read('rb') == CANONICAL_S0_KEY.replace('hub1', 'hub2') + '\n'
+    assert 'changed: 1\n' in err.getvalue()
+
+
+@pytest.mark.parametrize('key', [
+    S0_KEY,
+    CANONICAL_S0_KEY,
+    S1_KEY,
+    S1_KEY + '\n',
+    unicode(S1_KEY),
+    unicode(S0_KEY),
+])
+def test_canonical_key(key):
+    canonical = canonical_key(key)
+
+    assert canonical == str(HubKey.parse(key))
+    assert type(canonical) is str
+
+
+def test_canonical_key_with_hub_id():
+    key = S1_KEY.replace('hub1', 'hub2')
+
+    assert canonical_key(key, hub_id=['hub1', 'hub2']) == key
+    with pytest.raises(ValueError):
+        canonical_key(key)
+
+
+@pytest.mark.parametrize('key', ['not a key', None, S1_KEY.replace('asset', 'thing')])
+def test_canonical_key_invalid(key):
+    with pytest.raises(ValueError):
+        canonical_key(key)
+
+
+def test_canonical_key_equality():
+    keys = [CanonicalKey.parse(S0_KEY), CanonicalKey.parse(CANONICAL_S0_KEY), CanonicalKey(CANONICAL_S0_KEY)]
+
+    assert keys[0] == keys[1] == keys[2]
+    assert not keys[0] != keys[1]
+    assert len(set(keys)) == 1
+    assert keys[0].fingerprint == key_fingerprint(CANONICAL_S0_KEY)
+    assert hash(keys[0]) == hash(keys[0].fingerprint)
+    assert str(keys[0]) == CANONICAL_S0_KEY
+    assert CanonicalKey.parse(S1_KEY) != keys[0]
+    assert keys[0] != CANONICAL_S0_KEY
+
+
+def test_canonical_key_compares_keys_with_the_same_fingerprint():
+    assert CanonicalKey(S1_KEY, fingerprint=1) != CanonicalKey(CANONICAL_S0_KEY, fingerprint=1)
+
+
+def test_fingerprint_is_64_bits():
+    assert 0 <= key_fingerprint(S1_KEY) < 2 ** 64
+    assert key_fingerprint(S1_KEY) != key_fingerprint(CANONICAL_S0_KEY)
+
+
+def test_canonical_key_pickle():
+    key = CanonicalKey.parse(S0_KEY)
+
+    assert pickle.loads(pickle.dumps(key)) == key
+
+
+def test_canonical_keys():
+    keys = [S0_KEY, S1_KEY, CANONICAL_S0_KEY]
+
+    assert list(canonical_keys(keys)) == [CanonicalKey.parse(k) for k in keys]
+    assert list(fingerprints(keys)) == [CanonicalKey.parse(k).fingerprint for k in keys]
+
+
+def test_fingerprints_on_error():
+    keys = [S1_KEY, 'not a key', None, 1234]
+
+    assert list(fingerprints(keys, on_error='skip')) == [key_fingerprint(S1_KEY)]
+    results = list(fingerprints(keys, on_error='yield_error'))
+    assert results[0] == key_fingerprint(S1_KEY)
+    assert [type(r) for r in results[1:]] == [ValueError, ValueError, TypeError]
+    with pytest.raises(ValueError):
+        list(fingerprints(keys))
+    with pytest.raises(ValueError):
+        fingerprints(keys, on_error='ignore')
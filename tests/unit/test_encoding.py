@@ -0,0 +1,163 @@
+# -*- coding: utf-8 -*-
+
+# Copyright 2016 Open Permissions Platform Coalition
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License. You may obtain a copy of the License at
+# http://www.apache.org/licenses/LICENSE-2.0
+# Unless required by applicable law or agreed to in writing, software distributed under the License is
+# distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and limitations under the License.
+"""Unit tests for module encoding
+"""
+import mmap
+
+import pytest
+
+from bass.encoding import HubKeyCodec, S1_RECORD, STRING_RECORD
+from bass.hubkey import is_hub_key
+from tests.unit.test_hubkey import FIXTURE_S1_KEYS, PARSE_KEYS
+
+S1_KEY = 'https://openpermissions.org/s1/hub1/37cd1397e0814e989fa22da6b15fec60/asset/37cd1397e0814e989fa22da6b15fec60'
+S0_KEY = 'https://openPerMissIoNS.org/S0/hUb1/creATion/4CoRnERs/4CoRnersPicTureID/ID-10413373'
+KEYS = [k for k in FIXTURE_S1_KEYS + PARSE_KEYS if is_hub_key(k)] + [
+    'http://localhost:8000/s1/hub1/0123456789abcdef0123456789abcdef/agreement/fedcba9876543210fedcba9876543210',
+    'https://openpermissions.org/s1/hub1/1/offer/37cd1397e0814e989fa22da6b15fec60',
+    S1_KEY + '\n',
+    unicode(S1_KEY),
+]
+
+
+@pytest.mark.parametrize('key', KEYS)
+def test_round_trip(key):
+    codec = HubKeyCodec()
+
+    assert codec.decode(codec.encode(key)) == key
+
+
+def test_s1_record():
+    record = HubKeyCodec().encode(S1_KEY)
+
+    assert len(record) == 38
+    assert ord(record[0]) == S1_RECORD
+
+
+@pytest.mark.parametrize('key', [
+    S0_KEY,
+    'https://openpermissions.org/s1/hub1/1/offer/37cd1397e0814e989fa22da6b15fec60',
+    S1_KEY + '\n',
+])
+def test_string_record(key):
+    record = HubKeyCodec().encode(key)
+
+    assert ord(record[0]) == STRING_RECORD
+    assert record.endswith(key)
+
+
+def test_interned_codes():
+    codec = HubKeyCodec()
+    codec.encode(S1_KEY)
+    codec.encode(S1_KEY.replace('openpermissions.org', 'example.com'))
+    codec.encode(S1_KEY)
+
+    assert codec.vocabulary == {
+        'resolvers': ['https://openpermissions.org', 'https://example.com'],
+        'hub_ids': ['hub1']
+    }
+
+
+def test_decode_with_vocabulary():
+    codec = HubKeyCodec()
+    data = codec.encode_many(KEYS)
+
+    assert list(HubKeyCodec(**codec.vocabulary).decode_many(data)) == [str(k) for k in KEYS]
+
+
+@pytest.mark.parametrize('wrap', [bytearray, str, buffer])
+def test_decode_many(wrap):
+    codec = HubKeyCodec()
+    data = wrap(codec.encode_many(KEYS))
+
+    assert list(codec.decode_many(data)) == KEYS
+
+
+def test_decode_many_mmap(tmpdir):
+    codec = HubKeyCodec()
+    path = tmpdir.join('keys.bin')
+    path.write(str(codec.encode_many(KEYS)), 'wb')
+
+    with open(str(path), 'rb') as f:
+        data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        assert list(codec.decode_many(data)) == KEYS
+        data.close()
+
+
+def test_encode_many_appends():
+    codec = HubKeyCodec()
+    out = bytearray('x')
+
+    assert codec.encode_many([S1_KEY], out) is out
+    assert list(codec.decode_many(out, offset=1)) == [S1_KEY]
+
+
+def test_encode_many_same_as_encode():
+    keys = KEYS * 100
+    codec = HubKeyCodec()
+    expected = ''.join(codec.encode(k) for k in keys)
+
+    assert HubKeyCodec().encode_many(keys) == expected
+
+
+def test_encode_many_invalid_key():
+    codec = HubKeyCodec()
+    out = bytearray()
+
+    with pytest.raises(ValueError):
+        codec.encode_many([S1_KEY, S0_KEY, 'not a key', S1_KEY], out)
+    assert out == codec.encode(S1_KEY) + codec.encode(S0_KEY)
+
+
+def test_decode_from():
+    codec = HubKeyCodec()
+    data = codec.encode_many([S1_KEY, S0_KEY])
+
+    key, offset = codec.decode_from(data)
+    assert key == S1_KEY
+    assert codec.decode_from(data, offset) == (S0_KEY, len(data))
+
+
+@pytest.mark.parametrize('hub_id', ['hub2', ['hub1', 'hub2']])
+def test_encode_with_hub_id(hub_id):
+    keys = [S1_KEY.replace('/hub1/', '/hub2/'), S0_KEY.replace('/hUb1/', '/HUB2/')]
+    codec = HubKeyCodec(hub_id=hub_id)
+
+    assert [codec.decode(codec.encode(k)) for k in keys] == keys
+    assert list(codec.decode_many(codec.encode_many(keys))) == keys
+    assert codec.vocabulary['hub_ids'] == ['hub2']
+    with pytest.raises(ValueError):
+        HubKeyCodec().encode(keys[0])
+
+
+@pytest.mark.parametrize('key', [None, 'not a key', 1234])
+def test_encode_invalid_key(key):
+    with pytest.raises((ValueError, TypeError)):
+        HubKeyCodec().encode(key)
+
+
+@pytest.mark.parametrize('record', [
+    '',
+    '\x00',
+    '\x03' + 'x' * 40,
+    HubKeyCodec().encode(S1_KEY)[:-1],
+    HubKeyCodec().encode(S0_KEY)[:-1],
+    HubKeyCodec().encode(S1_KEY) + 'x',
+])
+def test_decode_invalid_record(record):
+    with pytest.raises(ValueError):
+        HubKeyCodec().decode(record)
+
+
+def test_decode_unknown_code():
+    record = HubKeyCodec().encode(S1_KEY)
+
+    with pytest.raises(ValueError):
+        HubKeyCodec().decode(record)
@@ -0,0 +1,194 @@
+# -*- coding: utf-8 -*-
+
+# Copyright 2016 Open Permissions Platform Coalition
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License. You may obtain a copy of the License at
+# http://www.apache.org/licenses/LICENSE-2.0
+# Unless required by applicable law or agreed to in writing, software distributed under the License is
+# distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and limitations under the License.
+"""Unit tests for module entity_ids
+"""
+import os
+import re
+import threading
+import time
+import uuid
+
+import pytest
+
+from bass.entity_ids import RandomIds, TimeOrderedIds, _PerProcess, timestamp
+from bass.hubkey import HubKey, HubKeyFactory, generate_hub_key, match_part, parse_hub_key
+
+HEX_ID = re.compile(r'[0-9a-f]{32}\Z')
+
+
+def test_ids_are_uuid4_hex():
+    ids = RandomIds(block_size=4)
+
+    for _ in range(10):
+        entity_id = ids()
+        assert HEX_ID.match(entity_id)
+        match_part(entity_id, 'entity_id')
+        assert uuid.UUID(entity_id).version == 4
+        assert uuid.UUID(entity_id).variant == uuid.RFC_4122
+
+
+def test_ids_are_unique():
+    ids = RandomIds(block_size=10)
+
+    made = [ids() for _ in range(25)] + ids.take(25)
+
+    assert len(set(made)) == 50
+
+
+def test_take():
+    ids = RandomIds(block_size=10)
+
+    assert ids.take(0) == []
+    assert len(ids.take(25)) == 25
+    assert all(HEX_ID.match(i) for i in ids.take(5))
+
+
+def test_thread_safe():
+    ids = RandomIds(block_size=16)
+    made = []
+
+    def make():
+        made.extend([ids() for _ in range(500)] + ids.take(100))
+
+    threads = [threading.Thread(target=make) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(made) == len(set(made)) == 2400
+
+
+def test_fork_safe():
+    ids = RandomIds()
+    ids()
+    read, write = os.pipe()
+
+    pid = os.fork()
+    if pid == 0:
+        try:
+            os.write(write, ''.join(ids.take(10)))
+        finally:
+            os._exit(0)
+
+    os.close(write)
+    os.waitpid(pid, 0)
+    data = os.read(read, 320)
+    os.close(read)
+    child = [data[i:i + 32] for i in range(0, len(data), 32)]
+
+    assert len(child) == 10
+    assert not set(child) & set(ids.take(10))
+
+
+def test_per_process_value(monkeypatch):
+    values = _PerProcess(object)
+    value = values.get()
+
+    assert values.get() is value
+
+    monkeypatch.setattr(os, 'getpid', lambda: -1)
+    child = values.get()
+    assert child is not value
+    assert values.get() is child
+    assert values._values == {-1: child}
+
+
+def test_per_process_value_after_fork_is_shared_by_threads(monkeypatch):
+    def factory():
+        # Let the other threads make their values too
+        time.sleep(0.01)
+        return object()
+
+    values = _PerProcess(factory)
+    monkeypatch.setattr(os, 'getpid', lambda: -1)
+    got = []
+    threads = [threading.Thread(target=lambda: got.append(values.get())) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(got) == 4
+    assert len(set(map(id, got))) == 1
+
+
+def test_first_calls_keep_the_lock():
+    ids = RandomIds()
+    lock, _ = ids._state.get()
+    ids()
+
+    assert ids._state.get()[0] is lock
+
+
+def test_time_ordered_ids():
+    ids = TimeOrderedIds()
+    before = time.time()
+
+    made = [ids() for _ in range(100)] + ids.take(100)
+
+    assert made == sorted(made)
+    assert len(set(made)) == 200
+    for entity_id in made:
+        assert HEX_ID.match(entity_id)
+        match_part(entity_id, 'entity_id')
+        assert uuid.UUID(entity_id).version == 7
+        assert uuid.UUID(entity_id).variant == uuid.RFC_4122
+        assert before - 0.001 <= timestamp(entity_id) <= time.time()
+
+
+def test_time_ordered_ids_same_millisecond():
+    ids = TimeOrderedIds(clock=lambda: 1476784800.1234)
+
+    made = ids.take(3)
+
+    assert [i[:16] for i in made] == ['0157d73bc17b7000', '0157d73bc17b7001', '0157d73bc17b7002']
+    assert timestamp(made[0]) == 1476784800.123
+
+
+def test_time_ordered_ids_counter_overflow():
+    ids = TimeOrderedIds(clock=lambda: 1476784800.1234)
+
+    made = ids.take(0x1002)
+
+    assert made == sorted(made)
+    assert made[-1][:16] == '0157d73bc17c7001'
+    assert timestamp(made[-1]) == 1476784800.124
+
+
+def test_time_ordered_ids_clock_goes_back():
+    times = iter([1476784800.2, 1476784800.1])
+    ids = TimeOrderedIds(clock=lambda: next(times))
+
+    first, second = ids(), ids()
+
+    assert first < second
+    assert timestamp(second) == 1476784800.2
+
+
+@pytest.mark.parametrize('entity_id', [
+    RandomIds()(),
+    '0157d6c6ba227000',
+    'x' * 12 + '7' + 'a' * 19,
+    None,
+])
+def test_timestamp_invalid(entity_id):
+    with pytest.raises(ValueError):
+        timestamp(entity_id)
+
+
+def test_generate_time_ordered_hub_keys():
+    factory = HubKeyFactory('https://openpermissions.org', 'hub1', '37cd1397e0814e989fa22da6b15fec60', 'asset',
+                            time_ordered=True)
+    keys = [generate_hub_key('https://openpermissions.org', 'hub1', '37cd1397e0814e989fa22da6b15fec60', 'asset',
+                             time_ordered=True), factory.new()] + factory.batch(5)
+
+    assert keys == sorted(keys)
+    assert HubKey.parse(keys[0]).timestamp() == timestamp(parse_hub_key(keys[0])['entity_id'])
@@ -0,0 +1,102 @@
+# -*- coding: utf-8 -*-
+
+# Copyright 2016 Open Permissions Platform Coalition
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License. You may obtain a copy of the License at
+# http://www.apache.org/licenses/LICENSE-2.0
+# Unless required by applicable law or agreed to in writing, software distributed under the License is
+# distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and limitations under the License.
+"""Unit tests for module generate
+"""
+from StringIO import StringIO
+
+import pytest
+
+from bass.generate import blocks, generate, main
+from bass.hubkey import DEFAULT_HUB_ID, HubKeyFactory, configure, get_hub_id, parse_hub_key
+
+ARGS = ['--resolver', 'https://openpermissions.org', '--hub', 'hub1',
+        '--repository', '37cd1397e0814e989fa22da6b15fec60']
+
+
+def test_blocks():
+    assert list(blocks(25, 10)) == [10, 10, 5]
+    assert list(blocks(20, 10)) == [10, 10]
+    assert list(blocks(0, 10)) == []
+
+
+@pytest.mark.parametrize('processes', [1, 2])
+def test_generate(processes):
+    factory = HubKeyFactory('https://openpermissions.org', 'hub1', '37cd1397e0814e989fa22da6b15fec60', 'offer')
+    out = StringIO()
+
+    generate(factory, 25, out, processes, block_size=10)
+
+    keys = out.getvalue().split('\n')
+    assert keys.pop() == ''
+    assert len(set(keys)) == 25
+    for key in keys:
+        assert key.startswith(factory.prefix)
+        assert parse_hub_key(key)['entity_type'] == 'offer'
+
+
+def test_main_stdout():
+    out = StringIO()
+    err = StringIO()
+
+    assert main(ARGS + ['-n', '3'], out=out, err=err) == 0
+
+    keys = out.getvalue().splitlines()
+    assert len(keys) == 3
+    assert parse_hub_key(keys[0])['entity_type'] == 'asset'
+    assert 'keys/sec: ' in err.getvalue()
+
+
+def test_main_output_file(tmpdir):
+    path = tmpdir.join('keys.txt')
+
+    assert main(ARGS + ['-n', '12', '-b', '5', '-o', str(path), '-p', '2'], err=StringIO()) == 0
+
+    assert len(set(path.readlines())) == 12
+
+
+def test_main_time_ordered():
+    out = StringIO()
+
+    assert main(ARGS + ['-n', '5', '--time-ordered'], out=out, err=StringIO()) == 0
+
+    keys = out.getvalue().splitlines()
+    assert keys == sorted(keys)
+    assert all(parse_hub_key(k)['entity_id'][12] == '7' for k in keys)
+
+
+def test_main_other_hub():
+    out = StringIO()
+
+    try:
+        assert main(ARGS + ['-n', '3', '--hub', 'HUB2'], out=out, err=StringIO()) == 0
+        assert get_hub_id() == 'hub2'
+    finally:
+        configure(DEFAULT_HUB_ID)
+
+    keys = out.getvalue().splitlines()
+    assert len(keys) == 3
+    assert all(parse_hub_key(k, hub_id='hub2')['hub_id'] == 'hub2' for k in keys)
+
+
+@pytest.mark.parametrize('args', [
+    ['--hub', ''],
+    ['--hub', 'hub/2'],
+    ['--hub', 'hub 2'],
+    ['--repository', 'not hex'],
+    ['--type', 'thing'],
+    ['-n', '-1'],
+    ['-p', '0'],
+])
+def test_main_invalid_arguments(args):
+    try:
+        with pytest.raises(SystemExit):
+            main(ARGS + args, out=StringIO(), err=StringIO())
+    finally:
+        configure(DEFAULT_HUB_ID)
@@ -9,11 +9,17 @@
 # See the License for the specific language governing permissions and limitations under the License.
 """Unit tests for module create_ids
 """
+import subprocess
+import sys
 from itertools import product
+from urllib import quote
 
 from mock import patch
+from tornado.options import OptionParser
 
+from bass import hubkey
 from bass.hubkey import *
+from bass.hubkey import _match, _match_s1, _normalise_hub_id, _normalise_resolver_id
 import pytest
 
 # This is not exhaustive, add more examples as they arise
@@ -316,3 +322,701 @@ def test_generate_key_with_invalid_hub_id():
     error_msg = '{} should match {}'.format('hub_id', 'hub1')
     assert exc.value.message == error_msg
 
+
+def test_compiled_parts_cover_all_parts():
+    assert COMPILED_PARTS.keys() == PARTS.keys()
+
+
+def test_compiled_patterns_match_raw_patterns():
+    assert COMPILED_PATTERN.pattern == PATTERN
+    assert COMPILED_PATTERN_S0.pattern == PATTERN_S0
+
+
+def test_schemas_use_compiled_patterns():
+    assert hubkey.SCHEMAS['s1'].pattern is COMPILED_PATTERN
+    assert hubkey.SCHEMAS['s0'].pattern is COMPILED_PATTERN_S0
+
+
+PARSE_KEYS = [
+    'https://openpermissions.org/s1/hub1/37cd1397e0814e989fa22da6b15fec60/asset/37cd1397e0814e989fa22da6b15fec60',
+    'https://openPerMissIoNS.org/S0/hUb1/creATion/4CoRnERs/4CoRnersPicTureID/ID-10413373',
+    'https://openpermissions.org/s0/hub1/offer/maryevans/maryevansofferid/001',
+]
+
+
+def test_parse_hub_keys_same_as_parse_hub_key():
+    assert list(parse_hub_keys(PARSE_KEYS)) == [parse_hub_key(k) for k in PARSE_KEYS]
+
+
+def test_parse_hub_keys_is_lazy():
+    def keys():
+        yield PARSE_KEYS[0]
+        raise AssertionError('consumed too far')
+
+    results = parse_hub_keys(keys())
+    assert next(results) == parse_hub_key(PARSE_KEYS[0])
+
+
+def test_parse_hub_keys_raise():
+    results = parse_hub_keys([PARSE_KEYS[0], '1234', PARSE_KEYS[1]])
+    next(results)
+    with pytest.raises(ValueError):
+        next(results)
+
+
+def test_parse_hub_keys_skip():
+    results = list(parse_hub_keys(['1234', PARSE_KEYS[0], None, 1234], on_error='skip'))
+    assert results == [parse_hub_key(PARSE_KEYS[0])]
+
+
+def test_parse_hub_keys_yield_error():
+    results = list(parse_hub_keys(['1234', PARSE_KEYS[0], None, 1234], on_error='yield_error'))
+    assert isinstance(results[0], ValueError)
+    assert results[1] == parse_hub_key(PARSE_KEYS[0])
+    assert isinstance(results[2], ValueError)
+    assert isinstance(results[3], TypeError)
+
+
+def test_map_hub_keys():
+    keys = [PARSE_KEYS[0], 'not a key', None, 1234]
+
+    results = list(map_hub_keys(lambda key, schema, values: (key, schema.version), keys, 'yield_error'))
+
+    assert results[0] == (PARSE_KEYS[0], 's1')
+    assert [type(r) for r in results[1:]] == [ValueError, ValueError, TypeError]
+    assert list(map_hub_keys(lambda key, schema, values: values, keys, 'skip')) == [_match(PARSE_KEYS[0])[1]]
+
+
+def test_parse_hub_keys_invalid_on_error():
+    with pytest.raises(ValueError):
+        parse_hub_keys(PARSE_KEYS, on_error='ignore')
+
+
+def test_hub_key_factory_new():
+    factory = HubKeyFactory(u'测试', 'HUB1', '37cd1397e0814e989fa22da6b15fec60', 'offer')
+    key = factory.new()
+    parsed = parse_hub_key(key)
+    parsed.pop('entity_id')
+
+    assert parsed == {
+        'resolver_id': 'https://xn--0zwm56d',
+        'hub_id': 'hub1',
+        'schema_version': SCHEMA,
+        'repository_id': '37cd1397e0814e989fa22da6b15fec60',
+        'entity_type': 'offer',
+    }
+
+
+def test_hub_key_factory_same_as_generate_hub_key():
+    args = ('https://stage.openpermissions.org', 'hub1', '37cd1397e0814e989fa22da6b15fec60', 'agreement')
+    entity_id = '37cd1397e0814e989fa22da6b15fec6b'
+
+    assert HubKeyFactory(*args).new(entity_id) == generate_hub_key(*args, entity_id=entity_id)
+
+
+def test_hub_key_factory_invalid_entity_id():
+    factory = HubKeyFactory('openpermissions.org', 'hub1', '37cd1397e0814e989fa22da6b15fec60', 'asset')
+    with pytest.raises(ValueError):
+        factory.new('invalidentityid')
+
+
+@pytest.mark.parametrize('part,value', [
+    ('hub_id', 'invalid'),
+    ('repository_id', 'invalid'),
+    ('entity_type', 'assets'),
+])
+def test_hub_key_factory_invalid_prefix(part, value):
+    args = {
+        'resolver_id': 'openpermissions.org',
+        'hub_id': 'hub1',
+        'repository_id': '37cd1397e0814e989fa22da6b15fec60',
+        'entity_type': 'asset'
+    }
+    args[part] = value
+    with pytest.raises(ValueError) as exc:
+        HubKeyFactory(**args)
+
+    assert exc.value.message == '{} should match {}'.format(part, PARTS[part])
+
+
+def test_hub_key_factory_batch():
+    factory = HubKeyFactory('openpermissions.org', 'hub1', '37cd1397e0814e989fa22da6b15fec60', 'asset')
+    keys = factory.batch(100)
+
+    assert len(set(keys)) == 100
+    assert all(is_hub_key(k) and k.startswith(factory.prefix) for k in keys)
+
+
+@pytest.mark.parametrize('key', PARSE_KEYS)
+def test_hub_key_to_dict_same_as_parse_hub_key(key):
+    assert HubKey.parse(key).to_dict() == parse_hub_key(key)
+    assert dict(HubKey.parse(key)) == parse_hub_key(key)
+
+
+@pytest.mark.parametrize('key', PARSE_KEYS)
+def test_hub_key_str_round_trip(key):
+    hub_key = HubKey.parse(key)
+    assert HubKey.parse(str(hub_key)) == hub_key
+
+
+def test_hub_key_str_s1():
+    assert str(HubKey.parse(PARSE_KEYS[0])) == PARSE_KEYS[0]
+
+
+def test_hub_key_access():
+    hub_key = HubKey.parse(PARSE_KEYS[1])
+    assert hub_key.organisation_id == '4corners'
+    assert hub_key['entity_id'] == 'ID-10413373'
+    assert hub_key.get('repository_id') is None
+    assert 'id_type' in hub_key
+    with pytest.raises(AttributeError):
+        hub_key.repository_id
+    with pytest.raises(KeyError):
+        hub_key['repository_id']
+
+
+def test_hub_key_immutable():
+    hub_key = HubKey.parse(PARSE_KEYS[0])
+    with pytest.raises(AttributeError):
+        hub_key.entity_id = '1'
+    with pytest.raises(AttributeError):
+        hub_key.extra = '1'
+
+
+def test_hub_key_hash_and_equality():
+    a = HubKey.parse(PARSE_KEYS[1])
+    b = HubKey.parse(PARSE_KEYS[1].lower().replace('id-', 'ID-'))
+    assert a == b
+    assert not a != b
+    assert hash(a) == hash(b)
+    assert len({a, b, HubKey.parse(PARSE_KEYS[0])}) == 2
+
+
+def test_hub_key_pickle():
+    import pickle
+    hub_key = HubKey.parse(PARSE_KEYS[0])
+    assert pickle.loads(pickle.dumps(hub_key)) == hub_key
+
+
+def test_hub_key_parse_invalid():
+    with pytest.raises(ValueError):
+        HubKey.parse('1234')
+    with pytest.raises(ValueError):
+        HubKey.parse(None)
+
+
+@pytest.mark.parametrize('string', [
+    '', 'a', 'Open.Permissions.org', 'openpermissions.org.', 'a' * 63, 'a' * 64, 'a..b', '.', '..', 'a.' + 'b' * 64,
+    u'openpermissions.org', u'localhost:8000'
+])
+def test_idna_encode_ascii_same_as_codec(string):
+    try:
+        expected = string.encode('idna').decode('ascii')
+    except UnicodeError as exc:
+        with pytest.raises(exc.__class__):
+            idna_encode(string)
+    else:
+        result = idna_encode(string)
+        assert result == expected
+        assert type(result) == type(expected)
+
+
+@pytest.mark.parametrize('string', ['hub1', u'hub1', 'a b/c:d', u'maryeváns'])
+def test_url_quote_same_as_codec(string):
+    result = url_quote(string)
+    expected = quote(string.encode('utf8'), safe=':/')
+    assert result == expected
+    assert type(result) == type(expected)
+
+
+@pytest.mark.parametrize('resolver_id', [
+    'openpermissions.org', u'openpermissions.org', 'https://Open.org', u'https://测试', u'测试', 'localhost:8000'
+])
+def test_normalise_resolver_id_memoized(resolver_id):
+    first = _normalise_resolver_id(resolver_id)
+    second = _normalise_resolver_id(resolver_id)
+
+    assert first is second
+    assert (type(resolver_id), resolver_id) in _normalise_resolver_id.cache
+
+
+def test_normalise_errors_not_memoized():
+    with pytest.raises(AttributeError):
+        _normalise_hub_id(None)
+    assert (type(None), None) not in _normalise_hub_id.cache
+
+
+def _s1_key(**parts):
+    values = {
+        'resolver_id': 'https://openpermissions.org',
+        'schema_version': 's1',
+        'hub_id': 'hub1',
+        'repository_id': '37cd1397e0814e989fa22da6b15fec60',
+        'entity_type': 'asset',
+        'entity_id': '10e4b9612337f237118e1678ec001fa6'
+    }
+    values.update(parts)
+    return SEPARATOR.join(values[p] for p in PARTS.keys())
+
+
+def _regex_s1(key):
+    match = COMPILED_PATTERN.match(key)
+    return match.groups() if match else None
+
+
+FIXTURE_S1_KEYS = [_s1_key(**{part: string}) for string, part in VALID_PARTS + INVALID_PARTS]
+
+
+@pytest.mark.parametrize('key', FIXTURE_S1_KEYS + [
+    _s1_key() + '\n',
+    _s1_key() + '\n\n',
+    _s1_key() + '/',
+    _s1_key(resolver_id='https://a.' + 'b' * 63),
+    _s1_key(resolver_id='https://a.' + 'b' * 64),
+    _s1_key(resolver_id='https://a..b'),
+    _s1_key(resolver_id='https://a.b:80:80'),
+    _s1_key(resolver_id='http://a.b:80'),
+    _s1_key(resolver_id='ftp://a.b'),
+    _s1_key(repository_id='a' * 64),
+    _s1_key(repository_id='a' * 65),
+    _s1_key(repository_id=''),
+    _s1_key(repository_id='37CD'),
+    _s1_key(entity_type='Asset'),
+    _s1_key(entity_id=''),
+    _s1_key(entity_id=u'１２３'),
+    '',
+    '/' * 7,
+])
+def test_match_s1_same_as_pattern(key):
+    assert _match_s1(key) == _regex_s1(key)
+
+
+def test_match_s1_same_as_pattern_fuzzed():
+    import random
+    rand = random.Random(0)
+    alphabet = u'/:.-_s1abcfhuAZ09\n %é'
+    for _ in range(20000):
+        key = list(rand.choice(FIXTURE_S1_KEYS))
+        for _ in range(rand.randint(1, 3)):
+            i = rand.randint(0, len(key))
+            action = rand.randint(0, 2)
+            if action == 0:
+                key.insert(i, rand.choice(alphabet))
+            elif action == 1 and i < len(key):
+                del key[i]
+            elif i < len(key):
+                key[i] = rand.choice(alphabet)
+        key = u''.join(key)
+        assert _match_s1(key) == _regex_s1(key), key
+
+
+def test_match_s1_checks_parts_after_cached_prefix():
+    assert _match_s1(_s1_key())
+
+    assert _match_s1(_s1_key(entity_type='creation')) is None
+    assert _match_s1(_s1_key(entity_id='x')) is None
+    assert _match_s1(_s1_key(repository_id='a1'))[3] == 'a1'
+
+
+@pytest.mark.parametrize('key', PARSE_KEYS)
+@pytest.mark.parametrize('buffer_type', [bytearray, buffer])
+def test_parse_buffer(key, buffer_type):
+    expected = parse_hub_key(key)
+
+    parsed = parse_hub_key(buffer_type(key))
+
+    assert dict((k, str(v)) for k, v in parsed.items()) == expected
+    assert is_hub_key(buffer_type(key))
+    assert is_hub_key(buffer_type(key), hub_id=['hub1', 'hub2'])
+    assert not is_hub_key(buffer_type(key), hub_id='hub2')
+    assert not is_hub_key(buffer_type(key[:-1] + '/'))
+
+
+def test_match_s1_type_error():
+    with pytest.raises(TypeError):
+        _match_s1(1234)
+
+
+def _chained_parse(key):
+    match = COMPILED_PATTERN.match(key)
+    if match:
+        return dict(zip(PARTS.keys(), match.groups()))
+    match = COMPILED_PATTERN_S0.match(key)
+    if match:
+        return dict(map(normalise_part, zip(PARTS_S0.keys(), match.groups())))
+    return None
+
+
+@pytest.mark.parametrize('key', PARSE_KEYS + FIXTURE_S1_KEYS + [
+    'HTTPS://openpermissions.org/S0/HUB1/ASSET/maryevans/maryevanspictureid/10413373',
+    'https://openpermissions.org/S1/hub1/37cd1397e0814e989fa22da6b15fec60/asset/37cd1397e0814e989fa22da6b15fec60',
+    'https://openpermissions.org/s2/hub1/37cd1397e0814e989fa22da6b15fec60/asset/37cd1397e0814e989fa22da6b15fec60',
+    'https://openpermissions.org/s0/hub1/asset/maryevans/maryevanspictureid/10413373\n',
+    'https://openpermissions.org/s0/hub1/asset/maryevans/maryevanspictureid',
+    'https://openpermissions.org/s0/hub1/asset/maryevans/maryevanspictureid/a/b',
+    'https://openpermissions.org/s0',
+    'https://openpermissions.org/s0/',
+])
+def test_schema_dispatch_same_as_chained_patterns(key):
+    try:
+        parsed = parse_hub_key(key)
+    except ValueError:
+        parsed = None
+    assert parsed == _chained_parse(key)
+
+
+def test_get_schema_type_error():
+    with pytest.raises(TypeError):
+        parse_hub_key(1234)
+
+
+def test_register_schema():
+    parts = OrderedDict([
+        ('resolver_id', RESOLVER_ID),
+        ('schema_version', 's2'),
+        ('hub_id', 'hub1'),
+        ('entity_id', UUID)
+    ])
+    register_schema(Schema('s2', parts))
+    try:
+        key = 'https://openpermissions.org/s2/hub1/37cd1397e0814e989fa22da6b15fec60'
+        assert parse_hub_key(key) == {
+            'resolver_id': 'https://openpermissions.org',
+            'schema_version': 's2',
+            'hub_id': 'hub1',
+            'entity_id': '37cd1397e0814e989fa22da6b15fec60'
+        }
+        assert HubKey.parse(key).entity_id == '37cd1397e0814e989fa22da6b15fec60'
+        assert not is_hub_key(key + '/asset')
+    finally:
+        del SCHEMAS['s2']
+
+    assert not is_hub_key(key)
+
+
+@pytest.fixture
+def instrumentation():
+    events = []
+    yield enable_instrumentation(lambda *args: events.append(args)), events
+    disable_instrumentation()
+
+
+def test_instrumentation_disabled_by_default():
+    assert get_instrumentation() is None
+
+
+def test_instrumentation_counts_outcomes(instrumentation):
+    instrumentation, events = instrumentation
+    s1 = 'https://openpermissions.org/s1/hub1/37cd1397e0814e989fa22da6b15fec60/asset/37cd1397e0814e989fa22da6b15fec60'
+    s0 = 'https://openpermissions.org/s0/hub1/asset/maryevans/maryevanspictureid/10413373'
+
+    parse_hub_key(s1)
+    parse_hub_key(s0)
+    with pytest.raises(ValueError):
+        parse_hub_key('invalid')
+    assert is_hub_key(s1)
+    assert not is_hub_key('invalid')
+    with pytest.raises(ValueError):
+        match_part('X', 'entity_id')
+
+    outcomes = [
+        ('parse_hub_key', 's1'),
+        ('parse_hub_key', 's0'),
+        ('parse_hub_key', 'invalid'),
+        ('is_hub_key', 's1'),
+        ('is_hub_key', 'invalid'),
+        ('match_part', 'invalid:entity_id'),
+    ]
+    assert get_instrumentation() is instrumentation
+    assert instrumentation.counters == dict.fromkeys(outcomes, 1)
+    assert instrumentation.histograms['parse_hub_key'].count == 3
+    assert [e[:2] for e in events] == outcomes
+
+
+def test_instrumentation_generate_hub_key(instrumentation):
+    instrumentation, _ = instrumentation
+
+    generate_hub_key('https://openpermissions.org', 'hub1', '37cd1397e0814e989fa22da6b15fec60', 'asset')
+    with pytest.raises(ValueError):
+        generate_hub_key('https://openpermissions.org', 'hub1', '37cd1397e0814e989fa22da6b15fec60', 'thing')
+
+    assert instrumentation.counters[('generate_hub_key', 's1')] == 1
+    assert instrumentation.counters[('generate_hub_key', 'invalid')] == 1
+    assert instrumentation.counters[('match_part', 'invalid:entity_type')] == 1
+    assert instrumentation.counters[('match_part', 'valid')] == 7
+
+
+def test_disable_instrumentation(instrumentation):
+    instrumentation, events = instrumentation
+    disable_instrumentation()
+
+    assert is_hub_key('invalid') is False
+    assert get_instrumentation() is None
+    assert not instrumentation.counters
+    assert not events
+
+
+@pytest.mark.parametrize('func,args', [
+    (parse_hub_key, ('https://openpermissions.org/s0/hub1/asset/maryevans/maryevanspictureid/10413373',)),
+    (is_hub_key, ('invalid',)),
+    (match_part, ('hub1', 'hub_id')),
+    (generate_hub_key, ('https://openpermissions.org', 'hub1', '37cd1397e0814e989fa22da6b15fec60', 'asset')),
+])
+def test_disable_instrumentation_during_call(instrumentation, func, args):
+    import linecache
+
+    def trace(frame, event, arg):
+        # Disable instrumentation after the function has checked it, as
+        # another thread could
+        if frame.f_code is func.__code__:
+            line = linecache.getline(frame.f_code.co_filename, frame.f_lineno)
+            if event == 'line' and '.call(' in line:
+                disable_instrumentation()
+            return trace
+
+    sys.settrace(trace)
+    try:
+        func(*args)
+    finally:
+        sys.settrace(None)
+
+    assert get_instrumentation() is None
+
+
+@pytest.fixture
+def hub2():
+    configure('hub2')
+    yield
+    configure(DEFAULT_HUB_ID)
+
+
+def test_configure(hub2):
+    s1 = 'https://openpermissions.org/s1/{}/37cd1397e0814e989fa22da6b15fec60/asset/37cd1397e0814e989fa22da6b15fec60'
+    s0 = 'https://openpermissions.org/s0/{}/asset/maryevans/maryevanspictureid/10413373'
+
+    assert get_hub_id() == 'hub2'
+    assert PARTS['hub_id'] == PARTS_S0['hub_id'] == 'hub2'
+    assert COMPILED_PATTERN.pattern == hubkey.PATTERN
+    assert 'hub_id>hub2' in hubkey.PATTERN
+    assert parse_hub_key(s1.format('hub2'))['hub_id'] == 'hub2'
+    assert parse_hub_key(s0.format('HUB2'))['hub_id'] == 'hub2'
+    assert not is_hub_key(s1.format('hub1'))
+    assert not is_hub_key(s0.format('hub1'))
+    match_part('hub2', 'hub_id')
+    with pytest.raises(ValueError):
+        match_part('hub1', 'hub_id')
+
+
+def test_configure_regex(hub2):
+    configure('hub[0-9]')
+    s1 = 'https://openpermissions.org/s1/hub7/37cd1397e0814e989fa22da6b15fec60/asset/37cd1397e0814e989fa22da6b15fec60'
+
+    assert parse_hub_key(s1)['hub_id'] == 'hub7'
+    assert not is_hub_key(s1.replace('hub7', 'hubx'))
+
+
+def test_lazy_pattern():
+    pattern = LazyPattern('^a+$')
+
+    assert 'match' not in vars(pattern)
+    assert pattern.match('aa')
+    assert 'match' in vars(pattern)
+    pattern.reset('^b+$')
+    assert pattern.pattern == '^b+$'
+    assert not pattern.match('aa')
+    assert pattern.match('bb')
+
+
+def test_use_tornado_options(hub2):
+    options = OptionParser()
+    use_tornado_options(options)
+
+    assert options.hub_id == 'hub2'
+    options.hub_id = 'hub3'
+    assert get_hub_id() == 'hub3'
+    options.parse_command_line(['test', '--hub_id=hub4'])
+    assert get_hub_id() == 'hub4'
+
+
+def test_use_tornado_options_already_defined(hub2):
+    options = OptionParser()
+    options.define('hub_id', default='hub3')
+    use_tornado_options(options)
+
+    assert get_hub_id() == 'hub3'
+    options.parse_command_line(['test', '--hub_id=hub4'])
+    assert get_hub_id() == 'hub4'
+
+
+@pytest.mark.parametrize('statement,tornado', [
+    ('import bass.hubkey', False),
+    ('import tornado.options; import bass.hubkey; tornado.options.options.hub_id = "hub2"', True),
+])
+def test_import_tornado_options(statement, tornado):
+    check = ('; import sys, bass.hubkey; '
+             'assert ("tornado.options" in sys.modules) == {}; '
+             'assert bass.hubkey.get_hub_id() == {!r}').format(tornado, 'hub2' if tornado else 'hub1')
+    subprocess.check_call([sys.executable, '-c', statement + check])
+
+
+def _parse_or_none(key, **kwargs):
+    try:
+        return parse_hub_key(key, **kwargs)
+    except (ValueError, TypeError):
+        return None
+
+
+@pytest.mark.parametrize('key', PARSE_KEYS + FIXTURE_S1_KEYS)
+def test_parse_with_hub_id_same_as_configured(key):
+    expected = _parse_or_none(key)
+    configure('hub2')
+    try:
+        assert _parse_or_none(key, hub_id='hub1') == expected
+        assert _parse_or_none(key, hub_id=['hub1', 'hub3']) == expected
+        assert is_hub_key(key, hub_id='hub1') == (expected is not None)
+    finally:
+        configure(DEFAULT_HUB_ID)
+
+
+def test_parse_with_hub_id():
+    s1 = 'https://openpermissions.org/s1/hub2/37cd1397e0814e989fa22da6b15fec60/asset/37cd1397e0814e989fa22da6b15fec60'
+    s0 = 'https://openpermissions.org/s0/HUB2/asset/maryevans/maryevanspictureid/10413373'
+
+    assert parse_hub_key(s1, hub_id='hub2')['hub_id'] == 'hub2'
+    assert parse_hub_key(s0, hub_id='hub2')['hub_id'] == 'hub2'
+    assert HubKey.parse(s1, hub_id='hub2').hub_id == 'hub2'
+    assert list(parse_hub_keys([s1, s0], hub_id='hub2')) == [parse_hub_key(s1, 'hub2'), parse_hub_key(s0, 'hub2')]
+    assert not is_hub_key(s1)
+    assert not is_hub_key(s1, hub_id='hub3')
+    with pytest.raises(ValueError):
+        parse_hub_key(s1, hub_id='hub3')
+
+
+@pytest.mark.parametrize('hub_ids', [
+    ['hub1', 'hub2'],
+    ('hub1', 'hub2'),
+    set(['hub1', 'hub2']),
+    frozenset(['hub1', 'hub2']),
+    ['hub[12]'],
+    ['hub1', 'hub[2]'],
+])
+def test_parse_with_hub_ids(hub_ids):
+    key = 'https://openpermissions.org/s1/{}/37cd1397e0814e989fa22da6b15fec60/asset/37cd1397e0814e989fa22da6b15fec60'
+
+    for _ in range(2):
+        assert parse_hub_key(key.format('hub1'), hub_id=hub_ids)['hub_id'] == 'hub1'
+        assert parse_hub_key(key.format('hub2'), hub_id=hub_ids)['hub_id'] == 'hub2'
+        assert not is_hub_key(key.format('hub3'), hub_id=hub_ids)
+        assert not is_hub_key(key.format('HUB1'), hub_id=hub_ids)
+        assert not is_hub_key(1234, hub_id=hub_ids)
+
+
+@pytest.mark.parametrize('hub_ids', [['hub1', 'HUB1'], ['HUB1', 'hub1']])
+def test_parse_with_hub_ids_differing_in_case(hub_ids):
+    s1 = 'https://openpermissions.org/s1/{}/37cd1397e0814e989fa22da6b15fec60/asset/37cd1397e0814e989fa22da6b15fec60'
+    s0 = 'https://openpermissions.org/s0/{}/asset/maryevans/maryevanspictureid/10413373'
+
+    assert parse_hub_key(s1.format('hub1'), hub_id=hub_ids)['hub_id'] == 'hub1'
+    assert parse_hub_key(s1.format('HUB1'), hub_id=hub_ids)['hub_id'] == 'HUB1'
+    assert not is_hub_key(s1.format('Hub1'), hub_id=hub_ids)
+    for hub_id in ('hub1', 'HUB1', 'Hub1'):
+        assert parse_hub_key(s0.format(hub_id), hub_id=hub_ids)['hub_id'] == 'hub1'
+
+
+def test_matcher():
+    s1 = 'https://openpermissions.org/s1/{}/37cd1397e0814e989fa22da6b15fec60/asset/37cd1397e0814e989fa22da6b15fec60'
+
+    schema, values = matcher()(s1.format('hub1'))
+    assert schema.version == 's1'
+    assert values[2] == 'hub1'
+    assert matcher()(s1.format('hub2')) == (None, None)
+    assert matcher(['hub1', 'hub2'])(s1.format('hub2'))[1][2] == 'hub2'
+    with pytest.raises(TypeError):
+        matcher('hub2')(1234)
+
+
+def test_candidate_schemas():
+    s1 = 'https://openpermissions.org/s1/{}/37cd1397e0814e989fa22da6b15fec60/asset/37cd1397e0814e989fa22da6b15fec60'
+
+    assert candidate_schemas(s1.format('hub1')) == (SCHEMAS['s1'],)
+    assert candidate_schemas(s1.format('hub2')) == (SCHEMAS['s1'],)
+    assert [s.version for s in candidate_schemas(s1.format('hub2'), ['hub1', 'hub2'])] == ['s1']
+    assert candidate_schemas(s1.format('hub3'), ['hub1', 'hub2']) == ()
+    assert candidate_schemas('not a key') == ()
+    with pytest.raises(TypeError):
+        candidate_schemas(1234)
+
+
+def test_parse_with_no_hub_ids():
+    assert not is_hub_key(PARSE_KEYS[0], hub_id=[])
+
+
+def test_hub_schemas_cache_is_bounded():
+    key = 'https://openpermissions.org/s1/hub{}/37cd1397e0814e989fa22da6b15fec60/asset/1'
+
+    for i in range(HUB_SCHEMAS_MAXSIZE * 2):
+        assert is_hub_key(key.format(i), hub_id='hub{}'.format(i))
+
+    assert len(hubkey._HUB_SCHEMAS) == HUB_SCHEMAS_MAXSIZE
+
+
+def test_register_schema_clears_hub_schemas():
+    parse_hub_key(PARSE_KEYS[0], hub_id='hub1')
+    register_schema(SCHEMAS['s1'])
+
+    assert not hubkey._HUB_SCHEMAS
+
+
+def test_parse_with_intern_table():
+    table = InternTable()
+    key = 'https://openpermissions.org/s1/hub1/37cd1397e0814e989fa22da6b15fec60/asset/{}'
+    first = parse_hub_key(key.format('1'), intern=table)
+    second = parse_hub_key(key.format('2'), intern=table)
+
+    assert first == parse_hub_key(key.format('1'))
+    for part in ('resolver_id', 'schema_version', 'hub_id', 'repository_id', 'entity_type'):
+        assert first[part] is second[part]
+    assert table.stats() == {'size': 5, 'maxsize': table.maxsize, 'hits': 5, 'misses': 5,
+                             'saved_bytes': table.saved_bytes}
+    assert table.saved_bytes > 0
+
+
+def test_intern_table_does_not_intern_entity_id():
+    table = InternTable()
+    key = 'https://openpermissions.org/s0/hub1/asset/maryevans/id/{}'
+    first = parse_hub_key(key.format(1234), intern=table)
+    second = HubKey.parse(key.format(1234), intern=table)
+
+    assert first['entity_id'] is not second.entity_id
+    assert first['organisation_id'] is second.organisation_id
+    assert table.stats()['size'] == 6
+
+
+def test_intern_table_is_bounded():
+    table = InternTable(maxsize=2)
+    key = 'https://openpermissions.org/s0/hub1/asset/maryevans/id/1'
+
+    parsed = parse_hub_key(key, intern=table)
+
+    assert parsed == parse_hub_key(key)
+    assert table.stats()['size'] == 2
+    assert table.misses == 6
+
+
+def test_intern_table_clear():
+    table = InternTable()
+    parse_hub_key(PARSE_KEYS[0], intern=table)
+    table.clear()
+
+    assert table.stats() == {'size': 0, 'maxsize': table.maxsize, 'hits': 0, 'misses': 0, 'saved_bytes': 0}
+
+
+def test_parse_hub_keys_with_default_intern_table():
+    INTERN_TABLE.clear()
+    key = 'https://openpermissions.org/s1/hub1/37cd1397e0814e989fa22da6b15fec60/asset/{}'
+    parsed = list(parse_hub_keys([key.format(i) for i in range(3)] + ['invalid'], on_error='skip', intern=True))
+
+    assert len(parsed) == 3
+    assert parsed[0]['repository_id'] is parsed[2]['repository_id']
+    assert INTERN_TABLE.hits == 10
+    INTERN_TABLE.clear()
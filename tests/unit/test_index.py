@@ -0,0 +1,132 @@
+# -*- coding: utf-8 -*-
+
+# Copyright 2016 Open Permissions Platform Coalition
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License. You may obtain a copy of the License at
+# http://www.apache.org/licenses/LICENSE-2.0
+# Unless required by applicable law or agreed to in writing, software distributed under the License is
+# distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and limitations under the License.
+"""Unit tests for module index
+"""
+import pytest
+
+from bass.index import HubKeyIndex
+
+REPOSITORY_1 = '37cd1397e0814e989fa22da6b15fec60'
+REPOSITORY_2 = '0123456789abcdef0123456789abcdef'
+S1_KEY = 'https://openpermissions.org/s1/{}/{}/{}/{}'
+S0_KEY = 'https://openPerMissIoNS.org/S0/hUb1/creATion/4CoRnERs/4CoRnersPicTureID/ID-10413373'
+
+KEYS = [
+    S1_KEY.format('hub1', REPOSITORY_1, 'asset', '1'),
+    S1_KEY.format('hub1', REPOSITORY_1, 'asset', '2'),
+    S1_KEY.format('hub1', REPOSITORY_1, 'offer', '3'),
+    S1_KEY.format('hub1', REPOSITORY_2, 'offer', '4'),
+    S1_KEY.format('hub2', REPOSITORY_1, 'offer', '5'),
+    'https://example.com/s1/hub1/{}/offer/6'.format(REPOSITORY_1),
+]
+
+
+@pytest.fixture
+def index():
+    return HubKeyIndex(KEYS, hub_id=['hub1', 'hub2'])
+
+
+def test_bulk_load(index):
+    assert len(index) == len(KEYS)
+    assert sorted(index) == sorted(KEYS)
+
+
+@pytest.mark.parametrize('query,expected', [
+    ({'resolver_id': 'https://openpermissions.org'}, [0, 1, 2, 3, 4]),
+    ({'resolver_id': 'https://openpermissions.org', 'hub_id': 'hub1'}, [0, 1, 2, 3]),
+    ({'resolver_id': 'https://openpermissions.org', 'hub_id': 'hub1', 'repository_id': REPOSITORY_1},
+     [0, 1, 2]),
+    ({'resolver_id': 'https://openpermissions.org', 'hub_id': 'hub1', 'repository_id': REPOSITORY_1,
+      'entity_type': 'asset'}, [0, 1]),
+    ({'repository_id': REPOSITORY_1}, [0, 1, 2, 4, 5]),
+    ({'resolver_id': 'https://openpermissions.org', 'hub_id': 'hub1', 'entity_type': 'offer'}, [2, 3]),
+    ({'entity_type': 'offer'}, [2, 3, 4, 5]),
+    ({'resolver_id': 'https://unknown.org'}, []),
+    ({'hub_id': 'hub1', 'entity_type': 'agreement'}, []),
+])
+def test_query(index, query, expected):
+    assert sorted(index.keys(**query)) == sorted(KEYS[i] for i in expected)
+    assert index.count(**query) == len(expected)
+
+
+def test_add_s0_key():
+    index = HubKeyIndex()
+    index.add(S0_KEY)
+
+    canonical = 'https://openpermissions.org/s0/hub1/creation/4corners/4cornerspictureid/ID-10413373'
+    assert list(index) == [canonical]
+    assert list(index.keys(repository_id=None, entity_type='creation')) == [canonical]
+    assert S0_KEY in index
+    assert canonical in index
+
+
+def test_add_duplicate(index):
+    index.add(KEYS[0])
+    index.add(KEYS[0] + '\n')
+
+    assert len(index) == len(KEYS)
+
+
+def test_add_invalid_key():
+    index = HubKeyIndex()
+
+    with pytest.raises(ValueError):
+        index.add('not a key')
+    with pytest.raises(ValueError):
+        index.add(None)
+    with pytest.raises(ValueError):
+        index.add(S1_KEY.format('hub2', REPOSITORY_1, 'asset', '1'))
+
+
+def test_update_skip():
+    index = HubKeyIndex()
+
+    assert index.update(KEYS[:2] + ['not a key', None, 1234], on_error='skip') == 3
+    assert len(index) == 2
+
+
+def test_update_invalid_on_error():
+    with pytest.raises(ValueError):
+        HubKeyIndex().update(KEYS, on_error='yield_error')
+
+
+def test_remove(index):
+    index.remove(KEYS[0])
+
+    assert KEYS[0] not in index
+    assert len(index) == len(KEYS) - 1
+    assert index.count(entity_type='asset') == 1
+
+
+def test_remove_prunes_empty_branches(index):
+    for key in KEYS:
+        index.remove(key)
+
+    assert len(index) == 0
+    assert index._tree == {}
+
+
+def test_remove_missing_key(index):
+    with pytest.raises(KeyError):
+        index.remove(S1_KEY.format('hub1', REPOSITORY_2, 'asset', '1'))
+    with pytest.raises(KeyError):
+        index.remove(S1_KEY.format('hub1', REPOSITORY_1, 'asset', '7'))
+
+    assert len(index) == len(KEYS)
+
+
+def test_discard(index):
+    assert index.discard(KEYS[0])
+    assert not index.discard(KEYS[0])
+
+
+def test_contains_invalid_key(index):
+    assert 'not a key' not in index
+    assert None not in index
@@ -0,0 +1,63 @@
+# -*- coding: utf-8 -*-
+
+# Copyright 2016 Open Permissions Platform Coalition
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License. You may obtain a copy of the License at
+# http://www.apache.org/licenses/LICENSE-2.0
+# Unless required by applicable law or agreed to in writing, software distributed under the License is
+# distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and limitations under the License.
+"""Unit tests for module instrumentation
+"""
+import pytest
+
+from bass.instrumentation import Histogram, Instrumentation
+
+
+def test_histogram():
+    histogram = Histogram(buckets=(1, 2, 4))
+    for seconds in [0.5, 1, 1.5, 3, 3, 10]:
+        histogram.add(seconds)
+
+    assert histogram.counts == [2, 1, 2, 1]
+    assert histogram.count == 6
+    assert histogram.total == 19
+    assert histogram.percentile(0) == 1
+    assert histogram.percentile(50) == 2
+    assert histogram.percentile(80) == 4
+    assert histogram.percentile(100) == float('inf')
+
+
+def test_histogram_empty():
+    assert Histogram().percentile(50) is None
+
+
+def test_call_records_outcome():
+    events = []
+    instrumentation = Instrumentation(lambda *args: events.append(args))
+
+    assert instrumentation.call('f', len, ('abc',), str) == 3
+
+    assert instrumentation.counters == {('f', '3'): 1}
+    assert instrumentation.histograms['f'].count == 1
+    assert [e[:2] for e in events] == [('f', '3')]
+    assert events[0][2] >= 0
+
+
+def test_call_records_error_outcome():
+    instrumentation = Instrumentation()
+
+    with pytest.raises(TypeError):
+        instrumentation.call('f', len, (1,), str, 'error')
+
+    assert instrumentation.counters == {('f', 'error'): 1}
+
+
+def test_reset():
+    instrumentation = Instrumentation()
+    instrumentation.record('f', 'ok', 1e-6)
+
+    instrumentation.reset()
+
+    assert not instrumentation.counters
+    assert not instrumentation.histograms
@@ -0,0 +1,39 @@
+# -*- coding: utf-8 -*-
+
+# Copyright 2016 Open Permissions Platform Coalition
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License. You may obtain a copy of the License at
+# http://www.apache.org/licenses/LICENSE-2.0
+# Unless required by applicable law or agreed to in writing, software distributed under the License is
+# distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and limitations under the License.
+"""Unit tests for module pool
+"""
+from multiprocessing.pool import ThreadPool
+
+from bass.pool import imap
+
+
+def test_imap():
+    pool = ThreadPool(2)
+    try:
+        assert list(imap(pool, abs, range(-5, 5), 3)) == [abs(i) for i in range(-5, 5)]
+    finally:
+        pool.terminate()
+
+
+def test_imap_reads_ahead_window_items():
+    read = []
+
+    def items():
+        for i in range(10):
+            read.append(i)
+            yield i
+
+    pool = ThreadPool(2)
+    try:
+        results = imap(pool, abs, items(), 3)
+        assert next(results) == 0
+        assert read == [0, 1, 2]
+    finally:
+        pool.terminate()
@@ -0,0 +1,138 @@
+# -*- coding: utf-8 -*-
+
+# Copyright 2016 Open Permissions Platform Coalition
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License. You may obtain a copy of the License at
+# http://www.apache.org/licenses/LICENSE-2.0
+# Unless required by applicable law or agreed to in writing, software distributed under the License is
+# distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and limitations under the License.
+"""Unit tests for module scan
+"""
+from StringIO import StringIO
+
+import pytest
+
+from bass.hubkey import parse_hub_key
+from bass.scan import main, ranges, scan_buffer, scan_file
+
+S1_KEY = 'https://openpermissions.org/s1/hub1/37cd1397e0814e989fa22da6b15fec60/asset/37cd1397e0814e989fa22da6b15fec60'
+S0_KEY = 'HTTPS://openPerMissIoNS.org/S0/hUb1/creATion/4CoRnERs/4CoRnersPicTureID/ID-10413373'
+TEXT = '\n'.join([
+    'INFO key={} status=200'.format(S1_KEY),
+    '{{"keys": ["{}", "{}"]}}'.format(S0_KEY, S1_KEY.replace('hub1', 'hub2')),
+    'GET https://example.com/path took 10ms',
+    'https://openpermissions.org/s1/hub1/37cd1397e0814e989fa22da6b15fec60/asset/37cd/more',
+    'http://localhost:8000/s1/hub1/1/offer/2 {}'.format(S1_KEY),
+    '',
+])
+
+
+def expected(text, keys):
+    offsets = []
+    for key in keys:
+        offset = text.find(key, offsets[-1] + 1 if offsets else 0)
+        offsets.append(offset)
+    return [(o, k, parse_hub_key(k)) for o, k in zip(offsets, keys)]
+
+
+EXPECTED_KEYS = [S1_KEY, S0_KEY, 'http://localhost:8000/s1/hub1/1/offer/2', S1_KEY]
+
+
+def test_scan_buffer():
+    assert list(scan_buffer(TEXT)) == expected(TEXT, EXPECTED_KEYS)
+
+
+def test_scan_buffer_with_hub_id():
+    keys = [k for _, k, _ in scan_buffer(TEXT, hub_id=['hub1', 'hub2'])]
+
+    assert keys == [S1_KEY, S0_KEY, S1_KEY.replace('hub1', 'hub2'), EXPECTED_KEYS[2], S1_KEY]
+
+
+def test_scan_buffer_range():
+    start = TEXT.index('\n') + 1
+
+    assert [k for _, k, _ in scan_buffer(TEXT, start, TEXT.index('GET'))] == [S0_KEY]
+
+
+@pytest.mark.parametrize('text', [
+    S1_KEY + 'g',
+    S1_KEY + '/',
+    S1_KEY.replace('asset', 'thing'),
+    'xx' + S1_KEY[8:],
+])
+def test_scan_buffer_no_key(text):
+    assert list(scan_buffer(text)) == []
+
+
+@pytest.mark.parametrize('after', ['.', ',', ')', ';', ':200', "'", '-', '"', '!', '%20', ' '])
+def test_scan_buffer_s1_key_followed_by_punctuation(after):
+    text = 'created ({}{}'.format(S1_KEY, after)
+
+    assert [k for _, k, _ in scan_buffer(text)] == [S1_KEY]
+
+
+@pytest.mark.parametrize('text', [
+    "'{}'".format(S1_KEY),
+    '({})'.format(S1_KEY),
+    '{}, {}.'.format(S1_KEY, S1_KEY),
+])
+def test_scan_buffer_s1_keys_in_punctuation(text):
+    assert [k for _, k, _ in scan_buffer(text)] == [S1_KEY] * text.count(S1_KEY)
+
+
+def test_scan_buffer_s0_key_includes_path_characters():
+    assert [k for _, k, _ in scan_buffer(S0_KEY + ', x')] == [S0_KEY + ',']
+
+
+@pytest.mark.parametrize('n', [1, 2, 3, 5, 20])
+def test_ranges(n):
+    result = ranges(TEXT, n)
+
+    assert result[0][0] == 0
+    assert result[-1][1] == len(TEXT)
+    assert all(end == next_start for (_, end), (next_start, _) in zip(result, result[1:]))
+    assert all(TEXT[end - 1] == '\n' for _, end in result[:-1])
+
+
+def test_ranges_without_newlines():
+    assert ranges('a' * 10, 3) == [(0, 10)]
+
+
+@pytest.mark.parametrize('processes', [1, 2])
+def test_scan_file(tmpdir, processes):
+    path = tmpdir.join('log.txt')
+    path.write(TEXT * 5)
+
+    assert list(scan_file(str(path), processes)) == expected(TEXT * 5, EXPECTED_KEYS * 5)
+
+
+def test_scan_empty_file(tmpdir):
+    path = tmpdir.join('log.txt')
+    path.write('')
+
+    assert list(scan_file(str(path))) == []
+
+
+def test_main(tmpdir):
+    path = tmpdir.join('log.txt')
+    path.write(TEXT)
+    out = StringIO()
+
+    assert main([str(path), '-p', '2'], out=out) == 0
+
+    lines = out.getvalue().splitlines()
+    assert len(lines) == 4
+    assert lines[0] == '{}\t{}\t{}'.format(path, TEXT.index(S1_KEY), S1_KEY)
+
+
+@pytest.mark.parametrize('processes', ['1', '2'])
+def test_main_hub_id(tmpdir, processes):
+    path = tmpdir.join('log.txt')
+    path.write(TEXT)
+    out = StringIO()
+
+    assert main([str(path), '-p', processes, '--hub-id', 'hub1', '--hub-id', 'hub2'], out=out) == 0
+
+    keys = [line.split('\t')[2] for line in out.getvalue().splitlines()]
+    assert keys == [S1_KEY, S0_KEY, S1_KEY.replace('hub1', 'hub2'), 'http://localhost:8000/s1/hub1/1/offer/2', S1_KEY]
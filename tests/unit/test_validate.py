@@ -0,0 +1,163 @@
+# -*- coding: utf-8 -*-
+
+# Copyright 2016 Open Permissions Platform Coalition
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License. You may obtain a copy of the License at
+# http://www.apache.org/licenses/LICENSE-2.0
+# Unless required by applicable law or agreed to in writing, software distributed under the License is
+# distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and limitations under the License.
+"""Unit tests for module validate
+"""
+import gzip
+from StringIO import StringIO
+
+import pytest
+
+from bass.hubkey import is_hub_key
+from bass.validate import INVALID, main, reason, validate_files, validate_lines
+
+S1_KEY = 'https://openpermissions.org/s1/hub1/37cd1397e0814e989fa22da6b15fec60/asset/37cd1397e0814e989fa22da6b15fec60'
+S0_KEY = 'https://openPerMissIoNS.org/S0/hUb1/creATion/4CoRnERs/4CoRnersPicTureID/ID-10413373'
+INVALID_KEYS = [
+    ('', 'empty'),
+    ('not a key', 'too few parts'),
+    ('https://openpermissions.org/s2/hub1/asset/x', "schema_version 's2' is not registered"),
+    ('https://openpermissions.org/s1/hub1/37cd1397e0814e989fa22da6b15fec60/asset',
+     'expected 6 parts, got 5'),
+    ('https://-openpermissions.org/s1/hub1/37cd1397e0814e989fa22da6b15fec60/asset/1',
+     'resolver_id should match'),
+    ('https://openpermissions.org/s1/hub2/37cd1397e0814e989fa22da6b15fec60/asset/1',
+     'hub_id should match'),
+    ('https://openpermissions.org/s1/hub1/37cd1397e0814e989fa22da6b15fec60/thing/1',
+     'entity_type should match'),
+    ('https://openpermissions.org/s1/hub1/37cd1397e0814e989fa22da6b15fec60/asset/1X',
+     'entity_id should match'),
+    ('https://openpermissions.org/s0/hub1/asset/maryevans/id type/1', 'id_type should match'),
+]
+LINES = [S1_KEY, S0_KEY] + [key for key, _ in INVALID_KEYS] + [S1_KEY] * 3
+
+
+@pytest.mark.parametrize('key,expected', INVALID_KEYS)
+def test_reason(key, expected):
+    assert not is_hub_key(key)
+    assert reason(key).startswith(expected)
+
+
+@pytest.mark.parametrize('key', [S1_KEY, S0_KEY])
+def test_reason_valid_key(key):
+    assert reason(key) is None
+
+
+def test_validate_lines():
+    counts, rejects = validate_lines(enumerate([k + '\n' for k in LINES], 1))
+
+    assert counts == {'s1': 4, 's0': 1, INVALID: len(INVALID_KEYS)}
+    assert [(n, k) for n, _, k in rejects] == [(n, k) for n, k in enumerate(LINES, 1) if not is_hub_key(k)]
+    assert [r for _, r, _ in rejects] == [reason(k) for k, _ in INVALID_KEYS]
+
+
+def test_validate_lines_crlf():
+    counts, rejects = validate_lines([(1, S1_KEY + '\r\n')])
+
+    assert counts == {'s1': 1}
+    assert rejects == []
+
+
+def test_reason_with_hub_id():
+    key = S1_KEY.replace('/hub1/', '/hub2/')
+
+    assert reason(key, 'hub2') is None
+    assert reason(key, ['hub1', 'hub2']) is None
+    assert reason(S1_KEY, 'hub2').startswith('hub_id should match hub2')
+    assert reason(key[:-1] + 'X', ['hub1', 'hub2']).startswith('entity_id should match')
+
+
+def test_validate_lines_with_hub_id():
+    hub2_key = S1_KEY.replace('/hub1/', '/hub2/')
+    lines = enumerate([hub2_key, S1_KEY, S0_KEY.replace('hUb1', 'HUB2')], 1)
+
+    counts, rejects = validate_lines(lines, 'hub2')
+
+    assert counts == {'s1': 1, 's0': 1, INVALID: 1}
+    assert rejects == [(2, reason(S1_KEY, 'hub2'), S1_KEY)]
+
+
+def _write(path, lines, compress):
+    f = gzip.open(str(path), 'wb') if compress else open(str(path), 'wb')
+    with f:
+        f.write(''.join(k + '\n' for k in lines))
+
+
+@pytest.mark.parametrize('processes', [1, 2])
+def test_validate_files(tmpdir, processes):
+    paths = [tmpdir.join('keys.gz'), tmpdir.join('keys.txt')]
+    _write(paths[0], LINES, True)
+    _write(paths[1], LINES, False)
+    rejects = StringIO()
+
+    counts = validate_files([str(p) for p in paths], processes, chunk_size=3, rejects=rejects)
+
+    assert counts == {'s1': 8, 's0': 2, INVALID: 2 * len(INVALID_KEYS)}
+    expected = ['{}\t{}\t{}\t{}'.format(p, n, reason(k), k)
+                for p in paths for n, k in enumerate(LINES, 1) if not is_hub_key(k)]
+    assert rejects.getvalue().splitlines() == expected
+
+
+def test_main(tmpdir):
+    path = tmpdir.join('keys.gz')
+    rejects = tmpdir.join('rejects.tsv')
+    _write(path, LINES, True)
+    out = StringIO()
+
+    status = main([str(path), '--processes', '1', '--rejects', str(rejects)], out=out)
+
+    assert status == 1
+    report = dict(line.split(': ') for line in out.getvalue().splitlines())
+    assert report['keys'] == str(len(LINES))
+    assert report['valid'] == '5'
+    assert report['s0'] == '1'
+    assert report['s1'] == '4'
+    assert report['invalid'] == str(len(INVALID_KEYS))
+    assert 'keys/sec' in report
+    assert len(rejects.readlines()) == len(INVALID_KEYS)
+
+
+@pytest.mark.parametrize('processes', [1, 2])
+def test_validate_files_with_hub_id(tmpdir, processes):
+    path = tmpdir.join('keys.txt')
+    _write(path, [S1_KEY.replace('/hub1/', '/hub2/')] * 4 + [S1_KEY], False)
+
+    counts = validate_files([str(path)], processes, chunk_size=3, hub_id=['hub2'])
+
+    assert counts == {'s1': 4, INVALID: 1}
+
+
+def test_main_hub_id(tmpdir):
+    path = tmpdir.join('keys.txt')
+    _write(path, [S1_KEY.replace('/hub1/', '/hub2/'), S1_KEY.replace('/hub1/', '/hub3/')], False)
+    rejects = str(tmpdir.join('rejects.tsv'))
+
+    assert main([str(path), '-p', '1', '-r', rejects, '--hub-id', 'hub2'], out=StringIO()) == 1
+    assert main([str(path), '-p', '1', '-r', rejects, '--hub-id', 'hub2', '--hub-id', 'hub3'],
+                out=StringIO()) == 0
+
+
+def test_main_all_valid(tmpdir):
+    path = tmpdir.join('keys.txt')
+    _write(path, [S1_KEY, S0_KEY], False)
+
+    status = main([str(path), '-p', '1', '-r', str(tmpdir.join('rejects.tsv'))], out=StringIO())
+
+    assert status == 0
+
+
+@pytest.mark.parametrize('option', [['-c', '0'], ['-c', '-1'], ['-p', '0'], ['-p', '-2']])
+def test_main_rejects_values_below_one(tmpdir, option):
+    path = tmpdir.join('keys.txt')
+    _write(path, [S1_KEY], False)
+
+    with pytest.raises(SystemExit) as exc:
+        main([str(path), '-r', str(tmpdir.join('rejects.tsv'))] + option, out=StringIO())
+
+    assert exc.value.code == 2
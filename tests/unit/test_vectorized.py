@@ -0,0 +1,156 @@
+# -*- coding: utf-8 -*-
+
+# Copyright 2016 Open Permissions Platform Coalition
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License. You may obtain a copy of the License at
+# http://www.apache.org/licenses/LICENSE-2.0
+# Unless required by applicable law or agreed to in writing, software distributed under the License is
+# distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and limitations under the License.
+"""Unit tests for module vectorized
+"""
+import random
+
+import pytest
+
+np = pytest.importorskip('numpy')
+
+from bass import hubkey
+from bass.hubkey import DEFAULT_HUB_ID, configure, is_hub_key, parse_hub_key
+from bass.vectorized import validate
+from tests.unit.test_hubkey import FIXTURE_S1_KEYS, PARSE_KEYS, VALID_PATH_PARTS
+
+S0_KEY = 'https://openpermissions.org/s0/hub1/asset/maryevans/maryevanspictureid/10413373'
+
+KEYS = FIXTURE_S1_KEYS + PARSE_KEYS + [
+    S0_KEY.replace('maryevans/', part + '/') for part, _ in VALID_PATH_PARTS
+] + [
+    S0_KEY + '\n',
+    S0_KEY + '\n\n',
+    S0_KEY.replace('10413373', '%41%4'),
+    S0_KEY.replace('10413373', '%%41'),
+    S0_KEY.replace('10413373', '%4g'),
+    S0_KEY.replace('10413373', '%aF1'),
+    S0_KEY.replace('https', 'HTTP').replace('asset', 'CREATION').replace('hub1', 'HUB1'),
+    S0_KEY.replace('maryevans/', '/'),
+    S0_KEY.replace('openpermissions.org', 'a-.b'),
+    S0_KEY.replace('openpermissions.org', 'a.-b'),
+    S0_KEY.replace('openpermissions.org', 'a..b:800'),
+    S0_KEY.replace('openpermissions.org', '-a:80'),
+    S0_KEY.replace('openpermissions.org', 'a.b:8'),
+    S0_KEY.replace('openpermissions.org', 'a' * 63 + '.' + 'b' * 64),
+    S0_KEY.replace('openpermissions.org', 'a' * 63 + '.' + 'b' * 63 + ':12345'),
+    PARSE_KEYS[0] + '\x00',
+    '',
+    '/' * 7,
+    '/' * 8,
+]
+
+
+def _expected(keys):
+    valid = [is_hub_key(k) for k in keys]
+    versions = [parse_hub_key(k)['schema_version'] if v else '' for k, v in zip(keys, valid)]
+    return valid, versions
+
+
+def _mutate(key, rand):
+    alphabet = '/:.-_%s0s1abcfhuAFZ09\n @'
+    key = list(key)
+    for _ in range(rand.randint(1, 3)):
+        i = rand.randint(0, len(key))
+        action = rand.randint(0, 2)
+        if action == 0:
+            key.insert(i, rand.choice(alphabet))
+        elif action == 1 and i < len(key):
+            del key[i]
+        elif i < len(key):
+            key[i] = rand.choice(alphabet)
+    return ''.join(key)
+
+
+def _assert_same(keys, **kwargs):
+    valid, versions = validate(keys, **kwargs)
+    expected_valid, expected_versions = _expected(list(keys))
+
+    assert valid.tolist() == expected_valid
+    assert versions.tolist() == expected_versions
+
+
+def test_validate_same_as_is_hub_key():
+    _assert_same(KEYS)
+
+
+def test_validate_same_as_is_hub_key_fuzzed():
+    rand = random.Random(0)
+    keys = [_mutate(rand.choice(KEYS), rand) for _ in range(5000)]
+    _assert_same(keys, chunk_size=777)
+
+
+def test_validate_same_as_is_hub_key_varied_resolvers():
+    # Some layouts are common enough to be sliced, and the rest are gathered
+    rand = random.Random(0)
+    hosts = ['a.b', 'openpermissions.org', 'x-1.example.co.uk:8080', 'resolver.io:80', 'a-.b', 'a..b']
+    keys = []
+    for _ in range(3000):
+        key = rand.choice(KEYS[:20]).replace('openpermissions.org', rand.choice(hosts) * rand.randint(1, 3))
+        keys.append(_mutate(key, rand) if rand.random() < 0.3 else key)
+    _assert_same(keys, chunk_size=1000)
+
+
+def test_validate_string_array():
+    _assert_same(np.array([k for k in KEYS if isinstance(k, str) and '\x00' not in k], dtype='S'))
+
+
+def test_validate_unicode_array():
+    _assert_same(np.array([unicode(k) for k in KEYS] + [u'https://maryeváns/s1'], dtype='U'))
+
+
+def test_validate_object_array():
+    keys = np.array(KEYS + [None, 1234, u'https://maryeváns/s1', '\xff'], dtype=object)
+    _assert_same(keys)
+
+
+def test_validate_empty():
+    valid, versions = validate([])
+    assert len(valid) == len(versions) == 0
+
+
+def test_validate_registered_schema():
+    parts = hubkey.OrderedDict([
+        ('resolver_id', hubkey.RESOLVER_ID),
+        ('schema_version', 's2'),
+        ('hub_id', 'hub1'),
+        ('entity_id', hubkey.UUID)
+    ])
+    hubkey.register_schema(hubkey.Schema('s2', parts))
+    try:
+        _assert_same(KEYS + ['https://openpermissions.org/s2/hub1/37cd1397e0814e989fa22da6b15fec60'])
+    finally:
+        del hubkey.SCHEMAS['s2']
+
+
+def test_validate_registered_schema_with_long_version():
+    parts = hubkey.OrderedDict([
+        ('resolver_id', hubkey.RESOLVER_ID),
+        ('schema_version', 's10'),
+        ('hub_id', 'hub1'),
+        ('entity_id', hubkey.UUID)
+    ])
+    hubkey.register_schema(hubkey.Schema('s10', parts))
+    try:
+        key = 'https://openpermissions.org/s10/hub1/37cd1397e0814e989fa22da6b15fec60'
+        _assert_same(KEYS + [key])
+        assert validate([key])[1].tolist() == ['s10']
+    finally:
+        del hubkey.SCHEMAS['s10']
+
+
+def test_validate_configured_hub_id():
+    configure('hub2')
+    try:
+        keys = [k.replace('/hub1/', '/hub2/') for k in KEYS]
+        valid, versions = validate(keys)
+        assert valid.tolist() == [is_hub_key(k) for k in keys]
+        assert any(valid)
+    finally:
+        configure(DEFAULT_HUB_ID)